@@ -6,16 +6,18 @@ Atlassian Jira module to read tasks based on JQL specification
 """
 __author__ = 'Scott Davis'
 
-from jira import JIRA
-from dateutil.parser import parse
 import sys
 import time
 
+# jira and dateutil are imported where they are used so importing this module stays quick
+
 
 def _date_string_to_datetime(date):
     date_time = None
     if date is not None:
         if date.strip() != '':
+            from dateutil.parser import parse
+
             # remove time zone offset
             date_time = parse((date[:date.rindex('-')]).strip())
             # date_time = parse(string.strip(date[:date.rindex('-')]))
@@ -51,17 +53,29 @@ class JiraProcessor:
 
         self.verbose = verbose
         self.jira_cloud_url = jira_cloud_url
-        options = {
-            'server': 'https://%s' % self.jira_cloud_url}
-        self.jira = JIRA(options, basic_auth=(jira_login_username, jira_login_password))
+        self.jira_login_username = jira_login_username
+        self.jira_login_password = jira_login_password
         self.jira_unplanned_activity_field_name = jira_unplanned_activity_field_name
         self.jira_epic_field_name = jira_epic_field_name
         self.jira_vacation_issue_type_name = jira_vacation_issue_type_name
 
-        # Get all projects viewable by anonymous users.
-        self.projects = self.jira.projects()
+        # the Jira client and the project list are created the first time they are used
+        self._jira = None
+        self._projects = None
         self.users_work_load = {}
 
+    @property
+    def jira(self):
+
+        if self._jira is None:
+            from jira import JIRA
+
+            options = {
+                'server': 'https://%s' % self.jira_cloud_url}
+            self._jira = JIRA(options, basic_auth=(self.jira_login_username, self.jira_login_password))
+
+        return self._jira
+
     def get_access_token(self):
 
         import requests
@@ -123,7 +137,12 @@ class JiraProcessor:
         })
 
     def projects(self):
-        return self.projects
+
+        # Get all projects viewable by anonymous users.
+        if self._projects is None:
+            self._projects = self.jira.projects()
+
+        return self._projects
 
     def task_work_logged(self):
         return self.users_work_load
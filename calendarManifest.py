@@ -0,0 +1,166 @@
+# coding=utf-8
+"""
+Manifest of the Outlook calendar exports read into the tasks database so
+only exports that changed since the last run are read again, with the
+meetings of every other export read back from the database
+"""
+__author__ = 'Scott Davis'
+
+import hashlib
+import os
+import sqlite3
+from datetime import datetime
+
+import outlookCalendar
+
+_MEETING_COLUMNS = ['assignee', 'subject', 'organizer', 'description', 'start_date', 'end_date']
+
+
+def _create_manifest_tables(cursor):
+
+    cursor.execute('CREATE TABLE IF NOT EXISTS calendar_files (filename TEXT PRIMARY KEY NOT NULL, '
+                   'size INTEGER, modification_time INTEGER, content_hash TEXT, meetings INTEGER, loaded TEXT)')
+
+    cursor.execute('CREATE TABLE IF NOT EXISTS calendar_meetings (filename TEXT NOT NULL, position INTEGER NOT NULL, '
+                   'assignee TEXT, subject TEXT, organizer TEXT, description TEXT, start_date TEXT, end_date TEXT, '
+                   'PRIMARY KEY (filename, position))')
+
+
+def file_content_hash(filename):
+
+    content_hash = hashlib.sha256()
+
+    with open(file=filename, mode='rb') as calendar_file:
+        for block in iter(lambda: calendar_file.read(1024 * 1024), b''):
+            content_hash.update(block)
+
+    return content_hash.hexdigest()
+
+
+def _date_time_to_string(date_time):
+
+    # iso format keeps the seconds and any time zone so a meeting reads back exactly as parsed
+    if date_time is None:
+        return None
+
+    return date_time.isoformat()
+
+
+def _string_to_date_time(date_time):
+
+    if date_time is None:
+        return None
+
+    return datetime.fromisoformat(date_time)
+
+
+def _stored_meetings(cursor, filename):
+
+    cursor.execute('SELECT %s FROM calendar_meetings WHERE filename = ? ORDER BY position' %
+                   ', '.join(_MEETING_COLUMNS), [filename])
+
+    return [(assignee, subject, organizer, description, _string_to_date_time(start_date),
+             _string_to_date_time(end_date))
+            for assignee, subject, organizer, description, start_date, end_date in cursor.fetchall()]
+
+
+def _store_meetings(cursor, filename, file_status, meetings):
+
+    # only the meetings of this export are replaced, every other export's meetings stay as they are
+    cursor.execute('DELETE FROM calendar_meetings WHERE filename = ?', [filename])
+
+    cursor.executemany('INSERT INTO calendar_meetings (filename, position, %s) VALUES (?, ?, ?, ?, ?, ?, ?, ?)' %
+                       ', '.join(_MEETING_COLUMNS),
+                       [(filename, position,
+                         meeting[outlookCalendar.ASSIGNEE],
+                         meeting[outlookCalendar.SUBJECT],
+                         meeting[outlookCalendar.ORGANIZER],
+                         meeting[outlookCalendar.DESCRIPTION],
+                         _date_time_to_string(meeting[outlookCalendar.START_DATE_TIME]),
+                         _date_time_to_string(meeting[outlookCalendar.END_DATE_TIME]))
+                        for position, meeting in enumerate(meetings)])
+
+    cursor.execute('INSERT OR REPLACE INTO calendar_files (filename, size, modification_time, content_hash, '
+                   'meetings, loaded) VALUES (?, ?, ?, ?, ?, ?)',
+                   [filename, file_status['size'], file_status['modification_time'], file_status['content_hash'],
+                    len(meetings), datetime.now().strftime('%m/%d/%Y %H:%M:%S')])
+
+
+def calendar_files_meetings(database_filename, filenames, workers=1, verbose=False):
+
+    # Meeting records and date fallbacks of each export in the order of the filenames, the same
+    # as outlookCalendar.calendar_files_meetings returns them.  An export with the size and
+    # modification time in the manifest, or else the same content hash, is unchanged and its
+    # meetings are read from the database.  Only the changed exports are read, and their
+    # meetings and manifest entries replaced.  Exports that no longer exist leave the manifest.
+    # The manifest keeps the absolute path of each export so exports with the same name in
+    # different directories are kept apart.
+    filenames = list(filenames)
+    paths = dict([(filename, os.path.abspath(filename)) for filename in filenames])
+
+    connection = sqlite3.connect(database_filename)
+
+    try:
+        cursor = connection.cursor()
+        _create_manifest_tables(cursor)
+
+        cursor.execute('SELECT filename, size, modification_time, content_hash FROM calendar_files')
+        manifest = dict([(filename, {'size': size, 'modification_time': modification_time,
+                                     'content_hash': content_hash})
+                         for filename, size, modification_time, content_hash in cursor.fetchall()])
+
+        for path in manifest:
+            if not os.path.exists(path):
+                cursor.execute('DELETE FROM calendar_meetings WHERE filename = ?', [path])
+                cursor.execute('DELETE FROM calendar_files WHERE filename = ?', [path])
+
+        file_statuses = {}
+        changed_filenames = []
+
+        for filename in filenames:
+
+            file_stat = os.stat(filename)
+            file_status = {'size': file_stat.st_size, 'modification_time': file_stat.st_mtime_ns,
+                           'content_hash': None}
+
+            entry = manifest.get(paths[filename])
+
+            if entry is not None and entry['size'] == file_status['size'] and \
+                    entry['modification_time'] == file_status['modification_time']:
+                file_status['content_hash'] = entry['content_hash']
+            else:
+                file_status['content_hash'] = file_content_hash(filename)
+
+                if entry is None or entry['content_hash'] != file_status['content_hash']:
+                    changed_filenames.append(filename)
+                else:
+                    # touched but not changed, the manifest just catches up with the file
+                    cursor.execute('UPDATE calendar_files SET size = ?, modification_time = ? WHERE filename = ?',
+                                   [file_status['size'], file_status['modification_time'], paths[filename]])
+
+            file_statuses[filename] = file_status
+
+        if verbose:
+            print('Calendar exports: %d changed, %d unchanged' % (len(changed_filenames),
+                                                                  len(filenames) - len(changed_filenames)))
+
+        changed_meetings = {}
+        read_meetings = outlookCalendar.calendar_files_meetings(changed_filenames, workers, verbose)
+
+        for filename, file_meetings in zip(changed_filenames, read_meetings):
+            changed_meetings[filename] = file_meetings
+            _store_meetings(cursor, paths[filename], file_statuses[filename], file_meetings[0])
+
+        connection.commit()
+
+        files_meetings = []
+        for filename in filenames:
+            if filename in changed_meetings:
+                files_meetings.append(changed_meetings[filename])
+            else:
+                files_meetings.append((_stored_meetings(cursor, paths[filename]), 0))
+
+    finally:
+        connection.close()
+
+    return files_meetings
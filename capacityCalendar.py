@@ -0,0 +1,258 @@
+# coding=utf-8
+"""
+Capacity calendar holding the workable hours of every day in a range of
+years with running totals so the business, holiday and workable hours of
+any period are found without walking the period day by day, and the
+employees by periods capacity matrix built from it
+"""
+__author__ = 'Scott Davis'
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from array import array
+from datetime import date, datetime, time, timedelta
+
+capacity_kinds = ['calendar_hours', 'holiday_hours', 'vacation_hours', 'meeting_hours', 'workable_hours']
+
+
+def is_available():
+    return numpy is not None
+
+
+def _seconds_into_day(date_time):
+    return date_time.hour * 3600.0 + date_time.minute * 60.0 + date_time.second + date_time.microsecond / 1000000.0
+
+
+class CapacityCalendar:
+
+    def __init__(self, first_date, last_date, work_day_time, weekends, holiday_dates=()):
+
+        # Weekends are ISO week day numbers, 1 for Monday to 7 for Sunday, the same as BusinessHours
+        # takes them.  Holidays falling on a weekend take no hours since none were workable.
+        self.first_date = first_date
+        self.last_date = last_date
+        self.work_day_time = list(work_day_time)
+        self.weekends = list(weekends)
+        self.hours_in_day = self.work_day_time[1] - self.work_day_time[0]
+
+        holiday_dates = set([holiday_date for holiday_date in holiday_dates if first_date <= holiday_date <= last_date])
+
+        # hours of each day and the hours of all the days before each day
+        self.business_day_hours = array('d')
+        self.holiday_day_hours = array('d')
+        self.business_hours_before = array('d', [0.0])
+        self.holiday_hours_before = array('d', [0.0])
+
+        current_date = first_date
+        while current_date <= last_date:
+
+            business_hours = 0.0
+            if current_date.isoweekday() not in self.weekends:
+                business_hours = float(self.hours_in_day)
+
+            holiday_hours = 0.0
+            if current_date in holiday_dates:
+                holiday_hours = business_hours
+
+            self.business_day_hours.append(business_hours)
+            self.holiday_day_hours.append(holiday_hours)
+            self.business_hours_before.append(self.business_hours_before[-1] + business_hours)
+            self.holiday_hours_before.append(self.holiday_hours_before[-1] + holiday_hours)
+
+            current_date = current_date + timedelta(days=1)
+
+    def covers(self, start_date_time, end_date_time):
+        return self.first_date <= start_date_time.date() and end_date_time.date() <= self.last_date
+
+    def _day_position(self, date_time):
+
+        if not self.first_date <= date_time.date() <= self.last_date:
+            raise ValueError('%s is outside the capacity calendar from %s to %s' %
+                             (date_time, self.first_date, self.last_date))
+
+        return (date_time.date() - self.first_date).days
+
+    def _hours_of_day_between(self, day_hours, position, start_date_time, end_date_time):
+
+        # part of the working day at the position that is between the two date times
+        if day_hours[position] == 0.0:
+            return 0.0
+
+        work_start = datetime.combine(self.first_date + timedelta(days=position), time(self.work_day_time[0]))
+        work_end = work_start + timedelta(hours=self.hours_in_day)
+
+        seconds = (min(end_date_time, work_end) - max(start_date_time, work_start)).total_seconds()
+
+        return max(seconds, 0.0) / 3600.0
+
+    def _hours(self, day_hours, hours_before, start_date_time, end_date_time):
+
+        if end_date_time < start_date_time:
+            return 0.0
+
+        first_position = self._day_position(start_date_time)
+        last_position = self._day_position(end_date_time)
+
+        if first_position == last_position:
+            return self._hours_of_day_between(day_hours, first_position, start_date_time, end_date_time)
+
+        # whole days between the first and last day come from the running totals, only the first
+        # and last day can be partly in the period
+        return hours_before[last_position] - hours_before[first_position + 1] + \
+            self._hours_of_day_between(day_hours, first_position, start_date_time, end_date_time) + \
+            self._hours_of_day_between(day_hours, last_position, start_date_time, end_date_time)
+
+    def business_hours(self, start_date_time, end_date_time):
+
+        # working hours of the week days in the period, holidays included
+        return self._hours(self.business_day_hours, self.business_hours_before, start_date_time, end_date_time)
+
+    def holiday_hours(self, start_date_time, end_date_time):
+        return self._hours(self.holiday_day_hours, self.holiday_hours_before, start_date_time, end_date_time)
+
+    def workable_hours(self, start_date_time, end_date_time, vacation_hours=0):
+
+        # hours an employee can work in the period after holidays and the employee's vacation
+        return self.business_hours(start_date_time, end_date_time) - \
+            self.holiday_hours(start_date_time, end_date_time) - vacation_hours
+
+    def period_hours(self, periods):
+
+        # business and holiday hours of each (start date time, end date time) period
+        if numpy is None:
+            return [self.business_hours(start_date_time, end_date_time)
+                    for start_date_time, end_date_time in periods], \
+                [self.holiday_hours(start_date_time, end_date_time) for start_date_time, end_date_time in periods]
+
+        first_positions = numpy.array([self._day_position(start_date_time) for start_date_time, _ in periods],
+                                      dtype=numpy.int64)
+        last_positions = numpy.array([self._day_position(end_date_time) for _, end_date_time in periods],
+                                     dtype=numpy.int64)
+
+        # seconds into its day of the start and end of each period
+        start_seconds = numpy.array([_seconds_into_day(start_date_time) for start_date_time, _ in periods])
+        end_seconds = numpy.array([_seconds_into_day(end_date_time) for _, end_date_time in periods])
+
+        in_order = numpy.array([start_date_time <= end_date_time for start_date_time, end_date_time in periods])
+
+        return self._vectorized_hours(self.business_day_hours, self.business_hours_before, first_positions,
+                                      last_positions, start_seconds, end_seconds, in_order), \
+            self._vectorized_hours(self.holiday_day_hours, self.holiday_hours_before, first_positions,
+                                   last_positions, start_seconds, end_seconds, in_order)
+
+    def _vectorized_hours(self, day_hours, hours_before, first_positions, last_positions, start_seconds, end_seconds,
+                          in_order):
+
+        # the same as _hours for many periods at once
+        if self.hours_in_day <= 0:
+            return numpy.zeros(len(first_positions))
+
+        day_hours = numpy.frombuffer(day_hours, dtype=numpy.float64)
+        hours_before = numpy.frombuffer(hours_before, dtype=numpy.float64)
+
+        work_start = self.work_day_time[0] * 3600.0
+        work_end = work_start + self.hours_in_day * 3600.0
+
+        # fraction of the working day each of the first and last days has, 0 or 1
+        first_day_share = day_hours[first_positions] / self.hours_in_day
+        last_day_share = day_hours[last_positions] / self.hours_in_day
+
+        same_day_hours = numpy.clip(numpy.minimum(end_seconds, work_end) - numpy.maximum(start_seconds, work_start),
+                                    0.0, None) / 3600.0 * first_day_share
+
+        first_day_hours = numpy.clip(work_end - numpy.maximum(start_seconds, work_start), 0.0, None) / 3600.0 * \
+            first_day_share
+        last_day_hours = numpy.clip(numpy.minimum(end_seconds, work_end) - work_start, 0.0, None) / 3600.0 * \
+            last_day_share
+
+        whole_day_hours = hours_before[last_positions] - hours_before[numpy.minimum(first_positions + 1,
+                                                                                    last_positions)]
+
+        hours = numpy.where(first_positions == last_positions,
+                            same_day_hours,
+                            whole_day_hours + first_day_hours + last_day_hours)
+
+        return numpy.where(in_order, hours, 0.0)
+
+
+def calendar_for_years(first_year, last_year, work_day_time, weekends, holiday_dates=()):
+    return CapacityCalendar(date(first_year, 1, 1), date(last_year, 12, 31), work_day_time, weekends, holiday_dates)
+
+
+class CapacityMatrix:
+
+    def __init__(self, employee_names, periods, calendar_hours, holiday_hours, vacation_hours, meeting_hours):
+
+        # Hours of each employee (rows, in the order of employee_names) in each period (columns).
+        # Calendar hours are the same for every employee, the holiday hours are those of the
+        # employee's holidays and the vacation and meeting hours come from the employee's tasks.
+        # The hours are NumPy arrays when NumPy is installed and lists of rows otherwise.
+        self.employee_names = list(employee_names)
+        self.periods = list(periods)
+        self.calendar_hours = calendar_hours
+        self.holiday_hours = holiday_hours
+        self.vacation_hours = vacation_hours
+        self.meeting_hours = meeting_hours
+
+        if numpy is not None:
+            self.workable_hours = calendar_hours - holiday_hours - vacation_hours - meeting_hours
+        else:
+            self.workable_hours = [[calendar_hours[row][column] - holiday_hours[row][column] -
+                                    vacation_hours[row][column] - meeting_hours[row][column]
+                                    for column in range(len(self.periods))]
+                                   for row in range(len(self.employee_names))]
+
+        self._rows = dict([(employee_name, row) for row, employee_name in enumerate(self.employee_names)])
+
+    def employee_hours(self, employee_name, period_number=0):
+
+        row = self._rows[employee_name]
+
+        return dict([(kind, float(getattr(self, kind)[row][period_number])) for kind in capacity_kinds])
+
+    def to_dict(self, date_format='%m/%d/%Y %H:%M'):
+
+        capacity = {'employee_names': self.employee_names,
+                    'periods': [[start_date_time.strftime(date_format), end_date_time.strftime(date_format)]
+                                for start_date_time, end_date_time in self.periods]}
+
+        for kind in capacity_kinds:
+            capacity[kind] = [[float(hours) for hours in row] for row in getattr(self, kind)]
+
+        return capacity
+
+
+def capacity_matrix(employee_names, periods, employee_calendars, employee_vacation_hours, employee_meeting_hours):
+
+    # Employees by periods capacity matrix.  employee_calendars gives the capacity calendar of each
+    # employee, the calendar and holiday hours of each period are only worked out once for every
+    # calendar the employees share.  The vacation and meeting hours are a row of hours in each
+    # period for every employee.
+    employee_names = list(employee_names)
+
+    calendar_period_hours = {}
+    for employee_name in employee_names:
+        calendar = employee_calendars[employee_name]
+        if id(calendar) not in calendar_period_hours:
+            calendar_period_hours[id(calendar)] = calendar.period_hours(periods)
+
+    calendar_hours = [calendar_period_hours[id(employee_calendars[employee_name])][0]
+                      for employee_name in employee_names]
+    holiday_hours = [calendar_period_hours[id(employee_calendars[employee_name])][1]
+                     for employee_name in employee_names]
+    vacation_hours = [employee_vacation_hours[employee_name] for employee_name in employee_names]
+    meeting_hours = [employee_meeting_hours[employee_name] for employee_name in employee_names]
+
+    if numpy is not None:
+        shape = (len(employee_names), len(periods))
+        calendar_hours, holiday_hours, vacation_hours, meeting_hours = \
+            [numpy.array(hours, dtype=numpy.float64).reshape(shape)
+             for hours in [calendar_hours, holiday_hours, vacation_hours, meeting_hours]]
+    else:
+        calendar_hours, holiday_hours, vacation_hours, meeting_hours = \
+            [[list(row) for row in hours] for hours in [calendar_hours, holiday_hours, vacation_hours, meeting_hours]]
+
+    return CapacityMatrix(employee_names, periods, calendar_hours, holiday_hours, vacation_hours, meeting_hours)
@@ -0,0 +1,123 @@
+# coding=utf-8
+"""
+Date parsing for columns of date strings in one of a few known formats.
+The format of a column is detected once, values are parsed with it and
+remembered, and only values in no known format are parsed by dateutil
+"""
+__author__ = 'Scott Davis'
+
+from datetime import datetime
+
+# Formats tried in order when detecting the format of a column.  Month first the same as dateutil
+# and no two digit years since dateutil puts those in a different century than strptime does.
+ISO_FORMAT = 'iso'
+
+date_formats = [ISO_FORMAT,
+                '%m/%d/%Y %I:%M:%S %p',
+                '%m/%d/%Y %I:%M %p',
+                '%m/%d/%Y %H:%M:%S',
+                '%m/%d/%Y %H:%M',
+                '%m/%d/%Y']
+
+_MAXIMUM_REMEMBERED = 100000
+
+
+def _parse_iso(value):
+
+    # fromisoformat is only trusted for the plain yyyy-mm-dd forms without a time zone, anything
+    # else it accepts is left to dateutil so the result is always the one dateutil would give
+    if len(value) < 10 or value[4] != '-' or value[7] != '-':
+        raise ValueError('%s is not an ISO date' % value)
+
+    date_time = datetime.fromisoformat(value)
+
+    if date_time.tzinfo is not None:
+        raise ValueError('%s has a time zone' % value)
+
+    return date_time
+
+
+def parse_with_format(value, date_format):
+
+    if date_format == ISO_FORMAT:
+        return _parse_iso(value)
+
+    return datetime.strptime(value, date_format)
+
+
+def detect_format(values):
+
+    # first known format every one of the values is in, None when there is none
+    values = [value.strip() for value in values if value is not None and value.strip() != '']
+
+    if len(values) == 0:
+        return None
+
+    for date_format in date_formats:
+        try:
+            for value in values:
+                parse_with_format(value, date_format)
+            return date_format
+        except ValueError:
+            continue
+
+    return None
+
+
+class DateParser:
+
+    def __init__(self, sample=None):
+
+        # The format is detected from the sample or else from the first value parsed.  Values
+        # not in the format are parsed by dateutil and counted as fallbacks.
+        self.date_format = None
+        self.fallbacks = 0
+        self._detected = False
+        self._remembered = {}
+
+        if sample is not None:
+            self.detect(sample)
+
+    def detect(self, sample):
+
+        self.date_format = detect_format(sample)
+        self._detected = self.date_format is not None
+
+    def parse(self, value):
+
+        if value is None:
+            return None
+
+        value = value.strip()
+
+        if value == '':
+            return None
+
+        date_time = self._remembered.get(value)
+
+        if date_time is not None:
+            return date_time
+
+        if not self._detected:
+            self.detect([value])
+
+        date_time = None
+
+        if self.date_format is not None:
+            try:
+                date_time = parse_with_format(value, self.date_format)
+            except ValueError:
+                date_time = None
+
+        if date_time is None:
+            from dateutil.parser import parse
+
+            date_time = parse(value)
+            self.fallbacks = self.fallbacks + 1
+
+        if len(self._remembered) >= _MAXIMUM_REMEMBERED:
+            self._remembered.clear()
+
+        self._remembered[value] = date_time
+
+        return date_time
@@ -0,0 +1,60 @@
+# coding=utf-8
+"""
+Company holidays read from one or more holiday files into a sorted list
+that is read again only when one of the files changes, with the holidays
+in any period counted by bisection
+"""
+__author__ = 'Scott Davis'
+
+import os
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+
+class HolidayCalendar:
+
+    def __init__(self, filenames, date_format='%d-%m-%Y'):
+
+        # a holiday file has one holiday date per line, a holiday in more than one of the
+        # files is only counted once
+        if isinstance(filenames, str):
+            filenames = [filenames]
+
+        self.filenames = list(filenames)
+        self.date_format = date_format
+
+        self._modification_times = None
+        self._date_times = []
+
+    def _current_modification_times(self):
+        return [os.stat(filename).st_mtime_ns for filename in self.filenames]
+
+    def _read_holiday_files(self):
+
+        holiday_date_times = set()
+
+        for filename in self.filenames:
+            with open(file=filename, mode='r', errors='ignore') as holidays_file:
+                for holiday in holidays_file.read().split():
+                    holiday_date_times.add(datetime.strptime(holiday, self.date_format))
+
+        return sorted(holiday_date_times)
+
+    def date_times(self):
+
+        # the list is replaced rather than changed when the files are read again so a caller
+        # holding the previous list can tell it is out of date
+        modification_times = self._current_modification_times()
+
+        if modification_times != self._modification_times:
+            self._date_times = self._read_holiday_files()
+            self._modification_times = modification_times
+
+        return self._date_times
+
+    def number_of_holidays(self, start_date_time, end_date_time):
+
+        # holidays are whole days so one counts when its midnight falls in the period
+        date_times = self.date_times()
+
+        return max(bisect_right(date_times, end_date_time) - bisect_left(date_times, start_date_time), 0)
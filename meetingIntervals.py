@@ -0,0 +1,138 @@
+# coding=utf-8
+"""
+Meeting intervals of each assignee merged by a sort and sweep so meetings
+that overlap, double booked meetings say, only count the time they really
+take up in the working hours of working days
+"""
+__author__ = 'Scott Davis'
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+
+
+def working_seconds(start_date_time, end_date_time, work_day_time, weekends):
+
+    # Seconds between the two date times that are in the working hours of a working day.  Weekends
+    # are Python week day numbers, 0 for Monday to 6 for Sunday, the same as the processor's check
+    # of whether a meeting starts during working hours so a meeting that counts is clipped to the
+    # same working days.
+    if end_date_time is None or start_date_time is None or end_date_time <= start_date_time:
+        return 0.0
+
+    seconds = 0.0
+
+    current_date = start_date_time.date()
+    while current_date <= end_date_time.date():
+
+        if current_date.weekday() not in weekends:
+
+            work_start = datetime.combine(current_date, time(work_day_time[0]), tzinfo=start_date_time.tzinfo)
+            work_end = work_start + timedelta(hours=work_day_time[1] - work_day_time[0])
+
+            seconds = seconds + max((min(end_date_time, work_end) - max(start_date_time, work_start)).total_seconds(),
+                                    0.0)
+
+        current_date = current_date + timedelta(days=1)
+
+    return seconds
+
+
+class MeetingIntervalIndex:
+
+    def __init__(self, meetings, work_day_time, weekends):
+
+        # Meetings are (key, assignee, start date time, end date time).  The meetings of each
+        # assignee are swept in start order and each meeting is given the working seconds of the
+        # part of it no earlier meeting already covers, so adding up the seconds of any of the
+        # meetings never counts the same time twice and adding up all of them gives the time the
+        # merged meetings take up.
+        self.work_day_time = list(work_day_time)
+        self.weekends = list(weekends)
+
+        self._meeting_seconds = {}
+
+        # merged intervals of each assignee with their working seconds and the seconds before each
+        self._starts = {}
+        self._ends = {}
+        self._interval_seconds = {}
+        self._seconds_before = {}
+
+        assignee_meetings = {}
+        for key, assignee, start_date_time, end_date_time in meetings:
+            if start_date_time is not None and end_date_time is not None:
+                assignee_meetings.setdefault(assignee, []).append((start_date_time, end_date_time, key))
+
+        for assignee, intervals in assignee_meetings.items():
+
+            starts = []
+            ends = []
+
+            for start_date_time, end_date_time, key in sorted(intervals):
+
+                if len(ends) == 0 or start_date_time > ends[-1]:
+                    self._meeting_seconds[key] = self._working_seconds(start_date_time, end_date_time)
+                    starts.append(start_date_time)
+                    ends.append(max(start_date_time, end_date_time))
+
+                elif end_date_time > ends[-1]:
+                    self._meeting_seconds[key] = self._working_seconds(ends[-1], end_date_time)
+                    ends[-1] = end_date_time
+
+                else:
+                    # wholly inside time the assignee's earlier meetings already take up
+                    self._meeting_seconds[key] = 0.0
+
+            interval_seconds = [self._working_seconds(start, end) for start, end in zip(starts, ends)]
+
+            seconds_before = [0.0]
+            for seconds in interval_seconds:
+                seconds_before.append(seconds_before[-1] + seconds)
+
+            self._starts[assignee] = starts
+            self._ends[assignee] = ends
+            self._interval_seconds[assignee] = interval_seconds
+            self._seconds_before[assignee] = seconds_before
+
+    def _working_seconds(self, start_date_time, end_date_time):
+        return working_seconds(start_date_time, end_date_time, self.work_day_time, self.weekends)
+
+    def assignees(self):
+        return list(self._starts.keys())
+
+    def intervals(self, assignee):
+
+        # merged (start, end) intervals of the assignee's meetings in start order
+        return list(zip(self._starts.get(assignee, []), self._ends.get(assignee, [])))
+
+    def meeting_seconds(self, key, default=None):
+
+        # working seconds the meeting takes up that none of the assignee's earlier meetings do
+        return self._meeting_seconds.get(key, default)
+
+    def occupied_seconds(self, assignee, start_date_time, end_date_time):
+
+        # working seconds in the period the assignee is in at least one meeting
+        if assignee not in self._starts or end_date_time <= start_date_time:
+            return 0.0
+
+        starts = self._starts[assignee]
+        ends = self._ends[assignee]
+        interval_seconds = self._interval_seconds[assignee]
+        seconds_before = self._seconds_before[assignee]
+
+        # merged intervals do not overlap so both their starts and their ends are sorted, only the
+        # first and last of the intervals found can be partly outside the period
+        first = bisect_right(ends, start_date_time)
+        last = bisect_left(starts, end_date_time)
+
+        if first >= last:
+            return 0.0
+
+        seconds = seconds_before[last] - seconds_before[first]
+
+        for position in set([first, last - 1]):
+            if starts[position] < start_date_time or ends[position] > end_date_time:
+                seconds = seconds - interval_seconds[position] + \
+                    self._working_seconds(max(starts[position], start_date_time), min(ends[position], end_date_time))
+
+        return seconds
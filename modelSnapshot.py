@@ -0,0 +1,338 @@
+# coding=utf-8
+"""
+Versioned binary snapshot of the loaded task model so a processor can be
+warm started without rebuilding the tasks from the tasks database.  Values
+are stored in typed columns with interned strings and datetimes as epoch
+microseconds and the snapshot can be read through a memory map
+"""
+__author__ = 'Scott Davis'
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta
+
+# bumped whenever the layout of the snapshot file changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+_MAGIC = b'TASKSNAP'
+_PREAMBLE = struct.Struct('<8sII')
+_ALIGNMENT = 8
+
+_EPOCH = datetime(1970, 1, 1)
+
+# type tag of every stored value, the value itself is kept in a 64 bit slot
+_NONE_TAG = 0
+_STRING_TAG = 1
+_INT_TAG = 2
+_FLOAT_TAG = 3
+_BOOL_TAG = 4
+_DATETIME_TAG = 5
+
+# native byte order the same as the arrays the slots are stored in
+_FLOAT_SLOT = struct.Struct('=d')
+_INT_SLOT = struct.Struct('=q')
+
+
+def _datetime_to_microseconds(date_time):
+    delta = date_time - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _float_to_slot(value):
+    return _INT_SLOT.unpack(_FLOAT_SLOT.pack(value))[0]
+
+
+class _StringTable:
+
+    def __init__(self):
+        self.strings = []
+        self.string_ids = {}
+
+    def string_id(self, value):
+
+        if value not in self.string_ids:
+            self.string_ids[value] = len(self.strings)
+            self.strings.append(value)
+
+        return self.string_ids[value]
+
+
+def _encode_column(values, string_table, column_name):
+
+    tags = array('B')
+    slots = array('q')
+
+    for value in values:
+
+        # bool is checked before int since every bool is also an int
+        if value is None:
+            tags.append(_NONE_TAG)
+            slots.append(0)
+        elif isinstance(value, str):
+            tags.append(_STRING_TAG)
+            slots.append(string_table.string_id(value))
+        elif isinstance(value, bool):
+            tags.append(_BOOL_TAG)
+            slots.append(int(value))
+        elif isinstance(value, int):
+            tags.append(_INT_TAG)
+            slots.append(value)
+        elif isinstance(value, float):
+            tags.append(_FLOAT_TAG)
+            slots.append(_float_to_slot(value))
+        elif isinstance(value, datetime):
+            tags.append(_DATETIME_TAG)
+            slots.append(_datetime_to_microseconds(value))
+        else:
+            raise ValueError('Value %r of %s can not be stored in a snapshot' % (value, column_name))
+
+    return tags, slots
+
+
+def _decode_column(tags, slots, floats, strings, date_times):
+
+    # floats are the same 64 bit slots viewed as doubles
+    values = []
+    append = values.append
+
+    for position, (tag, slot) in enumerate(zip(tags, slots)):
+
+        if tag == _STRING_TAG:
+            append(strings[slot])
+        elif tag == _NONE_TAG:
+            append(None)
+        elif tag == _FLOAT_TAG:
+            append(floats[position])
+        elif tag == _INT_TAG:
+            append(slot)
+        elif tag == _DATETIME_TAG:
+            # the same dates repeat across tasks and work logs so each one is only built once
+            if slot not in date_times:
+                date_times[slot] = _EPOCH + timedelta(microseconds=slot)
+            append(date_times[slot])
+        else:
+            append(slot == 1)
+
+    return values
+
+
+def write_snapshot(filename, fingerprint, task_fields, log_fields, schedule_fields,
+                   tasks, task_work_logged, smartsheet_tasks):
+
+    # Tasks, their work logs, the schedule tasks and the work logged by each assignee are
+    # stored column by column.  The snapshot is written to a temporary file first so a reader
+    # never sees a partly written snapshot.
+    string_table = _StringTable()
+    sections = []
+
+    def add_column(section_name, values):
+        tags, slots = _encode_column(values, string_table, section_name)
+        sections.append(('%s:tags' % section_name, tags))
+        sections.append(('%s:values' % section_name, slots))
+
+    issue_keys = list(tasks.keys())
+    add_column('task:Issue Key', issue_keys)
+
+    for field_name in task_fields:
+        add_column('task:%s' % field_name, [tasks[issue_key].get(field_name) for issue_key in issue_keys])
+
+    log_offsets = array('q', [0])
+    work_logs = []
+    for issue_key in issue_keys:
+        work_logs.extend(tasks[issue_key].get('Work Log') or [])
+        log_offsets.append(len(work_logs))
+
+    sections.append(('log:offsets', log_offsets))
+
+    for field_name in log_fields:
+        add_column('log:%s' % field_name, [work_log.get(field_name) for work_log in work_logs])
+
+    schedule_issue_keys = list(smartsheet_tasks.keys())
+    add_column('schedule:Issue Key', schedule_issue_keys)
+
+    for field_name in schedule_fields:
+        add_column('schedule:%s' % field_name,
+                   [smartsheet_tasks[issue_key].get(field_name) for issue_key in schedule_issue_keys])
+
+    assignees = list(task_work_logged.keys())
+    add_column('work logged:Assignee', assignees)
+    add_column('work logged:total_logged_work',
+               [task_work_logged[assignee]['total_logged_work'] for assignee in assignees])
+
+    # strings are stored once as utf-8 with the offset of each one
+    string_offsets = array('q', [0])
+    string_data = bytearray()
+    for value in string_table.strings:
+        string_data.extend(value.encode('utf-8', errors='surrogatepass'))
+        string_offsets.append(len(string_data))
+
+    sections.insert(0, ('strings:offsets', string_offsets))
+    sections.insert(1, ('strings:data', bytes(string_data)))
+
+    # section offsets are relative to the end of the header and kept aligned so a memory
+    # mapped section can be viewed as its array type without copying
+    section_table = []
+    section_offset = 0
+    for section_name, section_data in sections:
+
+        if isinstance(section_data, array):
+            typecode = section_data.typecode
+            section_length = len(section_data) * section_data.itemsize
+        else:
+            typecode = None
+            section_length = len(section_data)
+
+        section_table.append([section_name, section_offset, section_length, typecode])
+        section_offset = section_offset + section_length + (-section_length % _ALIGNMENT)
+
+    header = json.dumps({'fingerprint': fingerprint,
+                         'byteorder': sys.byteorder,
+                         'task_fields': list(task_fields),
+                         'log_fields': list(log_fields),
+                         'schedule_fields': list(schedule_fields),
+                         'sections': section_table}).encode('utf-8')
+
+    header = header + b' ' * (-(_PREAMBLE.size + len(header)) % _ALIGNMENT)
+
+    temporary_filename = '%s.tmp' % filename
+
+    with open(file=temporary_filename, mode='wb') as snapshot_file:
+
+        snapshot_file.write(_PREAMBLE.pack(_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header)))
+        snapshot_file.write(header)
+
+        for section_name, section_data in sections:
+
+            if isinstance(section_data, array):
+                section_data = section_data.tobytes()
+
+            snapshot_file.write(section_data)
+            snapshot_file.write(b'\0' * (-len(section_data) % _ALIGNMENT))
+
+    os.replace(temporary_filename, filename)
+
+
+def _read_header(snapshot_data):
+
+    if len(snapshot_data) < _PREAMBLE.size:
+        return None, 0
+
+    magic, format_version, header_length = _PREAMBLE.unpack_from(snapshot_data, 0)
+
+    if magic != _MAGIC or format_version != SNAPSHOT_FORMAT_VERSION:
+        return None, 0
+
+    header_end = _PREAMBLE.size + header_length
+    header = json.loads(bytes(snapshot_data[_PREAMBLE.size:header_end]).decode('utf-8'))
+
+    return header, header_end
+
+
+def read_snapshot(filename, fingerprint, use_mmap=True):
+
+    # Returns the tasks, work logged and schedule tasks in the snapshot or None when there is no
+    # snapshot or it was written by another snapshot format, schema or configuration.
+    if not os.path.exists(filename):
+        return None
+
+    with open(file=filename, mode='rb') as snapshot_file:
+
+        if use_mmap and os.path.getsize(filename) > 0:
+            snapshot_map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            snapshot_map = None
+
+        try:
+            if snapshot_map is not None:
+                snapshot_data = memoryview(snapshot_map)
+            else:
+                snapshot_data = memoryview(snapshot_file.read())
+
+            try:
+                return _read_snapshot_data(snapshot_data, fingerprint)
+            finally:
+                snapshot_data.release()
+
+        finally:
+            if snapshot_map is not None:
+                snapshot_map.close()
+
+
+def _read_snapshot_data(snapshot_data, fingerprint):
+
+    header, data_start = _read_header(snapshot_data)
+
+    if header is None or header['fingerprint'] != fingerprint or header['byteorder'] != sys.byteorder:
+        return None
+
+    section_views = {}
+
+    def section(section_name):
+        if section_name not in section_views:
+            section_offset, section_length, typecode = sections[section_name]
+            view = snapshot_data[data_start + section_offset:data_start + section_offset + section_length]
+            if typecode is not None:
+                view = view.cast(typecode)
+            section_views[section_name] = view
+        return section_views[section_name]
+
+    sections = dict([(section_name, (section_offset, section_length, typecode))
+                     for section_name, section_offset, section_length, typecode in header['sections']])
+
+    try:
+        string_offsets = section('strings:offsets').tolist()
+        string_data = bytes(section('strings:data'))
+
+        strings = [sys.intern(string_data[string_offsets[position]:string_offsets[position + 1]].decode(
+            'utf-8', errors='surrogatepass')) for position in range(len(string_offsets) - 1)]
+
+        date_times = {}
+
+        def column(section_name):
+
+            tags = section('%s:tags' % section_name)
+            slots = section('%s:values' % section_name)
+
+            floats = None
+            if _FLOAT_TAG in tags:
+                floats = section_float_view(section_name, slots)
+
+            return _decode_column(tags, slots.tolist(), floats, strings, date_times)
+
+        def section_float_view(section_name, slots):
+            view = slots.cast('B').cast('d')
+            section_views['%s:floats' % section_name] = view
+            return view.tolist()
+
+        task_columns = [column('task:%s' % field_name) for field_name in header['task_fields']]
+        log_columns = [column('log:%s' % field_name) for field_name in header['log_fields']]
+        log_offsets = section('log:offsets').tolist()
+
+        work_logs = [dict(zip(header['log_fields'], log_values)) for log_values in zip(*log_columns)]
+
+        tasks = {}
+        for position, (issue_key, task_values) in enumerate(zip(column('task:Issue Key'), zip(*task_columns))):
+            task = dict(zip(header['task_fields'], task_values))
+            task['Work Log'] = work_logs[log_offsets[position]:log_offsets[position + 1]]
+            tasks[issue_key] = task
+
+        smartsheet_tasks = {}
+        schedule_columns = [column('schedule:%s' % field_name) for field_name in header['schedule_fields']]
+        for issue_key, schedule_values in zip(column('schedule:Issue Key'), zip(*schedule_columns)):
+            smartsheet_tasks[issue_key] = dict(zip(header['schedule_fields'], schedule_values))
+
+        task_work_logged = {}
+        for assignee, total_logged_work in zip(column('work logged:Assignee'),
+                                               column('work logged:total_logged_work')):
+            task_work_logged[assignee] = {'total_logged_work': total_logged_work}
+
+    finally:
+        # views of a memory map have to be released before the map can be closed
+        for view in section_views.values():
+            view.release()
+
+    return {'tasks': tasks, 'task_work_logged': task_work_logged, 'smartsheet_tasks': smartsheet_tasks}
@@ -0,0 +1,171 @@
+# coding=utf-8
+"""
+Outlook calendar export reading for the meeting tasks.  Each export is read
+into compact meeting records on its own so exports can be read by a pool
+of worker processes and merged back in export order
+"""
+__author__ = 'Scott Davis'
+
+import csv
+import hashlib
+import string
+from concurrent.futures import ProcessPoolExecutor
+
+import dateParsing
+
+# position of each field in a meeting record
+ASSIGNEE = 0
+SUBJECT = 1
+ORGANIZER = 2
+DESCRIPTION = 3
+START_DATE_TIME = 4
+END_DATE_TIME = 5
+
+
+def calendar_file_assignee(filename):
+
+    # calendar exports are named firstname_lastname_*.csv after the employee they belong to
+    tokens = filename.split('.')[0].split('_')
+    return string.capwords('%s %s' % (tokens[0], tokens[1]))
+
+
+def meeting_identity(meeting):
+
+    # The same meeting always gets the same identity however many exports or meetings come
+    # before it.  Meetings of an assignee with the same subject, start, end and organizer are
+    # the same meeting, say one in two exports, and get the same identity.
+    fields = [meeting[ASSIGNEE], meeting[SUBJECT], meeting[START_DATE_TIME], meeting[END_DATE_TIME],
+              meeting[ORGANIZER]]
+
+    identity = '\x1f'.join(['' if field is None else
+                            field.isoformat() if hasattr(field, 'isoformat') else str(field) for field in fields])
+
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]
+
+
+def calendar_column_headers(cvs_reader, ignore_assignee_column=False):
+    calendar_header = {}
+    first_data_row = 0
+    row_number = 0
+
+    for row in cvs_reader:
+        if len(row) != 0:
+            if not ignore_assignee_column:
+                calendar_header['Assignee'] = row.index('Assignee')
+            calendar_header['Subject'] = row.index('Subject')
+            calendar_header['Start Date'] = row.index('Start Date')
+            calendar_header['Start Time'] = row.index('Start Time')
+            calendar_header['End Date'] = row.index('End Date')
+            calendar_header['End Time'] = row.index('End Time')
+            calendar_header['Meeting Organizer'] = row.index('Meeting Organizer')
+            calendar_header['Required Attendees'] = row.index('Required Attendees')
+            calendar_header['Description'] = row.index('Description')
+            calendar_header['Categories'] = row.index('Categories')
+            calendar_header['All Day Event'] = row.index('All day event')
+            calendar_header['Private'] = row.index('Private')
+            calendar_header['Location'] = row.index('Location')
+            first_data_row = row_number
+            break
+        else:
+            row_number = row_number + 1
+
+    return first_data_row, calendar_header
+
+
+def _is_row_empty(row):
+    return ''.join(row).strip() == ''
+
+
+def _calendar_file_rows(filename, verbose=False):
+
+    # every non empty row after the header of the export with the columns of its header
+    with open(file=filename, mode='r', errors='ignore') as calendar_file:
+
+        csv_reader = csv.reader(calendar_file,
+                                delimiter=',',
+                                quotechar='"',
+                                quoting=csv.QUOTE_MINIMAL)
+
+        # reading the header leaves the reader on the first row after it
+        first_data_row, header = calendar_column_headers(csv_reader, ignore_assignee_column=True)
+
+        for row in csv_reader:
+
+            if not _is_row_empty(row):
+
+                if verbose:
+                    print(row)
+
+                yield header, row
+
+
+def _meeting_rows(calendar_rows):
+
+    for header, row in calendar_rows:
+
+        # if this is a calendar holiday entry ignore
+        if row[header['Categories']].strip() == 'Holiday':
+            continue
+
+        # private meetings do not get recorded
+        if row[header['Private']].strip() == 'TRUE':
+            continue
+
+        # ignore any agile meetings
+        if "agile" in row[header['Subject']].lower().strip():
+            continue
+
+        # ignore all day events
+        if row[header['All Day Event']].strip() == 'TRUE':
+            continue
+
+        # ignore cancelled meetings
+        if 'Canceled' in row[header['Subject']]:
+            continue
+
+        yield header, row
+
+
+def read_calendar_file(filename, verbose=False):
+
+    # Meeting records of one export in the order they are in the export and the number of start
+    # and end dates that were in no known format.  The start and end columns each get a parser
+    # since Outlook writes them the same way thru a whole export.
+    assignee = calendar_file_assignee(filename)
+
+    start_date_parser = dateParsing.DateParser()
+    end_date_parser = dateParsing.DateParser()
+
+    meetings = []
+
+    for header, row in _meeting_rows(_calendar_file_rows(filename, verbose)):
+
+        start_date_time = start_date_parser.parse(row[header['Start Date']] + ' ' + row[header['Start Time']])
+        end_date_time = end_date_parser.parse(row[header['End Date']] + ' ' + row[header['End Time']])
+
+        meetings.append((assignee,
+                         row[header['Subject']],
+                         row[header['Meeting Organizer']],
+                         row[header['Description']],
+                         start_date_time,
+                         end_date_time))
+
+    return meetings, start_date_parser.fallbacks + end_date_parser.fallbacks
+
+
+def calendar_files_meetings(filenames, workers=1, verbose=False):
+
+    # Meeting records and date fallbacks of each export in the order of the filenames, as
+    # read_calendar_file returns them.  With more than one worker the exports are read in a pool
+    # of processes, one export at a time per worker, and the results still come back in filename
+    # order so the meetings are merged the same way however many workers read them.
+    filenames = list(filenames)
+
+    if workers is None or workers <= 1 or len(filenames) <= 1:
+        for filename in filenames:
+            yield read_calendar_file(filename, verbose)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(filenames))) as executor:
+        for file_meetings in executor.map(read_calendar_file, filenames, [verbose] * len(filenames)):
+            yield file_meetings
@@ -0,0 +1,104 @@
+# coding=utf-8
+"""
+Period boundaries for weekly, monthly and sprint cadences and export of the
+multi-period rollup time series to CSV and JSON
+"""
+__author__ = 'Scott Davis'
+
+import csv
+import json
+from datetime import datetime
+from datetime import timedelta
+
+cadences = ['weekly', 'sprint', 'monthly']
+
+series_columns = ['Start Date',
+                  'End Date',
+                  'Planned Hours',
+                  'Unplanned Work Hours',
+                  'Meeting Hours',
+                  'Vacation Hours',
+                  'Holiday Hours',
+                  'Total Unplanned Hours',
+                  'Percentage Unplanned to Planned',
+                  'Percentage Unplanned to (Planned + Unplanned)']
+
+
+def _add_month(date_time):
+    if date_time.month == 12:
+        return date_time.replace(year=date_time.year + 1, month=1)
+    return date_time.replace(month=date_time.month + 1)
+
+
+def cadence_boundaries(cadence, anchor_date_time, end_date_time, sprint_days=14):
+
+    # boundaries always include the first moment after the last period so every
+    # period is bounded by two consecutive boundaries
+    if cadence not in cadences:
+        raise ValueError('Unknown cadence %s, expected one of %s' % (cadence, ', '.join(cadences)))
+
+    if cadence == 'monthly':
+        # monthly periods always start on the first of the month
+        boundary = datetime(anchor_date_time.year, anchor_date_time.month, 1)
+    else:
+        boundary = anchor_date_time
+
+    boundaries = [boundary]
+
+    while boundary <= end_date_time:
+
+        if cadence == 'weekly':
+            boundary = boundary + timedelta(days=7)
+        elif cadence == 'sprint':
+            boundary = boundary + timedelta(days=sprint_days)
+        else:
+            boundary = _add_month(boundary)
+
+        boundaries.append(boundary)
+
+    return boundaries
+
+
+def _series_row(period, date_format):
+
+    return [period['start_date_time'].strftime(date_format),
+            period['end_date_time'].strftime(date_format),
+            '%1.2f' % period['planned_hours'],
+            '%1.2f' % period['unplanned_work_hours'],
+            '%1.2f' % period['meeting_hours'],
+            '%1.2f' % period['vacation_hours'],
+            '%1.2f' % period['holiday_hours'],
+            '%1.2f' % period['total_unplanned_hours'],
+            '' if period['percentage_unplanned_to_planned'] is None else
+            '%1.2f' % period['percentage_unplanned_to_planned'],
+            '' if period['percentage_unplanned_to_total'] is None else
+            '%1.2f' % period['percentage_unplanned_to_total']]
+
+
+def write_series_csv(series, filename, date_format='%m/%d/%Y %H:%M'):
+
+    with open(file=filename, mode='w', newline='') as series_file:
+
+        series_writer = csv.writer(series_file,
+                                   delimiter=',',
+                                   quotechar='"',
+                                   quoting=csv.QUOTE_MINIMAL)
+
+        series_writer.writerow(series_columns)
+
+        for period in series:
+            series_writer.writerow(_series_row(period, date_format))
+
+
+def write_series_json(series, filename, date_format='%m/%d/%Y %H:%M'):
+
+    periods = []
+
+    for period in series:
+        period = dict(period)
+        period['start_date_time'] = period['start_date_time'].strftime(date_format)
+        period['end_date_time'] = period['end_date_time'].strftime(date_format)
+        periods.append(period)
+
+    with open(file=filename, mode='w') as series_file:
+        json.dump(periods, series_file, indent=2)
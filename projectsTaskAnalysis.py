@@ -1,4 +1,40 @@
+import argparse
+import copy
+import reportBatch
+import reportService
 import taskAnalysis
+import taskSync
+
+argument_parser = argparse.ArgumentParser(description='Planned and unplanned task analysis reports')
+argument_parser.add_argument('--reports',
+                             help='JSON file with a list of report specs (report_type, start_date, end_date, '
+                                  'output, filename) to run instead of the default reports')
+argument_parser.add_argument('--no-summary',
+                             action='store_true',
+                             help='do not print the time spent in each stage of the report run')
+argument_parser.add_argument('--offline',
+                             action='store_true',
+                             help='report on the tasks snapshot or database written by an earlier run without '
+                                  'contacting Jira or Smartsheet')
+argument_parser.add_argument('--sync-daemon',
+                             action='store_true',
+                             help='keep tasks.sqlite in sync with Jira and Smartsheet instead of running reports')
+argument_parser.add_argument('--sync-interval',
+                             type=float,
+                             default=900,
+                             help='seconds between syncs of the sync daemon')
+argument_parser.add_argument('--serve',
+                             action='store_true',
+                             help='answer report requests as JSON over HTTP from the tasks snapshot or database')
+argument_parser.add_argument('--port',
+                             type=int,
+                             default=8080,
+                             help='port the report service listens on')
+argument_parser.add_argument('--refresh-interval',
+                             type=float,
+                             default=None,
+                             help='seconds between reloads of the tasks by the report service')
+arguments = argument_parser.parse_args()
 
 start_date = '8/1/2017 00:00'
 end_date = None
@@ -42,44 +78,80 @@ smartsheet_admin_token = 'dcf34bj2p6awmkcy2f02pga46l'
 
 mailserver_domain_names = ['mail_server_url1', 'mail_server_url2']
 
-projectTasking = taskAnalysis.Processor(employee_info=employee_info,
-                                       calendar_file_wildcard='*_calendar.csv',
-                                       company_name='Enter_Company_Name',
-                                       jira_cloud_url=jira_cloud_url,
-                                       jira_login_username=jira_login_username,
-                                       jira_login_password=jira_login_password,
-                                       jira_planned_task_departments=planned_task_depts,
-                                       jira_unplanned_task_departments=unplanned_task_depts,
-                                       smartsheet_projects=scheduled_project_list,
-                                       update_smartsheet_progress=False,
-                                       jira_epic_field_name=epic_field_name,
-                                       jira_unplanned_activity_field_name=jira_unplanned_activity_field_name,
-                                       database_filename='tasks.sqlite',
-                                       smartsheet_access_token=smartsheet_admin_token,
-                                       start_date=start_date,
-                                       end_date=end_date,
-                                       holidays_file='holidays.dat',
-                                       mail_server_domain_names=mailserver_domain_names,
-                                       verbose=False)
-
-projectTasking.generate_report(report_type='all tasks csv dump',
-                              start_date=start_date,
-                              end_date=end_date,
-                              output='file',
-                              filename='tasks.csv')
-
-projectTasking.generate_report(report_type='all tasks csv dump in period',
-                              start_date=start_date,
-                              end_date=end_date,
-                              output='file',
-                              filename='tasks_in_period.csv')
-
-projectTasking.generate_report(report_type='all unplanned', start_date=start_date, end_date=end_date)
-projectTasking.generate_report(report_type='all planned', start_date=start_date, end_date=end_date)
-# projectTasking.generate_report(report_type='employee hours summary', start_date=start_date, end_date=end_date)
-projectTasking.generate_report(report_type='planned employees', start_date=start_date, end_date=end_date)
-projectTasking.generate_report(report_type='work logged', start_date=start_date, end_date=end_date)
-projectTasking.generate_report(report_type='dept breakdown', start_date=start_date, end_date=end_date)
-# projectTasking.generate_report(report_type='input file statistics', start_date=start_date, end_date=end_date)
-projectTasking.generate_report(report_type='task errors', start_date=start_date, end_date=end_date)
-projectTasking.generate_report(report_type='work statistics', start_date=start_date, end_date=end_date)
+
+def load_offline_processor():
+
+    # warm start from the snapshot saved by the last run that fetched the tasks, the employee
+    # information is copied since every processor adds the mail server aliases to it
+    return taskAnalysis.Processor.from_snapshot('tasks.snapshot',
+                                                'tasks.sqlite',
+                                                employee_info=copy.deepcopy(employee_info),
+                                                start_date=start_date,
+                                                end_date=end_date,
+                                                company_name='Enter_Company_Name',
+                                                jira_planned_task_departments=planned_task_depts,
+                                                jira_unplanned_task_departments=unplanned_task_depts,
+                                                holidays_file='holidays.dat',
+                                                mail_server_domain_names=mailserver_domain_names,
+                                                verbose=False)
+
+
+if arguments.serve:
+    reportService.ReportService(load_offline_processor,
+                                refresh_seconds=arguments.refresh_interval).serve_forever(port=arguments.port)
+    raise SystemExit(0)
+
+if arguments.offline:
+    projectTasking = load_offline_processor()
+else:
+    projectTasking = taskAnalysis.Processor(employee_info=employee_info,
+                                           calendar_file_wildcard='*_calendar.csv',
+                                           company_name='Enter_Company_Name',
+                                           jira_cloud_url=jira_cloud_url,
+                                           jira_login_username=jira_login_username,
+                                           jira_login_password=jira_login_password,
+                                           jira_planned_task_departments=planned_task_depts,
+                                           jira_unplanned_task_departments=unplanned_task_depts,
+                                           smartsheet_projects=scheduled_project_list,
+                                           update_smartsheet_progress=False,
+                                           jira_epic_field_name=epic_field_name,
+                                           jira_unplanned_activity_field_name=jira_unplanned_activity_field_name,
+                                           database_filename='tasks.sqlite',
+                                           smartsheet_access_token=smartsheet_admin_token,
+                                           start_date=start_date,
+                                           end_date=end_date,
+                                           holidays_file='holidays.dat',
+                                           mail_server_domain_names=mailserver_domain_names,
+                                           sync_on_start=not arguments.sync_daemon,
+                                           verbose=False)
+
+    if arguments.sync_daemon:
+        # report runs attach to the database kept fresh by the daemon with --offline
+        taskSync.SyncDaemon(projectTasking,
+                            interval_seconds=arguments.sync_interval,
+                            snapshot_filename='tasks.snapshot',
+                            verbose=True).run()
+        raise SystemExit(0)
+
+    projectTasking.save_snapshot('tasks.snapshot')
+
+# reports run by default, a JSON file with a list of report specs can be given on the command line instead
+report_specs = [{'report_type': 'all tasks csv dump', 'output': 'file', 'filename': 'tasks.csv'},
+                {'report_type': 'all tasks csv dump in period', 'output': 'file', 'filename': 'tasks_in_period.csv'},
+                {'report_type': 'all unplanned'},
+                {'report_type': 'all planned'},
+                # {'report_type': 'employee hours summary'},
+                {'report_type': 'planned employees'},
+                {'report_type': 'work logged'},
+                {'report_type': 'dept breakdown'},
+                # {'report_type': 'input file statistics'},
+                {'report_type': 'task errors'},
+                {'report_type': 'work statistics'}]
+
+if arguments.reports is not None:
+    report_specs = reportBatch.load_report_specs(arguments.reports, start_date, end_date)
+
+projectTasking.generate_reports(report_specs,
+                                start_date=start_date,
+                                end_date=end_date,
+                                print_summary=not arguments.no_summary)
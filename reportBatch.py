@@ -0,0 +1,99 @@
+# coding=utf-8
+"""
+Report specs for running many reports in one batch, planning the report
+inputs the reports share and the per stage run summary
+"""
+__author__ = 'Scott Davis'
+
+import json
+import time
+
+import reportRegistry
+
+_spec_keys = ['report_type', 'start_date', 'end_date', 'output', 'filename']
+
+
+def normalize_report_spec(spec, start_date=None, end_date=None):
+
+    # a spec is a dictionary of generate_report arguments, the period defaults to the batch period
+    unknown_keys = [key for key in spec if key not in _spec_keys]
+    if len(unknown_keys) > 0:
+        raise ValueError('Unknown report spec field(s) %s' % ', '.join(unknown_keys))
+
+    if 'report_type' not in spec:
+        raise ValueError('Report spec is missing the report_type')
+
+    if not reportRegistry.is_registered(spec['report_type']):
+        raise ValueError('Unknown report type %s' % spec['report_type'])
+
+    normalized_spec = {'report_type': spec['report_type'],
+                       'start_date': spec.get('start_date', start_date),
+                       'end_date': spec.get('end_date', end_date),
+                       'output': spec.get('output', 'display'),
+                       'filename': spec.get('filename', None)}
+
+    if normalized_spec['start_date'] is None:
+        raise ValueError('Report spec for %s has no start_date' % spec['report_type'])
+
+    if normalized_spec['output'] in ['file', 'json', 'csv', 'parquet'] and normalized_spec['filename'] is None:
+        raise ValueError('Report spec for %s writes to a file but has no filename' % spec['report_type'])
+
+    return normalized_spec
+
+
+def load_report_specs(filename, start_date=None, end_date=None):
+
+    with open(file=filename, mode='r') as specs_file:
+        specs = json.load(specs_file)
+
+    return [normalize_report_spec(spec, start_date, end_date) for spec in specs]
+
+
+def plan_computations(report_specs):
+
+    # unique report inputs in the order they are first needed, reports needing the same
+    # input for the same period share a single computation of it
+    computations = []
+
+    for spec in report_specs:
+        for report_input in reportRegistry.report_definition(spec['report_type'])['inputs']:
+
+            if report_input in reportRegistry.period_independent_inputs:
+                planned_computation = (report_input, None, None)
+            else:
+                planned_computation = (report_input, spec['start_date'], spec['end_date'])
+
+            if planned_computation not in computations:
+                computations.append(planned_computation)
+
+    return computations
+
+
+class RunSummary:
+
+    def __init__(self):
+        self.stages = []
+
+    def time_stage(self, stage_name, function, *args, **kwargs):
+
+        start_time = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.stages.append({'stage': stage_name, 'seconds': time.perf_counter() - start_time})
+
+    def total_seconds(self):
+        return sum([stage['seconds'] for stage in self.stages])
+
+    def lines(self):
+
+        lines = ['===================================',
+                 'Report Run Summary']
+
+        for stage in self.stages:
+            lines.append('%s: %1.3f seconds' % (stage['stage'], stage['seconds']))
+
+        lines.append('Total: %1.3f seconds' % self.total_seconds())
+        lines.append('===================================')
+
+        return lines
@@ -0,0 +1,101 @@
+# coding=utf-8
+"""
+Registry of the report types generate_report can produce along with the
+inputs each report needs so the inputs are only computed when a report
+declares them, lazily and once per report
+"""
+__author__ = 'Scott Davis'
+
+import reportResults
+
+# inputs a report can declare, each one is computed by the processor for the report period
+report_inputs = ['planned hours',
+                 'unplanned hours',
+                 'employee planned tasks',
+                 'employee unplanned tasks',
+                 'department breakdown',
+                 'period issue keys',
+                 'work logged',
+                 'year calendar hours',
+                 'period calendar hours',
+                 'holiday hours',
+                 'capacity']
+
+# inputs that are the same whatever the period of the report
+period_independent_inputs = ['work logged', 'year calendar hours']
+
+_report_definitions = {}
+
+
+def register_report(report_type, function=None, inputs=(), outputs=('display', 'file', 'memory'), text_report=True):
+
+    # Register a report function called as function(processor, context).  A text report writes
+    # through context.report_writer while any other report, such as a task dump, is handed the
+    # output filename in the context.  Can be used directly or as a decorator.
+    unknown_inputs = [report_input for report_input in inputs if report_input not in report_inputs]
+    if len(unknown_inputs) > 0:
+        raise ValueError('Unknown report input(s) %s for report %s' % (', '.join(unknown_inputs), report_type))
+
+    def register(report_function):
+        _report_definitions[report_type] = {'function': report_function,
+                                            'inputs': list(inputs),
+                                            'outputs': list(outputs),
+                                            'text_report': text_report}
+        return report_function
+
+    if function is not None:
+        return register(function)
+
+    return register
+
+
+def unregister_report(report_type):
+
+    if report_type in _report_definitions:
+        del _report_definitions[report_type]
+
+
+def is_registered(report_type):
+    return report_type in _report_definitions
+
+
+def report_types():
+    return list(_report_definitions.keys())
+
+
+def report_definition(report_type):
+
+    if report_type not in _report_definitions:
+        raise ValueError('Unknown report type %s' % report_type)
+
+    return _report_definitions[report_type]
+
+
+class ReportContext:
+
+    def __init__(self, processor, report_type, start_date, end_date, output, filename, report_writer, inputs):
+
+        self.processor = processor
+        self.report_type = report_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.output = output
+        self.filename = filename
+        self.report_writer = report_writer
+        self.inputs = inputs
+
+        # structured result the report fills in along with its text
+        self.result = reportResults.ReportResult(report_type, start_date, end_date)
+
+        self._input_values = {}
+
+    def input(self, name):
+
+        # inputs are computed the first time the report asks for them
+        if name not in self.inputs:
+            raise ValueError('Report %s did not declare the input %s' % (self.report_type, name))
+
+        if name not in self._input_values:
+            self._input_values[name] = self.processor._report_input(name, self.start_date, self.end_date)
+
+        return self._input_values[name]
@@ -0,0 +1,178 @@
+# coding=utf-8
+"""
+Structured report results made of scalar metrics and columnar tables with
+JSON and CSV serializers and an Arrow/Parquet serializer when pyarrow is
+installed so report results can be loaded without reading the report text
+"""
+__author__ = 'Scott Davis'
+
+import csv
+import json
+import os
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# report outputs that produce a structured result instead of report text
+result_outputs = ['result', 'json', 'csv', 'parquet']
+
+
+def is_parquet_available():
+    return pyarrow is not None
+
+
+def _table_filename(filename, table_name, extension):
+
+    # every table of a result is written to its own file named after the result file
+    base_filename, _ = os.path.splitext(filename)
+    return '%s_%s%s' % (base_filename, table_name.lower().replace(' ', '_'), extension)
+
+
+class ReportTable:
+
+    def __init__(self, name, columns):
+
+        self.name = name
+        self.column_names = list(columns)
+        self.columns = dict([(column_name, []) for column_name in self.column_names])
+
+    def __len__(self):
+
+        if len(self.column_names) == 0:
+            return 0
+
+        return len(self.columns[self.column_names[0]])
+
+    def append(self, row):
+
+        if len(row) != len(self.column_names):
+            raise ValueError('Table %s has %d columns but the row has %d values' % (self.name,
+                                                                                   len(self.column_names),
+                                                                                   len(row)))
+
+        for column_name, value in zip(self.column_names, row):
+            self.columns[column_name].append(value)
+
+    def rows(self):
+        return [list(row) for row in zip(*[self.columns[column_name] for column_name in self.column_names])]
+
+    def to_dict(self):
+        return {'columns': self.column_names, 'data': self.columns}
+
+    def write_csv(self, filename):
+
+        with open(file=filename, mode='w', newline='', errors='ignore') as table_file:
+
+            table_writer = csv.writer(table_file,
+                                      delimiter=',',
+                                      quotechar='"',
+                                      quoting=csv.QUOTE_MINIMAL)
+
+            table_writer.writerow(self.column_names)
+            table_writer.writerows(self.rows())
+
+    def to_arrow(self):
+
+        if pyarrow is None:
+            raise ImportError('pyarrow is required to convert report tables to Arrow')
+
+        return pyarrow.table(dict([(column_name, self.columns[column_name]) for column_name in self.column_names]))
+
+
+class ReportResult:
+
+    def __init__(self, report_type, start_date=None, end_date=None):
+
+        self.report_type = report_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.metrics = {}
+        self.tables = {}
+
+    def add_metric(self, name, value):
+        self.metrics[name] = value
+
+    def table(self, name, columns=None):
+
+        # tables are created the first time they are asked for with their columns
+        if name not in self.tables:
+
+            if columns is None:
+                raise ValueError('Table %s does not exist and no columns were given' % name)
+
+            self.tables[name] = ReportTable(name, columns)
+
+        return self.tables[name]
+
+    def to_dict(self):
+
+        return {'report_type': self.report_type,
+                'start_date': self.start_date,
+                'end_date': self.end_date,
+                'metrics': self.metrics,
+                'tables': dict([(name, table.to_dict()) for name, table in self.tables.items()])}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def write_json(self, filename):
+
+        with open(file=filename, mode='w') as result_file:
+            json.dump(self.to_dict(), result_file, indent=2)
+
+        return [filename]
+
+    def write_csv(self, filename):
+
+        # the metrics go to the named file as name, value rows and each table to its own file
+        with open(file=filename, mode='w', newline='', errors='ignore') as metrics_file:
+
+            metrics_writer = csv.writer(metrics_file,
+                                        delimiter=',',
+                                        quotechar='"',
+                                        quoting=csv.QUOTE_MINIMAL)
+
+            metrics_writer.writerow(['Metric', 'Value'])
+            for name, value in self.metrics.items():
+                metrics_writer.writerow([name, value])
+
+        filenames = [filename]
+
+        for name, table in self.tables.items():
+            table_filename = _table_filename(filename, name, '.csv')
+            table.write_csv(table_filename)
+            filenames.append(table_filename)
+
+        return filenames
+
+    def write_parquet(self, filename):
+
+        if pyarrow is None:
+            raise ImportError('pyarrow is required to write report results as Parquet')
+
+        # metrics hold mixed types so they are stored as text in a single row table
+        metrics = dict([(name, [None if value is None else str(value)]) for name, value in self.metrics.items()])
+        pyarrow.parquet.write_table(pyarrow.table(metrics), filename)
+
+        filenames = [filename]
+
+        for name, table in self.tables.items():
+            table_filename = _table_filename(filename, name, '.parquet')
+            pyarrow.parquet.write_table(table.to_arrow(), table_filename)
+            filenames.append(table_filename)
+
+        return filenames
+
+    def write(self, filename, output_format):
+
+        if output_format == 'json':
+            return self.write_json(filename)
+        elif output_format == 'csv':
+            return self.write_csv(filename)
+        elif output_format == 'parquet':
+            return self.write_parquet(filename)
+
+        raise ValueError('Unknown report result format %s' % output_format)
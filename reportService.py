@@ -0,0 +1,283 @@
+# coding=utf-8
+"""
+Local HTTP service answering report requests as JSON from a task model that
+is loaded once and kept warm, with the aggregates of every period cached and
+a background refresh that swaps in a newly loaded model
+"""
+__author__ = 'Scott Davis'
+
+import json
+import threading
+from collections import ChainMap
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import reportRegistry
+
+# table columns holding the employee a row belongs to, used to answer a request for one employee
+_EMPLOYEE_COLUMNS = ['Employee', 'Name', 'Assignee']
+
+
+class ReportModel:
+
+    def __init__(self, processor):
+
+        # The processor is not safe to use from more than one thread so reports are computed one
+        # at a time, while reports already computed are read without waiting on the lock.
+        self.processor = processor
+        self.loaded = datetime.now()
+        self.results = {}
+        self._lock = threading.Lock()
+
+        # aggregates of every period asked for stay cached for as long as the model is served
+        self.processor._batch_cache = {}
+
+        # reports without an end and the aggregates of their periods, kept only for the minute
+        # their periods end in
+        self._open_ended = {'end_date': None, 'results': {}, 'batch_cache': {}}
+
+    def report(self, report_type, start_date, end_date=None):
+
+        if end_date is None:
+            return self._open_ended_report(report_type, start_date)
+
+        report_key = (report_type, start_date, end_date)
+
+        result = self.results.get(report_key)
+
+        if result is None:
+            with self._lock:
+                result = self.results.get(report_key)
+                if result is None:
+                    result = self.processor.generate_report(report_type,
+                                                            start_date,
+                                                            end_date,
+                                                            output='result').to_dict()
+                    self.results[report_key] = result
+
+        return result
+
+    def _open_ended_report(self, report_type, start_date):
+
+        # A period without an end runs until now, so its end is fixed to the current minute and
+        # the report is cached under the period without an end until the minute changes.  The
+        # aggregates the processor caches for the report go in a cache of their own in front of
+        # the model's, and both are dropped with the minute, so polling an open ended report
+        # neither serves a stale end nor grows the caches for as long as the model is served.
+        end_date = datetime.now().strftime(self.processor.business_hours_date_format)
+        report_key = (report_type, start_date, None)
+
+        result = None
+
+        open_ended = self._open_ended
+        if open_ended['end_date'] == end_date:
+            result = open_ended['results'].get(report_key)
+
+        if result is None:
+            with self._lock:
+                if self._open_ended['end_date'] != end_date:
+                    self._open_ended = {'end_date': end_date, 'results': {}, 'batch_cache': {}}
+
+                open_ended = self._open_ended
+
+                result = open_ended['results'].get(report_key)
+                if result is None:
+                    batch_cache = self.processor._batch_cache
+                    self.processor._batch_cache = ChainMap(open_ended['batch_cache'], batch_cache)
+
+                    try:
+                        result = self.processor.generate_report(report_type,
+                                                                start_date,
+                                                                end_date,
+                                                                output='result').to_dict()
+                    finally:
+                        self.processor._batch_cache = batch_cache
+
+                    open_ended['results'][report_key] = result
+
+        return result
+
+    def status(self):
+
+        return {'loaded': self.loaded.strftime('%m/%d/%Y %H:%M:%S'),
+                'tasks': len(self.processor.tasks),
+                'cached_reports': len(self.results) + len(self._open_ended['results'])}
+
+
+def _employee_result(result, employee_name):
+
+    # only the table rows of the employee, tables without an employee column are left whole
+    tables = {}
+
+    for table_name, table in result['tables'].items():
+
+        employee_columns = [column_name for column_name in _EMPLOYEE_COLUMNS if column_name in table['columns']]
+
+        if len(employee_columns) == 0:
+            tables[table_name] = table
+            continue
+
+        employee_values = table['data'][employee_columns[0]]
+        positions = [position for position, value in enumerate(employee_values) if value == employee_name]
+
+        tables[table_name] = {'columns': table['columns'],
+                              'data': dict([(column_name, [table['data'][column_name][position]
+                                                           for position in positions])
+                                            for column_name in table['columns']])}
+
+    employee_result = dict(result)
+    employee_result['employee'] = employee_name
+    employee_result['tables'] = tables
+
+    return employee_result
+
+
+class ReportService:
+
+    def __init__(self, load_processor, refresh_seconds=None, verbose=False):
+
+        # load_processor builds a processor with its tasks loaded, such as Processor.from_snapshot,
+        # and is called again on every refresh
+        self.load_processor = load_processor
+        self.refresh_seconds = refresh_seconds
+        self.verbose = verbose
+
+        self._model = ReportModel(load_processor())
+        self._refresh_lock = threading.Lock()
+        self._stop_refreshing = threading.Event()
+        self._refresh_thread = None
+
+    def model(self):
+        return self._model
+
+    def refresh(self):
+
+        # the new model is loaded to the side and swapped in with a single assignment so requests
+        # already running finish on the model they started with
+        with self._refresh_lock:
+            model = ReportModel(self.load_processor())
+            self._model = model
+
+        return model
+
+    def _refresh_periodically(self):
+
+        while not self._stop_refreshing.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as refresh_error:
+                print('ERROR: report model refresh failed, still serving the model loaded %s: %s' %
+                      (self._model.status()['loaded'], refresh_error))
+
+    def start_refreshing(self):
+
+        if self.refresh_seconds is not None and self._refresh_thread is None:
+            self._refresh_thread = threading.Thread(target=self._refresh_periodically, daemon=True)
+            self._refresh_thread.start()
+
+    def stop_refreshing(self):
+
+        self._stop_refreshing.set()
+
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+
+    def handle(self, method, path, query):
+
+        # returns the HTTP status and the JSON body of a request
+        model = self._model
+
+        path = unquote(path).rstrip('/')
+        parameters = dict([(name, values[-1]) for name, values in query.items()])
+
+        if method == 'POST' and path == '/refresh':
+            return 200, self.refresh().status()
+
+        if method != 'GET':
+            return 405, {'error': 'Method %s not allowed' % method}
+
+        if path == '/status':
+            return 200, model.status()
+
+        if path == '/reports':
+            return 200, {'reports': [report_type for report_type in reportRegistry.report_types()
+                                     if reportRegistry.report_definition(report_type)['text_report']]}
+
+        if path.startswith('/reports/'):
+
+            report_type = path[len('/reports/'):]
+
+            if not reportRegistry.is_registered(report_type):
+                report_type = report_type.replace('-', ' ').replace('_', ' ')
+
+            if not reportRegistry.is_registered(report_type) or \
+                    not reportRegistry.report_definition(report_type)['text_report']:
+                return 404, {'error': 'Unknown report %s' % report_type}
+
+            if 'start_date' not in parameters:
+                return 400, {'error': 'The start_date parameter is required'}
+
+            try:
+                result = model.report(report_type, parameters['start_date'], parameters.get('end_date'))
+            except ValueError as report_error:
+                return 400, {'error': str(report_error)}
+
+            if 'employee' in parameters:
+                result = _employee_result(result, model.processor._normalize_name(parameters['employee']))
+
+            return 200, result
+
+        return 404, {'error': 'Unknown path %s' % path}
+
+    def _request_handler(self):
+
+        service = self
+
+        class ReportRequestHandler(BaseHTTPRequestHandler):
+
+            def _respond(self, method):
+
+                url = urlsplit(self.path)
+
+                try:
+                    status, body = service.handle(method, url.path, parse_qs(url.query))
+                except Exception as request_error:
+                    status, body = 500, {'error': '%s: %s' % (type(request_error).__name__, request_error)}
+
+                content = json.dumps(body, default=str).encode('utf-8')
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                self._respond('POST')
+
+            def log_message(self, format, *args):
+                if service.verbose:
+                    BaseHTTPRequestHandler.log_message(self, format, *args)
+
+        return ReportRequestHandler
+
+    def http_server(self, host='127.0.0.1', port=8080):
+        return ThreadingHTTPServer((host, port), self._request_handler())
+
+    def serve_forever(self, host='127.0.0.1', port=8080):
+
+        http_server = self.http_server(host, port)
+        self.start_refreshing()
+
+        print('Serving reports on http://%s:%d' % (host, port))
+
+        try:
+            http_server.serve_forever()
+        finally:
+            self.stop_refreshing()
+            http_server.server_close()
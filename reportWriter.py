@@ -0,0 +1,102 @@
+# coding=utf-8
+"""
+Buffered report output shared by every report line so reports are written
+to the display, a file or memory through one CSV writer and flushed in
+blocks instead of a print per line
+"""
+__author__ = 'Scott Davis'
+
+import csv
+import io
+import sys
+
+report_targets = ['display', 'file', 'memory']
+
+# report text is handed to the target once this much has been buffered
+_BLOCK_SIZE = 64 * 1024
+
+
+class ReportWriter:
+
+    def __init__(self, target='display', filename=None, block_size=_BLOCK_SIZE):
+
+        if target not in report_targets:
+            raise ValueError('Unknown report target %s, expected one of %s' % (target, ', '.join(report_targets)))
+
+        if target == 'file' and filename is None:
+            raise ValueError('A filename is required to write a report to a file')
+
+        self.target = target
+        self.filename = filename
+        self.block_size = block_size
+
+        self._buffer = io.StringIO()
+        self._csv_writer = csv.writer(self._buffer,
+                                      delimiter=',',
+                                      quotechar='"',
+                                      quoting=csv.QUOTE_MINIMAL,
+                                      lineterminator='\n')
+        self._memory = []
+        self._file = None
+
+        if target == 'file':
+            self._file = open(file=filename, mode='w', errors='ignore')
+
+    def line(self, text=''):
+
+        # same as printing the text
+        self._buffer.write(str(text))
+        self._buffer.write('\n')
+        self._flush_if_full()
+
+    def row(self, values):
+
+        self._csv_writer.writerow(values)
+        self._flush_if_full()
+
+    def _flush_if_full(self):
+
+        if self._buffer.tell() >= self.block_size:
+            self.flush()
+
+    def flush(self):
+
+        text = self._buffer.getvalue()
+
+        if text == '':
+            return
+
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+        if self.target == 'display':
+            # looked up on every flush so redirected output is honored
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        elif self.target == 'file':
+            self._file.write(text)
+        else:
+            self._memory.append(text)
+
+    def close(self):
+
+        self.flush()
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def getvalue(self):
+
+        # text written so far to a memory target, a display or file target has none
+        if self.target != 'memory':
+            return None
+
+        self.flush()
+        return ''.join(self._memory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
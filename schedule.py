@@ -5,11 +5,13 @@ optionally update progress
 """
 __author__ = 'Scott Davis'
 
-import smartsheet
 import logging
-from dateutil.parser import parse
 import sys
 
+import dateParsing
+
+# smartsheet and dateutil are imported where they are used so importing this module stays quick
+
 
 def time_to_seconds(time_value):
     seconds_in_minute = 60
@@ -40,6 +42,8 @@ def date_string_to_date_time(date):
     date_time = None
     if date is not None:
         if date.strip() != '':
+            from dateutil.parser import parse
+
             date_time = parse(date.strip())
     return date_time
 
@@ -63,15 +67,30 @@ class SmartsheetProcessor:
         for project in self.smartsheet_projects:
             self.sheet_ids.append(self.smartsheet_projects[project]['id'])
 
-        self.smartsheet_instance = smartsheet.Smartsheet(access_token)
-
-        self.smartsheet_instance.errors_as_exceptions(True)
+        self.access_token = access_token
 
         logging.basicConfig(filename='rwsheet.log', level=logging.INFO)
 
+        # the Smartsheet client is created and the schedules are read the first time they are used
+        self._smartsheet_instance = None
+        self._tasks_processed = False
+
+        # a date parser for each date column since a column is in the same format thru every sheet
+        self._date_parsers = {}
+
         self.tasks = {}
 
-        self._process_project_tasks()
+    @property
+    def smartsheet_instance(self):
+
+        if self._smartsheet_instance is None:
+            import smartsheet
+
+            self._smartsheet_instance = smartsheet.Smartsheet(self.access_token)
+
+            self._smartsheet_instance.errors_as_exceptions(True)
+
+        return self._smartsheet_instance
 
     def _process_project_tasks(self):
 
@@ -161,15 +180,34 @@ class SmartsheetProcessor:
         cell = row.get_column(column_id)
 
         if is_date:
-            data_value = date_string_to_date_time(cell.value)
+            if column_name not in self._date_parsers:
+                self._date_parsers[column_name] = dateParsing.DateParser()
+            data_value = self._date_parsers[column_name].parse(cell.value)
         else:
             data_value = cell.display_value
         return data_value
 
+    def date_parse_fallbacks(self):
+
+        # number of schedule dates that were in no known format and were parsed by dateutil
+        return sum([date_parser.fallbacks for date_parser in self._date_parsers.values()])
+
+    def _process_project_tasks_once(self):
+
+        if not self._tasks_processed:
+            self._process_project_tasks()
+            self._tasks_processed = True
+
+            fallbacks = self.date_parse_fallbacks()
+            if fallbacks > 0:
+                logging.info('%d schedule date(s) in no known format were parsed by dateutil' % fallbacks)
+
     def scheduled_tasks(self):
+        self._process_project_tasks_once()
         return self.tasks
 
     def scheduled_task_issues(self):
+        self._process_project_tasks_once()
         return self.tasks.keys()
 
     def _process_tasks(self, sheet, sheet_id):
@@ -0,0 +1,228 @@
+# coding=utf-8
+"""
+SQL aggregation of the planned, unplanned, vacation, meeting and work logged
+hours directly against the tasks database so reports do not need every task
+loaded into memory
+"""
+__author__ = 'Scott Davis'
+
+import os
+import sqlite3
+from datetime import datetime
+
+import meetingIntervals
+
+# tasks are stored with dates formatted as mm/dd/YYYY HH:MM, these rebuild a sortable key
+_SORTABLE_DATE_TEMPLATE = "(substr({column}, 7, 4) || substr({column}, 1, 2) || substr({column}, 4, 2) || " \
+                          "substr({column}, 12, 2) || substr({column}, 15, 2))"
+
+_ISO_DATE_TEMPLATE = "(substr({column}, 7, 4) || '-' || substr({column}, 1, 2) || '-' || substr({column}, 4, 2))"
+
+_ISSUE_KEY_PREFIX = "upper(CASE WHEN instr(issue_key, '-') > 0 " \
+                    "THEN substr(issue_key, 1, instr(issue_key, '-') - 1) ELSE issue_key END)"
+
+_TIME_CHARGED = "MAX(COALESCE(time_spent, 0), COALESCE(original_estimate, 0))"
+
+_DATE_TIME_FORMAT = '%m/%d/%Y %H:%M'
+
+
+def _sortable_date(column):
+    return _SORTABLE_DATE_TEMPLATE.format(column=column)
+
+
+def _sortable_date_time(date_time):
+    return date_time.strftime('%Y%m%d%H%M')
+
+
+def _placeholders(values):
+    return ', '.join(['?'] * len(values))
+
+
+class SqlAggregator:
+
+    def __init__(self,
+                 database_filename,
+                 planned_department_codes,
+                 unplanned_department_codes,
+                 meeting_department_code,
+                 vacation_issue_type_name,
+                 work_day_time,
+                 weekends):
+
+        self.database_filename = database_filename
+        self.planned_department_codes = [code.upper() for code in planned_department_codes]
+        self.unplanned_department_codes = [code.upper() for code in unplanned_department_codes]
+        self.meeting_department_code = meeting_department_code
+        self.vacation_issue_type_name = vacation_issue_type_name
+        self.work_day_time = work_day_time
+        self.weekends = weekends
+
+        self._meeting_intervals = None
+        self._meeting_intervals_modification_time = None
+
+    def _execute(self, sql_command, parameters):
+
+        connection = sqlite3.connect(self.database_filename)
+
+        try:
+            cursor = connection.cursor()
+            cursor.execute(sql_command, parameters)
+            rows = cursor.fetchall()
+        finally:
+            connection.close()
+
+        return rows
+
+    def _task_in_period_clause(self, start_date_time, end_date_time):
+
+        # a task starts on its scheduled start date or when it was created if it was never scheduled
+        start_column = _sortable_date('COALESCE(start_date, created_date)')
+
+        clause = 'COALESCE(start_date, created_date) IS NOT NULL AND %s >= ? AND %s <= ?' % (start_column,
+                                                                                            start_column)
+
+        return clause, [_sortable_date_time(start_date_time), _sortable_date_time(end_date_time)]
+
+    def _is_unplanned_clause(self):
+
+        # same rule as an unplanned task in memory, explicitly unplanned, a vacation or a meeting
+        return "(unplanned = 1 OR issue_type = ? OR issue_type = 'Meeting')", [self.vacation_issue_type_name]
+
+    def _during_working_hours_clause(self):
+
+        # SQLite numbers week days from Sunday while the weekends setting uses the Python week day number
+        week_day = "((CAST(strftime('%%w', %s) AS INTEGER) + 6) %% 7)" % _ISO_DATE_TEMPLATE.format(column='start_date')
+        hour = "CAST(substr(start_date, 12, 2) AS INTEGER)"
+
+        clause = 'start_date IS NOT NULL AND %s NOT IN (%s) AND %s BETWEEN ? AND ?' % (
+            week_day, _placeholders(self.weekends), hour)
+
+        return clause, list(self.weekends) + [self.work_day_time[0], self.work_day_time[1] + 1]
+
+    def _meeting_clause(self):
+
+        # meetings that count toward meeting time, the ones starting in working hours that are not vacations
+        working_hours_clause, working_hours_parameters = self._during_working_hours_clause()
+
+        return 'instr(issue_key, ?) > 0 AND issue_type IS NOT ? AND %s' % working_hours_clause, \
+            [self.meeting_department_code, self.vacation_issue_type_name] + working_hours_parameters
+
+    def meeting_intervals(self):
+
+        # merged meeting intervals of every assignee, read again only when the database changes
+        modification_time = os.stat(self.database_filename).st_mtime_ns
+
+        if self._meeting_intervals is None or modification_time != self._meeting_intervals_modification_time:
+
+            meeting_clause, meeting_parameters = self._meeting_clause()
+
+            sql_command = 'SELECT issue_key, assignee, start_date, end_date FROM tasks WHERE %s' % meeting_clause
+
+            meetings = []
+            for issue_key, assignee, start_date, end_date in self._execute(sql_command, meeting_parameters):
+                meetings.append((issue_key, assignee,
+                                 datetime.strptime(start_date, _DATE_TIME_FORMAT),
+                                 datetime.strptime(end_date, _DATE_TIME_FORMAT) if end_date is not None else None))
+
+            self._meeting_intervals = meetingIntervals.MeetingIntervalIndex(meetings, self.work_day_time, self.weekends)
+            self._meeting_intervals_modification_time = modification_time
+
+        return self._meeting_intervals
+
+    def meeting_seconds_by_assignee(self, start_date_time, end_date_time):
+
+        # Meeting seconds of each assignee in the period with each meeting only charged the time
+        # it takes up that the assignee's earlier meetings do not.  A meeting without an end date
+        # keeps its charged time.
+        period_clause, period_parameters = self._task_in_period_clause(start_date_time, end_date_time)
+        unplanned_clause, unplanned_parameters = self._is_unplanned_clause()
+        meeting_clause, meeting_parameters = self._meeting_clause()
+
+        sql_command = 'SELECT issue_key, assignee, %s FROM tasks WHERE %s IN (%s) AND %s AND %s AND %s' % (
+            _TIME_CHARGED, _ISSUE_KEY_PREFIX, _placeholders(self.unplanned_department_codes), unplanned_clause,
+            meeting_clause, period_clause)
+
+        parameters = self.unplanned_department_codes + unplanned_parameters + meeting_parameters + period_parameters
+
+        meeting_intervals = self.meeting_intervals()
+
+        results = {}
+        for issue_key, assignee, time_charged in self._execute(sql_command, parameters):
+            results[assignee] = results.get(assignee, 0) + meeting_intervals.meeting_seconds(issue_key, time_charged)
+
+        return results
+
+    def planned_seconds_by_assignee(self, start_date_time, end_date_time):
+
+        period_clause, period_parameters = self._task_in_period_clause(start_date_time, end_date_time)
+        unplanned_clause, unplanned_parameters = self._is_unplanned_clause()
+
+        sql_command = 'SELECT assignee, SUM(%s), COUNT(*) FROM tasks WHERE %s IN (%s) AND NOT %s AND %s ' \
+                      'GROUP BY assignee' % (_TIME_CHARGED,
+                                             _ISSUE_KEY_PREFIX,
+                                             _placeholders(self.planned_department_codes),
+                                             unplanned_clause,
+                                             period_clause)
+
+        parameters = self.planned_department_codes + unplanned_parameters + period_parameters
+
+        results = {}
+        for assignee, seconds, number_of_tasks in self._execute(sql_command, parameters):
+            results[assignee] = {'seconds': seconds, 'tasks': number_of_tasks}
+
+        return results
+
+    def unplanned_seconds_by_category(self, start_date_time, end_date_time):
+
+        period_clause, period_parameters = self._task_in_period_clause(start_date_time, end_date_time)
+        unplanned_clause, unplanned_parameters = self._is_unplanned_clause()
+        working_hours_clause, working_hours_parameters = self._during_working_hours_clause()
+
+        # vacation time belongs to the reporter of the vacation task and meetings outside
+        # of working hours are ignored
+        sql_command = "SELECT CASE WHEN issue_type = ? THEN 'vacation' " \
+                      "WHEN instr(issue_key, ?) > 0 THEN " \
+                      "CASE WHEN %s THEN 'meeting' ELSE 'outside working hours' END " \
+                      "ELSE 'unplanned' END AS category, " \
+                      "CASE WHEN issue_type = ? THEN reporter ELSE assignee END AS person, " \
+                      "SUM(%s) " \
+                      "FROM tasks WHERE %s IN (%s) AND %s AND " \
+                      "(unplanned = 1 OR issue_type = ? OR instr(issue_key, ?) > 0) AND %s " \
+                      "GROUP BY category, person" % (working_hours_clause,
+                                                     _TIME_CHARGED,
+                                                     _ISSUE_KEY_PREFIX,
+                                                     _placeholders(self.unplanned_department_codes),
+                                                     unplanned_clause,
+                                                     period_clause)
+
+        parameters = [self.vacation_issue_type_name, self.meeting_department_code] + working_hours_parameters + \
+            [self.vacation_issue_type_name] + self.unplanned_department_codes + unplanned_parameters + \
+            [self.vacation_issue_type_name, self.meeting_department_code] + period_parameters
+
+        results = {'unplanned': {}, 'meeting': {}, 'vacation': {}, 'outside working hours': {}}
+        for category, person, seconds in self._execute(sql_command, parameters):
+            results[category][person] = seconds
+
+        # overlapping meetings are merged rather than summed
+        results['meeting'] = self.meeting_seconds_by_assignee(start_date_time, end_date_time)
+
+        return results
+
+    def work_logged_seconds_by_assignee(self, start_date_time=None, end_date_time=None):
+
+        sql_command = 'SELECT assignee, SUM(COALESCE(time_spent, 0)) FROM task_logs'
+        parameters = []
+
+        if start_date_time is not None and end_date_time is not None:
+            sql_command = '%s WHERE created_date IS NOT NULL AND %s >= ? AND %s <= ?' % (
+                sql_command, _sortable_date('created_date'), _sortable_date('created_date'))
+            parameters = [_sortable_date_time(start_date_time), _sortable_date_time(end_date_time)]
+
+        # keep assignees in the order their work was first logged
+        sql_command = '%s GROUP BY assignee ORDER BY MIN(rowid)' % sql_command
+
+        results = {}
+        for assignee, seconds in self._execute(sql_command, parameters):
+            results[assignee] = seconds
+
+        return results
@@ -7,18 +7,39 @@ involved in.
 __author__ = 'Scott Davis'
 
 import csv
+import hashlib
+import json
 import string
 from datetime import datetime
-import BusinessHours
-import glob2
 import os
 import io
-import atlassian
-import schedule
 from datetime import timedelta
-from dateutil.parser import parse
 import sqlite3
 import sqlite
+import taskIndex
+import taskColumns
+import sqlAggregation
+import periodRollup
+import taskCalculations
+import reportBatch
+import taskExport
+import reportWriter
+import reportRegistry
+import reportResults
+import modelSnapshot
+import capacityCalendar
+import holidayCalendar
+import outlookCalendar
+import calendarManifest
+import meetingIntervals
+from bisect import bisect_left, bisect_right
+
+# holidays of an employee without a holiday calendar, always the same object so the capacity
+# calendar built for them is found again by the identity check in capacity_calendar
+_NO_HOLIDAYS = ()
+
+# glob2, dateutil and the Jira and Smartsheet modules are imported where they are
+# used so reports run against the tasks database do not pay for importing them
 
 
 # README
@@ -80,16 +101,6 @@ def _date_string_to_datetime(date, date_format):
     return date_time
 
 
-def _generic_date_string_to_date_time(date):
-    date_time = None
-    if date is not None:
-        if date.strip() != '':
-            # remove time zone offset
-            date_time = parse(date.strip())
-
-    return date_time
-
-
 def _datetime_to_date_string(date_time):
     return date_time.strftime('%m/%d/%Y %H:%M')
 
@@ -139,6 +150,11 @@ class Processor:
                  holidays_file=None,
                  jira_vacation_issue_type_name='Vacation',
                  mail_server_domain_names=None,
+                 use_columnar_store=False,
+                 aggregation_backend='memory',
+                 sync_on_start=True,
+                 holiday_regions=None,
+                 calendar_workers=1,
                  verbose=False):
 
         self.company_name = company_name
@@ -151,13 +167,42 @@ class Processor:
         self.jira_epic_field_name = jira_epic_field_name
         self.jira_vacation_issue_type_name = jira_vacation_issue_type_name
 
+        # The holidays file is a holiday file or a list of them.  An employee with a holiday_region
+        # in the employee info takes the holidays of that region's holiday files instead.
         self.holidays_file = holidays_file
+        self.holiday_regions = holiday_regions
+        self._holiday_calendars = {}
         self.employee_info = employee_info
         self.verbose = verbose
         self.tasks = {}
+        self._start_date_index = None
+        self._schedule_problems_index = None
+        self._columnar_store = None
+        self._task_snapshot = None
+        self._meeting_intervals = None
+        self._meeting_intervals_index = None
+        self._capacity_calendars = {}
+        self._batch_cache = None
+        self._task_row_formatters = {}
         self.calendar_file_wildcard = calendar_file_wildcard
+        # calendar exports are read by this many worker processes, one export per worker
+        self.calendar_workers = calendar_workers
+
+        # dates of the last fetch that were in no known format and were parsed by dateutil
+        self.date_parse_fallbacks = {'calendar': 0, 'schedule': 0}
+        self.duplicate_meetings = 0
         self.mail_server_domain_names = mail_server_domain_names
 
+        if use_columnar_store and not taskColumns.is_available():
+            raise ImportError('numpy must be installed to use the columnar task store')
+
+        self.use_columnar_store = use_columnar_store
+
+        if aggregation_backend not in ['memory', 'sql']:
+            raise ValueError('Unknown aggregation backend %s, expected memory or sql' % aggregation_backend)
+
+        self.aggregation_backend = aggregation_backend
+
         self.update_smartsheet_progress = update_smartsheet_progress
         self.smartsheet_projects = smartsheet_projects
 
@@ -187,6 +232,11 @@ class Processor:
 
         self._add_email_aliases(self.mail_server_domain_names)
 
+        for employee_name in self.employee_info.keys():
+            holiday_region = self.employee_info[employee_name].get('holiday_region')
+            if holiday_region is not None and holiday_region not in (self.holiday_regions or {}):
+                raise ValueError('Unknown holiday region %s for %s' % (holiday_region, employee_name))
+
         self.holiday_date_format = '%d-%m-%Y'
         self.jira_date_format = '%m/%d/%Y %H:%M'
         self.business_hours_date_format = '%m/%d/%Y %H:%M'
@@ -252,7 +302,76 @@ class Processor:
         self.lastInputFileDate = None
         self.total_meeting_hours = 0
 
-        if self.jira_cloud_url is not None:
+        # nothing is scheduled or logged until tasks are fetched or loaded from the tasks database
+        self.smartsheet_tasks = {}
+        self.smartsheet_task_issues = self.smartsheet_tasks.keys()
+        self.task_work_logged = {}
+
+        # a processor used by the sync daemon only fetches tasks when it is asked to sync
+        if self.jira_cloud_url is not None and sync_on_start:
+            self._fetch_all_tasks()
+
+        # meetings are an unplanned department even when nothing was fetched
+        if 'meeting' not in self.jira_unplanned_task_departments:
+            self.jira_unplanned_task_departments['meeting'] = 'MEET'
+
+        self.sql_aggregator = sqlAggregation.SqlAggregator(
+            database_filename=self.database_filename,
+            planned_department_codes=list(self.jira_planned_task_departments.values()),
+            unplanned_department_codes=list(self.jira_unplanned_task_departments.values()),
+            meeting_department_code=self.jira_unplanned_task_departments['meeting'],
+            vacation_issue_type_name=self.jira_vacation_issue_type_name,
+            work_day_time=self.workDayTime,
+            weekends=self.weekends)
+
+        self.task_db = sqlite.Database(self.database_filename, 'tasks')
+        self.task_log_db = sqlite.Database(self.database_filename, 'task_logs')
+
+    @classmethod
+    def from_database(cls, database_filename, employee_info, start_date, end_date=None, **processor_arguments):
+
+        # Offline analysis of the tasks database written by an earlier run without contacting Jira
+        # or Smartsheet.  The tasks, their work logs, the Smartsheet schedule membership and the
+        # meeting entries are all loaded from the database so no credentials are needed.
+        processor = cls(employee_info=employee_info,
+                        database_filename=database_filename,
+                        start_date=start_date,
+                        end_date=end_date,
+                        jira_cloud_url=None,
+                        **processor_arguments)
+
+        processor._load_tasks_from_db()
+
+        return processor
+
+    @classmethod
+    def from_snapshot(cls, snapshot_filename, database_filename, employee_info, start_date, end_date=None,
+                      **processor_arguments):
+
+        # Warm start from a task model snapshot.  The tasks are loaded from the tasks database
+        # instead, and a new snapshot saved, when there is no snapshot, the database was written
+        # after the snapshot or the snapshot was saved with another schema or configuration.
+        processor = cls(employee_info=employee_info,
+                        database_filename=database_filename,
+                        start_date=start_date,
+                        end_date=end_date,
+                        jira_cloud_url=None,
+                        **processor_arguments)
+
+        snapshot_is_current = os.path.exists(snapshot_filename) and \
+            (not os.path.exists(database_filename) or
+             os.path.getmtime(database_filename) <= os.path.getmtime(snapshot_filename))
+
+        if not snapshot_is_current or not processor.load_snapshot(snapshot_filename):
+            processor._load_tasks_from_db()
+            processor.save_snapshot(snapshot_filename)
+
+        return processor
+
+    def _jira_processor(self):
+
+        if getattr(self, 'jira', None) is None:
+            import atlassian
 
             self.jira = atlassian.JiraProcessor(jira_cloud_url=self.jira_cloud_url,
                                                 jira_login_username=self.jira_login_username,
@@ -262,65 +381,149 @@ class Processor:
                                                 jira_vacation_issue_type_name=self.jira_vacation_issue_type_name,
                                                 verbose=self.verbose)
 
-            projects_name_string = ', '.join(self.jira_planned_task_departments.values())
-            projects_name_string += ', ' + ', '.join(self.jira_unplanned_task_departments.values())
+        return self.jira
 
-            self.tasks = self.jira.tasks(
-                normalize_assignee=self._normalize_name,
-                jql="project in (%s) and createdDate >= '%s' and createdDate <= '%s' ORDER BY created DESC" %
-                    (projects_name_string,
-                     _format_date_to_yyyy_mm_dd(self.start_date),
-                     _format_date_to_yyyy_mm_dd(self.end_date)),
-                include_work_log=True)
+    def _jira_task_query(self, updated_since=None, issue_keys=()):
 
-            self.jira_unplanned_task_departments['meeting'] = 'MEET'
+        # meetings come from the Outlook calendars and not from a Jira project
+        projects_name_string = ', '.join(self.jira_planned_task_departments.values())
+        projects_name_string += ', ' + ', '.join([department_code for department, department_code
+                                                  in self.jira_unplanned_task_departments.items()
+                                                  if department != 'meeting'])
 
-            self.task_work_logged = self.jira.task_work_logged()
-
-            self.smartsheet = schedule.SmartsheetProcessor(company_name=self.company_name,
-                                                           access_token=self.smartsheet_access_token,
-                                                           smartsheet_projects=self.smartsheet_projects,
-                                                           normalize_assignee=self._normalize_name,
-                                                           update_sheet_progress=self.update_smartsheet_progress)
-
-            self.smartsheet_tasks = self.smartsheet.scheduled_tasks()
-            self.smartsheet_task_issues = self.smartsheet.scheduled_task_issues()
-
-            # merge in smartsheet_task data into exising jira tasks
-            # there is no way a smartsheet task can exist without it being in jira
-            for issue_key in self.smartsheet_tasks.keys():
-                # if the issue is in the jira tasks we are merging into then
-                # set start and end date and make sure unplanned gets set to false
-                # which indicates this is a planned task
-                # ignore tasks in smartsheet that are not already in task list since they are not in jira
-                if issue_key in self.tasks:
-                    self._insert_or_update_task_in_memory(issue_key=issue_key,
-                                                          unplanned=False,
-                                                          start_date_time=self.smartsheet_tasks[issue_key]['Start Date'],
-                                                          end_date_time=self.smartsheet_tasks[issue_key]['End Date'])
+        jql = "project in (%s) and createdDate >= '%s' and createdDate <= '%s'" % \
+              (projects_name_string,
+               _format_date_to_yyyy_mm_dd(self.start_date),
+               _format_date_to_yyyy_mm_dd(self.end_date))
 
-            if self.calendar_file_wildcard is not None:
+        # an incremental pull only asks for the tasks updated since the last sync and the named tasks
+        if updated_since is not None:
 
-                self.calendar_header = {}
-                self.calendar_filename = 'calendars.csv'
+            changed_tasks = "updated >= '%s'" % updated_since.strftime('%Y/%m/%d %H:%M')
 
-                self._add_assignee_to_calendar_files(self.calendar_file_wildcard)
+            if len(issue_keys) > 0:
+                changed_tasks = '(%s or issuekey in (%s))' % (changed_tasks, ', '.join(issue_keys))
 
-                self.calendar_file_wildcard = '*_calendar_with_assignee.csv'
+            jql = '%s and %s' % (jql, changed_tasks)
 
-                self.calendar_file_mod_date = self._build_input_from_files(file_wildcard=self.calendar_file_wildcard,
-                                                                           output_filename=self.calendar_filename,
-                                                                           header_columns=['Subject',
-                                                                                           'Start Date',
-                                                                                           'Start Time',
-                                                                                           'End Date'])
+        return '%s ORDER BY created DESC' % jql
 
-                self._load_outlook_calendars()
+    def _fetch_scheduled_tasks(self):
 
-            self._load_tasks_into_db()
+        import schedule
 
-        self.task_db = sqlite.Database(self.database_filename, 'tasks')
-        self.task_log_db = sqlite.Database(self.database_filename, 'task_logs')
+        self.smartsheet = schedule.SmartsheetProcessor(company_name=self.company_name,
+                                                       access_token=self.smartsheet_access_token,
+                                                       smartsheet_projects=self.smartsheet_projects,
+                                                       normalize_assignee=self._normalize_name,
+                                                       update_sheet_progress=self.update_smartsheet_progress)
+
+        self.smartsheet_tasks = self.smartsheet.scheduled_tasks()
+        self.smartsheet_task_issues = self.smartsheet.scheduled_task_issues()
+
+        self._report_date_parse_fallbacks('schedule', self.smartsheet.date_parse_fallbacks())
+
+    def _report_date_parse_fallbacks(self, source, fallbacks):
+
+        self.date_parse_fallbacks[source] = fallbacks
+
+        if self.verbose and fallbacks > 0:
+            print('Info: %d %s date(s) in no known format were parsed by dateutil' % (fallbacks, source))
+
+    def _merge_scheduled_tasks(self):
+
+        # merge in smartsheet_task data into exising jira tasks
+        # there is no way a smartsheet task can exist without it being in jira
+        for issue_key in self.smartsheet_tasks.keys():
+            # if the issue is in the jira tasks we are merging into then
+            # set start and end date and make sure unplanned gets set to false
+            # which indicates this is a planned task
+            # ignore tasks in smartsheet that are not already in task list since they are not in jira
+            if issue_key in self.tasks:
+                self._insert_or_update_task_in_memory(issue_key=issue_key,
+                                                      unplanned=False,
+                                                      start_date_time=self.smartsheet_tasks[issue_key]['Start Date'],
+                                                      end_date_time=self.smartsheet_tasks[issue_key]['End Date'])
+
+    def _fetch_all_tasks(self):
+
+        self.tasks = self._jira_processor().tasks(normalize_assignee=self._normalize_name,
+                                                  jql=self._jira_task_query(),
+                                                  include_work_log=True)
+
+        self.jira_unplanned_task_departments['meeting'] = 'MEET'
+
+        self.task_work_logged = self.jira.task_work_logged()
+
+        self._fetch_scheduled_tasks()
+        self._merge_scheduled_tasks()
+
+        if self.calendar_file_wildcard is not None:
+            self._load_outlook_calendars(self.calendar_file_wildcard)
+
+        self._load_tasks_into_db()
+
+    def sync_tasks(self, updated_since=None):
+
+        # Pull tasks from Jira and Smartsheet into the tasks database and reload the tasks from it.
+        # Without updated_since every task is pulled and the database rebuilt.  Otherwise only the
+        # tasks updated in Jira since then and the tasks whose schedule changed are pulled and
+        # upserted, leaving the meetings and every other task as they are.  Returns the number of
+        # task rows written.
+        if self.jira_cloud_url is None:
+            raise ValueError('A Jira cloud url is required to sync tasks')
+
+        if updated_since is None:
+            self._fetch_all_tasks()
+            rows_changed = len(self.tasks)
+        else:
+            rows_changed = self._sync_updated_tasks(updated_since)
+
+        self._load_tasks_from_db()
+
+        return rows_changed
+
+    def _sync_updated_tasks(self, updated_since):
+
+        connection = sqlite3.connect(self.database_filename)
+
+        try:
+            cursor = connection.cursor()
+
+            cursor.execute('SELECT issue_key, start_date, end_date FROM schedule_tasks')
+            previous_schedule = dict([(issue_key, [start_date, end_date])
+                                      for issue_key, start_date, end_date in cursor.fetchall()])
+
+            self._fetch_scheduled_tasks()
+
+            # tasks added to, removed from or moved in a schedule are pulled again even when
+            # they were not updated in Jira since their planned state comes from the schedule
+            current_schedule = dict([(issue_key, self._schedule_dates_for_db(issue_key))
+                                     for issue_key in self.smartsheet_tasks])
+
+            rescheduled_issue_keys = sorted([issue_key for issue_key in set(previous_schedule) | set(current_schedule)
+                                             if previous_schedule.get(issue_key) != current_schedule.get(issue_key)])
+
+            self.tasks = self._jira_processor().tasks(normalize_assignee=self._normalize_name,
+                                                      jql=self._jira_task_query(updated_since, rescheduled_issue_keys),
+                                                      include_work_log=True)
+
+            self._merge_scheduled_tasks()
+
+            for issue_key in self.tasks:
+                cursor.execute('DELETE FROM tasks WHERE issue_key = ?', [issue_key])
+                cursor.execute('DELETE FROM task_logs WHERE issue_key = ?', [issue_key])
+                self._insert_task_into_db(issue_key, cursor)
+
+            cursor.execute('DELETE FROM schedule_tasks')
+            self._insert_schedule_tasks_into_db(cursor)
+
+            connection.commit()
+
+        finally:
+            connection.close()
+
+        return len(self.tasks)
 
     def _select_build_columns(self):
 
@@ -465,9 +668,162 @@ class Processor:
         for issue_key in self.tasks:
             self._insert_task_into_db(issue_key, cursor)
 
+        self._insert_schedule_tasks_into_db(cursor)
+
         connection.commit()
         connection.close()
 
+    def _insert_schedule_tasks_into_db(self, cursor):
+
+        # every task found in a Smartsheet schedule is kept so schedule membership survives an offline run
+        for issue_key in self.smartsheet_tasks:
+            try:
+                cursor.execute('INSERT INTO schedule_tasks(issue_key, start_date, end_date) VALUES (?, ?, ?)',
+                               [issue_key] + self._schedule_dates_for_db(issue_key))
+            except sqlite3.IntegrityError:
+                print('ERROR: Table SCHEDULE_TASKS, ID already exists in PRIMARY KEY column Issue Key')
+
+    def _schedule_dates_for_db(self, issue_key):
+
+        schedule_dates = []
+        for column_name in ['Start Date', 'End Date']:
+            if self.smartsheet_tasks[issue_key].get(column_name) is not None:
+                schedule_dates.append(_datetime_to_date_string(self.smartsheet_tasks[issue_key][column_name]))
+            else:
+                schedule_dates.append(None)
+
+        return schedule_dates
+
+    def _snapshot_task_fields(self):
+        return [column_name for column_name in self.task_output_format if column_name not in ['Issue Key', 'Work Log']]
+
+    def _snapshot_log_fields(self):
+        return [column_name for column_name in self.task_log_output_format if column_name != 'Issue Key']
+
+    def _snapshot_fingerprint(self):
+
+        # a snapshot is only used with the schema and configuration the tasks were loaded with
+        configuration = {'task fields': self._snapshot_task_fields(),
+                         'task log fields': self._snapshot_log_fields(),
+                         'employee info': self.employee_info,
+                         'planned task departments': self.jira_planned_task_departments,
+                         'unplanned task departments': self.jira_unplanned_task_departments,
+                         'vacation issue type name': self.jira_vacation_issue_type_name,
+                         'unplanned activity field name': self.jira_unplanned_activity_field_name,
+                         'epic field name': self.jira_epic_field_name}
+
+        return hashlib.sha256(json.dumps(configuration, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def save_snapshot(self, snapshot_filename):
+
+        # save the loaded task model, typically right after the tasks are fetched from Jira and Smartsheet
+        modelSnapshot.write_snapshot(filename=snapshot_filename,
+                                     fingerprint=self._snapshot_fingerprint(),
+                                     task_fields=self._snapshot_task_fields(),
+                                     log_fields=self._snapshot_log_fields(),
+                                     schedule_fields=['Start Date', 'End Date'],
+                                     tasks=self.tasks,
+                                     task_work_logged=self.task_work_logged,
+                                     smartsheet_tasks=self.smartsheet_tasks)
+
+    def load_snapshot(self, snapshot_filename, use_mmap=True):
+
+        # returns False, leaving the tasks unchanged, when the snapshot is missing or stale
+        snapshot = modelSnapshot.read_snapshot(snapshot_filename, self._snapshot_fingerprint(), use_mmap=use_mmap)
+
+        if snapshot is None:
+            return False
+
+        self.tasks = snapshot['tasks']
+        self.task_work_logged = snapshot['task_work_logged']
+        self.smartsheet_tasks = snapshot['smartsheet_tasks']
+        self.smartsheet_task_issues = self.smartsheet_tasks.keys()
+
+        # the tasks were replaced so everything built over them needs rebuilt
+        self._start_date_index = None
+        self._task_snapshot = None
+
+        return True
+
+    def _load_tasks_from_db(self):
+
+        connection = sqlite3.connect(self.database_filename)
+
+        try:
+            cursor = connection.cursor()
+
+            task_columns = [column_name for column_name in self.task_output_format if column_name != 'Work Log']
+
+            cursor.execute('SELECT %s FROM tasks ORDER BY rowid' %
+                           ', '.join([column_name.lower().replace(' ', '_') for column_name in task_columns]))
+
+            tasks = {}
+
+            for row in cursor:
+
+                task = {}
+
+                for column_name, column_value in zip(task_columns, row):
+
+                    if column_value is not None:
+                        if column_name in self.task_date_fields:
+                            column_value = _date_string_to_datetime(column_value, self.business_hours_date_format)
+                        elif column_name == 'Unplanned':
+                            column_value = column_value == 1
+
+                    task[column_name] = column_value
+
+                task['Work Log'] = []
+                tasks[task.pop('Issue Key')] = task
+
+            # work logs and the work logged by each assignee, in the order the work was fetched from Jira
+            task_work_logged = {}
+
+            cursor.execute('SELECT issue_key, assignee, created_date, time_spent FROM task_logs ORDER BY rowid')
+
+            for issue_key, assignee, created_date, time_spent in cursor:
+
+                if time_spent is None:
+                    time_spent = 0
+
+                if issue_key in tasks:
+                    tasks[issue_key]['Work Log'].append(
+                        {'Assignee': assignee,
+                         'Created Date': _date_string_to_datetime(created_date, self.business_hours_date_format),
+                         'Time Spent': time_spent})
+
+                if assignee not in task_work_logged:
+                    task_work_logged[assignee] = {'total_logged_work': time_spent}
+                else:
+                    task_work_logged[assignee]['total_logged_work'] += time_spent
+
+            smartsheet_tasks = {}
+
+            try:
+                cursor.execute('SELECT issue_key, start_date, end_date FROM schedule_tasks ORDER BY rowid')
+
+                for issue_key, start_date, end_date in cursor:
+                    smartsheet_tasks[issue_key] = {
+                        'Start Date': _date_string_to_datetime(start_date, self.business_hours_date_format),
+                        'End Date': _date_string_to_datetime(end_date, self.business_hours_date_format)}
+
+            except sqlite3.OperationalError:
+                # databases written before schedule membership was stored have no schedule tasks
+                print('Warning: %s has no schedule tasks, no task will be found in a schedule' %
+                      self.database_filename)
+
+        finally:
+            connection.close()
+
+        self.tasks = tasks
+        self.task_work_logged = task_work_logged
+        self.smartsheet_tasks = smartsheet_tasks
+        self.smartsheet_task_issues = self.smartsheet_tasks.keys()
+
+        # the tasks were replaced so everything built over them needs rebuilt
+        self._start_date_index = None
+        self._task_snapshot = None
+
     def _is_vacation(self, issue_type):
 
         if issue_type == self.jira_vacation_issue_type_name:
@@ -531,143 +887,61 @@ class Processor:
 
         cursor.execute(sql_command)
 
-    def _dump_tasks_to_file(self, filename):
-        task_file = open(filename, 'w')
-
-        task_writer = csv.writer(task_file,
-                                 delimiter=',',
-                                 quotechar='"',
-                                 quoting=csv.QUOTE_MINIMAL)
-
-        columns = []
-        for column_header in self.task_output_format:
-            if column_header != 'Issue Key' and column_header != 'Work Log':
-                columns.append(column_header)
-        task_writer.writerow(['Issue Key'] + columns)
+        sql_command = 'DROP TABLE schedule_tasks'
 
-        for issue_key in self.tasks:
-            columns = []
-            for task_key in self.task_output_format:
-                if task_key != 'Issue Key' and task_key != 'Work Log':
-                    columns.append(self.tasks[issue_key][task_key])
-            task_writer.writerow([issue_key] + columns)
-
-        task_file.close()
-
-    def _get_next_weekday_from_date(self, date, date_format):
-        if not self._is_date_a_week_day(date=date, date_format=date_format):
-            date_time = _date_string_to_datetime(date, date_format)
-            date_time = date_time + timedelta(days=7 - date_time.weekday())
-            date = _datetime_to_date_string(date_time)
-        return date
-
-    def _add_assignee_to_calendar_files(self, file_wildcard):
-        filenames = glob2.glob(file_wildcard)
-
-        for filename in filenames:
-
-            calendar_file = open(file=filename, mode='r', errors='ignore')
-
-            csv_reader = csv.reader(calendar_file,
-                                    delimiter=',',
-                                    quotechar='"',
-                                    quoting=csv.QUOTE_MINIMAL)
-
-            first_data_row, header = self._get_calendar_column_headers(csv_reader, ignore_assignee_column=True)
-
-            tokens = filename.split('.')  # split filename at extension
-            calendar_file_with_assignee_filename = '%s_with_assignee.%s' % (tokens[0], tokens[1])
-
-            if os.path.exists(calendar_file_with_assignee_filename):
-                os.remove(calendar_file_with_assignee_filename)
-
-            calendar_file_with_assignee = open(calendar_file_with_assignee_filename, 'w')
-
-            csv_writer = csv.writer(calendar_file_with_assignee,
-                                    delimiter=',',
-                                    quotechar='"',
-                                    quoting=csv.QUOTE_MINIMAL)
-
-            tokens = tokens[0].split('_')
-            assignee = string.capwords('%s %s' % (tokens[0], tokens[1]))
-
-            row_number = 0
-
-            # go back to beginning of file to re-read header
-            calendar_file.seek(0)
-
-            for row in csv_reader:
+        try:
+            cursor.execute(sql_command)
+        except:
+            pass
 
-                if row_number > first_data_row:
+        sql_command = 'CREATE TABLE schedule_tasks (issue_key TEXT PRIMARY KEY NOT NULL, start_date TEXT, end_date TEXT)'
 
-                    if not _is_csv_row_empty(row):
+        cursor.execute(sql_command)
 
-                        if self.verbose:
-                            print(row)
+    def _dump_tasks_to_file(self, filename):
 
-                        csv_writer.writerow([assignee] + row)
+        self.export_tasks(filename)
 
-                else:
-                    csv_writer.writerow(['Assignee'] + row)
+    def _task_row_formatter(self, ignore_fields=(), source='memory'):
 
-                row_number = row_number + 1
+        # formatters are compiled once for each set of ignored fields and row source
+        formatter_key = (source, tuple(ignore_fields))
 
-            calendar_file_with_assignee.close()
-            calendar_file.close()
+        if formatter_key not in self._task_row_formatters:
+            self._task_row_formatters[formatter_key] = taskExport.TaskRowFormatter(
+                task_output_format=self.task_output_format,
+                date_fields=self.task_date_fields,
+                time_fields=self.task_time_fields,
+                normalize_name=self._normalize_name,
+                seconds_in_hour=self.seconds_in_hour,
+                ignore_fields=ignore_fields,
+                source=source)
 
-    def _build_input_from_files(self, file_wildcard, output_filename, header_columns, set_input_file_mod_date=True):
+        return self._task_row_formatters[formatter_key]
 
-        filenames = glob2.glob(file_wildcard)  # list of all wild_card files in the directory
-        f = open(output_filename, 'w')
-        file_no = 0
+    def export_tasks(self, filename, output_format=None, issue_keys=None, ignore_fields=(), from_database=False):
 
-        # check if we need to set the
-        if set_input_file_mod_date:
-            self.lastInputFileDate = _file_modification_date(filenames[0])
+        # Write tasks to a CSV, tab separated or JSON Lines file, the format defaults to the one
+        # matching the file extension.  Tasks are either the ones in memory, optionally only the
+        # given issue keys, or are streamed from the tasks database without loading them.
+        if output_format is None:
+            output_format = taskExport.format_for_filename(filename)
 
-        modification_date = _file_modification_date(output_filename)
-
-        for file in filenames:
-            line_no = 0
-            file_no = file_no + 1
-            infile = open(file, 'r')
-            for line in infile:
-                line_no = line_no + 1
-                # if second or N file being processed check for file header row and blank line
-                # which needs removed
-                # if line is not blank
-                if self.verbose:
-                    print(line)
-                if line.strip() != '':
-                    # split the line into columns to check content of line
-                    columns = line.split(',')
-                    if len(columns) >= len(header_columns):
-                        # if second to N file
-                        if file_no > 1:
-                            # check if line is a header line
-                            header_row = True
-                            i = 0
-                            for header_column in header_columns:
-                                if columns[i] not in header_column:
-                                    header_row = False
-                                    break
-                                i = i + 1
-
-                            if header_row:
-                                # skip writing line since this file 2 thru n being concatenated and it should
-                                # not be written to output
-                                pass
-                            else:
-                                f.write(line)
-                        else:
-                            f.write(line)
-                    else:
-                        f.write(line)
+        if from_database:
+            formatter = self._task_row_formatter(ignore_fields, source='database')
+            rows = taskExport.database_rows(self.database_filename, formatter)
+        else:
+            formatter = self._task_row_formatter(ignore_fields)
+            rows = taskExport.memory_rows(self.tasks, issue_keys)
 
-            infile.close()
-        f.close()
+        return taskExport.write_rows(filename, formatter, rows, output_format)
 
-        return modification_date
+    def _get_next_weekday_from_date(self, date, date_format):
+        if not self._is_date_a_week_day(date=date, date_format=date_format):
+            date_time = _date_string_to_datetime(date, date_format)
+            date_time = date_time + timedelta(days=7 - date_time.weekday())
+            date = _datetime_to_date_string(date_time)
+        return date
 
     def _initialize_employee_planned(self):
 
@@ -716,6 +990,9 @@ class Processor:
                                          problem=None,
                                          work_log=[]):
 
+        # start or created dates may change so the start date index needs rebuilt
+        self._start_date_index = None
+
         if issue_key in self.tasks:
 
             # print 'Issue: %s, Task: %s' % (issue_key, self.tasks[issue_key])
@@ -795,34 +1072,6 @@ class Processor:
                                      'Problem': problem,
                                      'Work Log': []}
 
-    def _get_calendar_column_headers(self, cvs_reader, ignore_assignee_column=False):
-        calendar_header = {}
-        first_data_row = 0
-        row_number = 0
-
-        for row in cvs_reader:
-            if len(row) != 0:
-                if not ignore_assignee_column:
-                    calendar_header['Assignee'] = row.index('Assignee')
-                calendar_header['Subject'] = row.index('Subject')
-                calendar_header['Start Date'] = row.index('Start Date')
-                calendar_header['Start Time'] = row.index('Start Time')
-                calendar_header['End Date'] = row.index('End Date')
-                calendar_header['End Time'] = row.index('End Time')
-                calendar_header['Meeting Organizer'] = row.index('Meeting Organizer')
-                calendar_header['Required Attendees'] = row.index('Required Attendees')
-                calendar_header['Description'] = row.index('Description')
-                calendar_header['Categories'] = row.index('Categories')
-                calendar_header['All Day Event'] = row.index('All day event')
-                calendar_header['Private'] = row.index('Private')
-                calendar_header['Location'] = row.index('Location')
-                first_data_row = row_number
-                break
-            else:
-                row_number = row_number + 1
-
-        return first_data_row, calendar_header
-
     def _get_jira_column_headers(self, csv_reader):
         jira_header = {}
         first_data_row = 0
@@ -980,94 +1229,157 @@ class Processor:
 
         return date_in_range
 
-    def holiday_hours_per_employee(self, start_date, end_date=None):
-
-        hours = 0
-        f = open(file=self.holidays_file, mode='r', errors='ignore')
-        fdata = f.read()
-        definedholidays = fdata.split()
-        f.close()
-        # exclude any holidays that have been marked in the companies academic year
-        for definedholiday in definedholidays:
-            # day , month , year = definedholiday.split('-')
-            # holidate = datetime.datetime(int(year) , int(month) , int(day), 0, 0, 0)
-            if self.date_string_in_period(definedholiday, self.holiday_date_format, start_date, end_date):
-                hours = hours + 8
-        return hours
+    def holiday_calendar(self, employee_name=None):
+
+        # holiday calendar of the employee's holiday region, or of the holidays file when the
+        # employee has no region, None when there are no holiday files
+        holiday_files = self.holidays_file
+
+        if employee_name is not None and employee_name in self.employee_info:
+            holiday_region = self.employee_info[employee_name].get('holiday_region')
+            if holiday_region is not None:
+                holiday_files = self.holiday_regions[holiday_region]
+
+        if holiday_files is None:
+            return None
+
+        if isinstance(holiday_files, str):
+            holiday_files = [holiday_files]
+
+        calendar_key = tuple(holiday_files)
+
+        if calendar_key not in self._holiday_calendars:
+            self._holiday_calendars[calendar_key] = holidayCalendar.HolidayCalendar(holiday_files,
+                                                                                    self.holiday_date_format)
+
+        return self._holiday_calendars[calendar_key]
+
+    def _holiday_calendar_employees(self):
+
+        # every holiday calendar in use with the number of employees taking its holidays
+        holiday_calendar_employees = []
+
+        for employee_name in self.employee_names:
+
+            holiday_calendar = self.holiday_calendar(employee_name)
+
+            if holiday_calendar is None:
+                continue
+
+            for position, (calendar, number_of_employees) in enumerate(holiday_calendar_employees):
+                if calendar is holiday_calendar:
+                    holiday_calendar_employees[position] = (calendar, number_of_employees + 1)
+                    break
+            else:
+                holiday_calendar_employees.append((holiday_calendar, 1))
+
+        return holiday_calendar_employees
+
+    def holiday_hours_per_employee(self, start_date, end_date=None, employee_name=None):
+
+        if employee_name is not None:
+            return self._holiday_hours_per_employee(start_date, end_date, employee_name)
+
+        return self._batch_cached(('holiday hours', start_date, end_date),
+                                  self._holiday_hours_per_employee, start_date, end_date)
+
+    def _holiday_hours_per_employee(self, start_date, end_date=None, employee_name=None):
+
+        holiday_calendar = self.holiday_calendar(employee_name)
+
+        if holiday_calendar is None:
+            return 0
+
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
+
+        return holiday_calendar.number_of_holidays(start_date_time, end_date_time) * 8
 
     def holiday_hours_for_all_employees_in_period(self, start_date, end_date):
         # two floating holidays are recorded as vacation
-        return self.holiday_hours_per_employee(start_date, end_date) * len(self.employee_names)
+        if self.holiday_regions is None:
+            return self.holiday_hours_per_employee(start_date, end_date) * len(self.employee_names)
 
-    def _load_outlook_calendars(self):
+        return sum([self.holiday_hours_per_employee(start_date, end_date, employee_name)
+                    for employee_name in self.employee_names])
 
-        calendar_file = open(file=self.calendar_filename, mode='r', errors='ignore')
+    def _calendar_meetings(self, filenames):
 
-        csv_reader = csv.reader(calendar_file,
-                                delimiter=',',
-                                quotechar='"',
-                                quoting=csv.QUOTE_MINIMAL)
+        # Meetings are keyed by their identity so a meeting keeps its key from run to run whatever
+        # exports or meetings are added before it, and a meeting seen again, say in two exports,
+        # is only yielded the first time.  Only the exports changed since the last run are read,
+        # the rest come from the tasks database.
+        meetings = calendarManifest.calendar_files_meetings(self.database_filename, filenames, self.calendar_workers,
+                                                            self.verbose)
 
-        first_data_row, header = self._get_calendar_column_headers(csv_reader)
+        meeting_keys = set()
+        duplicates = 0
+        fallbacks = 0
 
-        row_number = 0
-        entry_no = 0
+        for file_meetings, file_fallbacks in meetings:
 
-        for row in csv_reader:
+            fallbacks = fallbacks + file_fallbacks
 
-            if row_number >= first_data_row:
+            for meeting in file_meetings:
 
-                if not _is_csv_row_empty(row):
+                meeting_key = '%s-%s' % (self.jira_unplanned_task_departments['meeting'],
+                                         outlookCalendar.meeting_identity(meeting))
 
-                    if self.verbose:
-                        print(row)
+                if meeting_key in meeting_keys:
+                    duplicates = duplicates + 1
+                    continue
 
-                    # if this is a calendar holiday entry ignore
-                    if row[header['Categories']].strip() != 'Holiday':
-                        # private meetings do not get recorded
-                        if row[header['Private']].strip() != 'TRUE':
-                            # ignore any agile meetings
-                            if "agile" not in row[header['Subject']].lower().strip():
-                                # ignore all day events
-                                if row[header['All Day Event']].strip() != 'TRUE':
-                                    # ignore cancelled meetings
-                                    if 'Canceled' not in row[header['Subject']]:
-                                        assignee = self._normalize_name(row[header['Assignee']])
-                                        # get data from calendar
-                                        subject = row[header['Subject']]
-                                        organizer = row[header['Meeting Organizer']]
-                                        description = row[header['Description']]
-                                        start_date_time = _generic_date_string_to_date_time(
-                                            row[header['Start Date']] + ' ' + row[header['Start Time']])
-                                        end_date_time = _generic_date_string_to_date_time(
-                                            row[header['End Date']] + ' ' + row[header['End Time']])
-                                        time_spent = (end_date_time - start_date_time).total_seconds()
-
-                                        entry_no = entry_no + 1
-
-                                        if _date_string_to_datetime(self.start_date,
-                                                                    self.business_hours_date_format) <= \
-                                                start_date_time <= \
-                                                _date_string_to_datetime(self.end_date,
-                                                                         self.business_hours_date_format):
-                                            self._insert_or_update_task_in_memory(
-                                                issue_key='%s-%d' % (self.jira_unplanned_task_departments['meeting'],
-                                                                     entry_no),
-                                                unplanned=True,
-                                                issue_type='Meeting',
-                                                summary=subject,
-                                                assignee=assignee,
-                                                start_date_time=start_date_time,
-                                                end_date_time=end_date_time,
-                                                created_date_time=start_date_time,
-                                                description=description,
-                                                original_estimate=time_spent,
-                                                reporter=organizer,
-                                                time_spent=time_spent)
+                meeting_keys.add(meeting_key)
 
-            row_number = row_number + 1
+                start_date_time = meeting[outlookCalendar.START_DATE_TIME]
+                end_date_time = meeting[outlookCalendar.END_DATE_TIME]
+
+                yield {'meeting_key': meeting_key,
+                       'assignee': self._normalize_name(meeting[outlookCalendar.ASSIGNEE]),
+                       'subject': meeting[outlookCalendar.SUBJECT],
+                       'organizer': meeting[outlookCalendar.ORGANIZER],
+                       'description': meeting[outlookCalendar.DESCRIPTION],
+                       'start_date_time': start_date_time,
+                       'end_date_time': end_date_time,
+                       'time_spent': (end_date_time - start_date_time).total_seconds()}
+
+        self.duplicate_meetings = duplicates
+
+        if self.verbose and duplicates > 0:
+            print('Info: %d duplicate meeting(s) in the calendar exports were skipped' % duplicates)
+
+        self._report_date_parse_fallbacks('calendar', fallbacks)
+
+    def _load_outlook_calendars(self, file_wildcard):
 
-        calendar_file.close()
+        # Outlook calendar exports are streamed straight into the tasks, each changed export is read
+        # once, possibly by a worker process, and its meetings in the task date range are added as
+        # unplanned meeting tasks
+        import glob2
+
+        filenames = glob2.glob(file_wildcard)
+
+        if len(filenames) > 0:
+            self.lastInputFileDate = _file_modification_date(filenames[0])
+
+        range_start_date_time = _date_string_to_datetime(self.start_date, self.business_hours_date_format)
+        range_end_date_time = _date_string_to_datetime(self.end_date, self.business_hours_date_format)
+
+        for meeting in self._calendar_meetings(filenames):
+
+            if range_start_date_time <= meeting['start_date_time'] <= range_end_date_time:
+                self._insert_or_update_task_in_memory(
+                    issue_key=meeting['meeting_key'],
+                    unplanned=True,
+                    issue_type='Meeting',
+                    summary=meeting['subject'],
+                    assignee=meeting['assignee'],
+                    start_date_time=meeting['start_date_time'],
+                    end_date_time=meeting['end_date_time'],
+                    created_date_time=meeting['start_date_time'],
+                    description=meeting['description'],
+                    original_estimate=meeting['time_spent'],
+                    reporter=meeting['organizer'],
+                    time_spent=meeting['time_spent'])
 
     def _load_all_tasks_from_csv_files(self,
                                        task_type,
@@ -1078,6 +1390,7 @@ class Processor:
 
         # Planned information is found in Smartsheet that has task designated start and end dates
         # Jira does not have the notion of start and end dates.  Jira planning is driven by sprints.
+        import schedule
 
         unplanned = None
         first_data_row = 0
@@ -1221,6 +1534,17 @@ class Processor:
     # determine if task is a planned task in smartsheet
     def is_task_in_schedule(self, issue_key):
 
+        outcome, problem = self._task_schedule_status(issue_key)
+
+        if problem is not None:
+            self._process_task_problem(issue_key, problem)
+
+        return outcome
+
+    def _task_schedule_status(self, issue_key):
+
+        problem = None
+
         # if the task is planned which means not a meeting, task unplanned, or vacation task
         if not self.is_unplanned(issue_key):
 
@@ -1239,7 +1563,7 @@ class Processor:
                     # task is a planned Jira task and part of a scheduled project in smartsheet
                     # that was not originally planned in the schedule but is now a planned item that was worked
                     # in that it does not have a start and end date
-                    self._process_task_problem(issue_key, 'Info: unplanned task found in schedule')
+                    problem = 'Info: unplanned task found in schedule'
 
                     outcome = True
 
@@ -1249,14 +1573,14 @@ class Processor:
                 # Planned activity outside of a planned project in smartsheet schedule
                 outcome = True
                 # record that we found a Jira task that is marked planned but not recorded in a schedule
-                self._process_task_problem(issue_key, 'Info: planned task that is not found in a schedule')
+                problem = 'Info: planned task that is not found in a schedule'
 
         # task explicitly marked as unplanned is never found in smartsheet schedule
         else:
 
             outcome = False
 
-        return outcome
+        return outcome, problem
 
     def task_start_date(self, issue_key):
 
@@ -1264,6 +1588,15 @@ class Processor:
         # Jira that have an epic value that is not planned.  We want to ignore those Jira tasks completely.  These
         # tasks do not represent any work (planned or unplanned).  They are merely scoping tasks and should be ignored.
 
+        task_start_date_time = self._task_start_date_time(issue_key)
+
+        if task_start_date_time is None:
+            self._process_task_problem(issue_key, 'Warning: missing recorded start or created date time.')
+
+        return task_start_date_time
+
+    def _task_start_date_time(self, issue_key):
+
         # this is a planned task so set start date initially to date as if this came from smartsheet
         task_start_date_time = self.tasks[issue_key]['Start Date']
 
@@ -1271,247 +1604,503 @@ class Processor:
         if task_start_date_time is None:
             task_start_date_time = self.tasks[issue_key]['Created Date']
 
-            if task_start_date_time is None:
-                self._process_task_problem(issue_key, 'Warning: missing recorded start or created date time.')
-
         return task_start_date_time
 
-    def calculate_planned_hours(self,
-                                start_date,
-                                end_date=None,
-                                employee_name=None,
-                                output_report=False,
-                                ignore_fields=[]):
+    def _task_start_date_index(self):
 
-        # Planned information is found in Smartsheet that has task designated start and end dates
-        # Jira does not have the notion of start and end dates.  Jira planning is driven by sprints.
-        # A Jira task could be a scoping task only that has no work which means it could have an
-        # Epic but we ignore those tasks that have epics that are not in the planned smartsheet
+        # rebuild the index if tasks were updated or the task dictionary was replaced since it was built
+        if self._start_date_index is None or len(self._start_date_index.issue_keys) != len(self.tasks):
+            self._start_date_index = taskIndex.StartDateIndex(self.tasks, self._task_start_date_time)
 
-        # initialize each employees planned hours
-        if not output_report:
-            self._initialize_employee_planned()
+        return self._start_date_index
 
-        row_number = 0
-        total_planned_seconds = 0
+    def _period_datetime_range(self, start_date, end_date=None):
 
-        # loop thru all tasks loaded
-        for issue_key in self.tasks:
+        start_date_time = _date_string_to_datetime(start_date, self.business_hours_date_format)
 
-            # if the issue key for current task being processed is a planned task dept
-            if self._is_planned_task_dept(issue_key):
+        if end_date is not None:
+            end_date_time = _date_string_to_datetime(end_date, self.business_hours_date_format)
+        else:
+            end_date_time = datetime.now()
 
-                # get the assignee
-                assignee = self._normalize_name(self.tasks[issue_key]['Assignee'])
+        return start_date_time, end_date_time
 
-                if output_report:
-                    if employee_name is not None:
-                        if assignee != employee_name:
-                            continue
+    def _issue_keys_in_period(self, start_date, end_date=None):
 
-                if self.verbose:
-                    print('Issue: %s, %s' % (issue_key, self.tasks[issue_key]))
+        # issue keys of all tasks with a start date in the period in the order they were loaded
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
 
-                # if task in date range of interest and planned in a schedule and not a scoping task
-                if self.is_task_in_schedule(issue_key):
+        return self._task_start_date_index().issue_keys_in_period(start_date_time, end_date_time)
 
-                    task_start_date_time = self.task_start_date(issue_key)
+    def _record_task_schedule_problems(self):
 
-                    # if self.tasks[issue_key]['Start Date'] is not None:
-                    if self._is_datetime_in_period(task_start_date_time, start_date, end_date):
+        # whether a task is found in a schedule does not depend on the period being calculated so
+        # record those problems for every task once each time the start date index is built
+        index = self._task_start_date_index()
 
-                        # Only process if assignee in employee info to process
-                        if self.is_employee_name_in_employee_info(assignee):
+        if self._schedule_problems_index is not index:
 
-                            # load assignee into planned employees list if not there already
-                            if assignee not in self.plannedEmployees:
-                                self.plannedEmployees.append(assignee)
+            for issue_key in self.tasks:
 
-                            # get all time estimates
-                            original_estimate = self.tasks[issue_key]['Original Estimate']
-                            time_spent = self.tasks[issue_key]['Time Spent']
+                planned_dept = self._is_planned_task_dept(issue_key)
+                unplanned_dept = self._is_unplanned_task_dept(issue_key)
 
-                            if time_spent < original_estimate:
-                                time_spent = original_estimate
+                if planned_dept or unplanned_dept:
 
-                            if time_spent > 0:
+                    # Every task keeps its schedule problem.  A planned task in a schedule and an
+                    # unplanned task that is not need a start date, and a missing one is recorded
+                    # after the schedule problem the same as calculating the hours always did.
+                    in_schedule = self.is_task_in_schedule(issue_key)
 
-                                if not output_report:
-                                    self.employees[assignee]['planned_work_time'] = \
-                                        self.employees[assignee]['planned_work_time'] + time_spent
+                    if (planned_dept and in_schedule) or (unplanned_dept and not in_schedule):
+                        self.task_start_date(issue_key)
 
-                            else:
-                                self._process_task_problem(issue_key, 'Error: no time recorded by %s' % assignee)
-                                if self.verbose:
-                                    print('Error: Issue %s has no time recorded' % issue_key)
+            self._schedule_problems_index = index
 
-                            if output_report:
-                                print(self._format_task_in_memory_for_report(issue_key, ignore_fields))
-                            else:
-                                # update the total planned time
-                                total_planned_seconds = total_planned_seconds + time_spent
+    def _columnar_task_store(self):
 
-            row_number = row_number + 1
+        # the columnar store is built over the start date index so rebuild both together
+        index = self._task_start_date_index()
 
-        if not output_report:
-            # set total planned hours based on seconds recorded above
-            self.total_planned_hours = self.seconds_to_hours(total_planned_seconds)
+        if self._columnar_store is None or self._columnar_store.index is not index:
+            self._columnar_store = taskColumns.ColumnarTaskStore(self, index)
+
+        return self._columnar_store
+
+    def meeting_intervals(self):
+
+        # Merged meeting intervals of every assignee, rebuilt together with the start date index
+        # whenever the tasks change.  Only meetings that count toward meeting time are merged,
+        # the ones starting in working hours that are not vacations.
+        index = self._task_start_date_index()
+
+        if self._meeting_intervals is None or self._meeting_intervals_index is not index:
+
+            meeting_department_code = self.jira_unplanned_task_departments['meeting']
+
+            meetings = []
+            for issue_key, task in self.tasks.items():
+                if meeting_department_code in issue_key and not self._is_vacation(task['Issue Type']) and \
+                        self._is_date_time_during_working_hours(task['Start Date']):
+                    meetings.append((issue_key, self._normalize_name(task['Assignee']), task['Start Date'],
+                                     task['End Date']))
+
+            self._meeting_intervals = meetingIntervals.MeetingIntervalIndex(meetings, self.workDayTime, self.weekends)
+            self._meeting_intervals_index = index
+
+        return self._meeting_intervals
+
+    def _meeting_time_charged(self, issue_key):
+
+        # working time a meeting takes up that the assignee's earlier meetings do not, so double
+        # booked meetings are only counted once, a meeting without an end keeps its charged time
+        return self.meeting_intervals().meeting_seconds(issue_key, self._task_time_charged(issue_key))
+
+    def meeting_hours_for_employee_in_period(self, employee_name, start_date, end_date=None):
+
+        # working hours in the period the employee is in at least one meeting
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
+
+        return self.seconds_to_hours(self.meeting_intervals().occupied_seconds(employee_name, start_date_time,
+                                                                               end_date_time))
+
+    def task_snapshot(self):
+
+        # snapshot of the loaded tasks for the side effect free calculations in taskCalculations,
+        # rebuilt together with the start date index whenever the tasks change
+        index = self._task_start_date_index()
+
+        if self._task_snapshot is None or self._task_snapshot.index is not index:
+
+            self._task_snapshot = taskCalculations.TaskSnapshot(self, index, self._holiday_calendar_employees())
+
+        return self._task_snapshot
+
+    def _planned_hours_result(self, start_date, end_date=None):
+
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
+
+        return self._batch_cached(('planned hours', start_date, end_date),
+                                  taskCalculations.planned_hours, self.task_snapshot(), start_date_time, end_date_time)
+
+    def _unplanned_hours_result(self, start_date, end_date=None):
+
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
+
+        return self._batch_cached(('unplanned hours', start_date, end_date),
+                                  taskCalculations.unplanned_hours, self.task_snapshot(), start_date_time,
+                                  end_date_time)
+
+    def _output_report_tasks(self, issue_keys, ignore_fields, report_writer=None):
+
+        if report_writer is None:
+            for issue_key in issue_keys:
+                print(self._format_task_in_memory_for_report(issue_key, ignore_fields))
+        else:
+            for issue_key in issue_keys:
+                report_writer.row(self._report_column_data_for_task_in_memory(issue_key, ignore_fields))
+
+    def _record_calculation_problems(self, result):
+
+        for issue_key, problem in result['problems']:
+            self._process_task_problem(issue_key, problem)
+            if self.verbose:
+                print('Issue %s: %s' % (issue_key, problem))
+
+    def _record_columnar_problems(self, store, result):
+
+        for position in result['schedule_problem_positions']:
+            if store.schedule_problems[position] is not None:
+                self._process_task_problem(store.issue_keys[position], store.schedule_problems[position])
+
+        for position in result.get('outside_working_hours_positions', []):
+            self._process_task_problem(store.issue_keys[position], 'Info: recorded time outside work hours, ignored')
+
+        for position, name in zip(result['no_time_positions'], result['no_time_names']):
+            self._process_task_problem(store.issue_keys[position], 'Error: no time recorded by %s' % name)
+
+    def _calculate_planned_hours_columnar(self, start_date, end_date=None):
+
+        self._initialize_employee_planned()
+
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
+
+        store = self._columnar_task_store()
+        result = store.planned_hours(start_date_time, end_date_time)
+
+        for code, employee_name in enumerate(store.employee_names):
+            self.employees[employee_name]['planned_work_time'] = float(result['employee_planned_seconds'][code])
+
+        for code in result['planned_employee_codes']:
+            if store.employee_names[code] not in self.plannedEmployees:
+                self.plannedEmployees.append(store.employee_names[code])
+
+        self._record_columnar_problems(store, result)
+
+        self.total_planned_hours = self.seconds_to_hours(result['total_planned_seconds'])
         return self.total_planned_hours
 
-    def get_planned_employees(self):
-        return sorted(self.plannedEmployees, key=lambda x: x.split(" ")[-1])
+    def _calculate_unplanned_hours_columnar(self, start_date, end_date=None):
 
-    def seconds_to_hours(self, time_value):
-        return float(time_value) / float(self.seconds_in_hour)
+        self._initialize_employee_unplanned()
 
-    def _process_task_problem(self, issue_key, problem_description):
-        if issue_key in self.tasks:
-            self.tasks[issue_key]['Problem'] = problem_description
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
 
-    def calculate_unplanned_hours(self,
-                                  start_date,
-                                  end_date=None,
-                                  employee_name=None,
-                                  output_report=False,
-                                  ignore_fields=[]):
+        store = self._columnar_task_store()
+        result = store.unplanned_hours(start_date_time, end_date_time)
+
+        for code, employee_name in enumerate(store.employee_names):
+            self.employees[employee_name]['unplanned_work_time'] = float(result['employee_unplanned_seconds'][code])
+            self.employees[employee_name]['meeting_time'] = float(result['employee_meeting_seconds'][code])
+            self.employees[employee_name]['vacation_time'] = float(result['employee_vacation_seconds'][code])
 
+        self._record_columnar_problems(store, result)
+
+        self.total_meeting_hours = self.seconds_to_hours(result['total_meeting_seconds'])
+        self.total_vacation_hours = self.seconds_to_hours(result['total_vacation_seconds'])
+        self.total_holiday_hours = self.seconds_to_hours(self.holiday_hours_for_all_employees_in_period(start_date,
+                                                                                                        end_date))
+        self.total_unplanned_hours = \
+            self.seconds_to_hours(result['total_unplanned_seconds']) + self.total_vacation_hours + \
+            self.total_holiday_hours + self.total_meeting_hours
+
+        return self.total_unplanned_hours
+
+    def calculate_planned_hours(self,
+                                start_date,
+                                end_date=None,
+                                employee_name=None,
+                                output_report=False,
+                                ignore_fields=[],
+                                report_writer=None):
+
+        # Planned information is found in Smartsheet that has task designated start and end dates
+        # Jira does not have the notion of start and end dates.  Jira planning is driven by sprints.
+        # A Jira task could be a scoping task only that has no work which means it could have an
+        # Epic but we ignore those tasks that have epics that are not in the planned smartsheet
+
+        # initialize each employees planned hours
         if not output_report:
-            # initialize each employees unplanned value
-            self._initialize_employee_unplanned()
+            self._initialize_employee_planned()
 
-        row_number = 0
-        total_employee_vacation_seconds = 0
-        total_unplanned_work_seconds = 0
-        total_meeting_seconds = 0
+        if self.aggregation_backend == 'sql' and not output_report:
+            return self._calculate_planned_hours_sql(start_date, end_date)
 
-        # process each task that has been loaded
-        for issue_key in self.tasks:
+        self._record_task_schedule_problems()
 
-            # if the issue key for current task being processed is an unplanned task dept
-            if self._is_unplanned_task_dept(issue_key):
+        if self.use_columnar_store and not output_report:
+            return self._calculate_planned_hours_columnar(start_date, end_date)
 
-                # get task assignee
-                assignee = self._normalize_name(self.tasks[issue_key]['Assignee'])
-                reporter = self._normalize_name(self.tasks[issue_key]['Reporter'])
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
 
-                if output_report:
-                    if employee_name is not None:
-                        if (assignee != employee_name) and (reporter != employee_name):
-                            continue
+        # only a report is restricted to the tasks of a single employee
+        if not output_report:
+            employee_name = None
 
-                # if task is not scheduled in a smartsheet project
-                if not self.is_task_in_schedule(issue_key):
+        if employee_name is None:
+            result = self._planned_hours_result(start_date, end_date)
+        else:
+            result = taskCalculations.planned_hours(self.task_snapshot(), start_date_time, end_date_time, employee_name)
 
-                    task_start_date_time = self.task_start_date(issue_key)
+        self._record_calculation_problems(result)
 
-                    # if current task start date is in the date range of interest
-                    if self._is_datetime_in_period(task_start_date_time, start_date, end_date):
+        # load assignees into planned employees list if not there already
+        for assignee in result['planned_employees']:
+            if assignee not in self.plannedEmployees:
+                self.plannedEmployees.append(assignee)
 
-                        # determine if this is a vacation task or something else unplanned
-                        vacation = self._is_vacation(self.tasks[issue_key]['Issue Type'])
-                        unplanned = self.tasks[issue_key]['Unplanned']
-                        meeting = self.jira_unplanned_task_departments['meeting'] in issue_key
+        if output_report:
+            self._output_report_tasks(result['issue_keys'], ignore_fields, report_writer)
+        else:
+            for assignee, planned_seconds in result['employee_planned_seconds'].items():
+                self.employees[assignee]['planned_work_time'] = \
+                    self.employees[assignee]['planned_work_time'] + planned_seconds
 
-                        # if this is an unplanned task or vacation entry or meeting
-                        if unplanned or vacation or meeting:
+            # set total planned hours based on seconds recorded
+            self.total_planned_hours = result['total_planned_hours']
 
-                            # load time estimates
-                            time_spent = self.tasks[issue_key]['Time Spent']
-                            original_estimate = self.tasks[issue_key]['Original Estimate']
+        return self.total_planned_hours
 
-                            if time_spent < original_estimate:
-                                time_spent = original_estimate
+    def _employee_name_for_aggregate(self, name):
 
-                            # if not vacation
-                            if not vacation:
+        # database rows hold normalized names but aliases still need mapped to the employee
+        if name in self.employee_info:
+            return name
+        return self._employee_name_from_alias(name)
 
-                                if not output_report:
+    def _calculate_planned_hours_sql(self, start_date, end_date=None):
 
-                                    # check if this an employee to be considered
-                                    if self.is_employee_name_in_employee_info(assignee):
+        self._initialize_employee_planned()
 
-                                        if not meeting:
-                                            # upldate employees unplanned time total
-                                            self.employees[assignee]['unplanned_work_time'] = \
-                                                self.employees[assignee]['unplanned_work_time'] + time_spent
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
 
-                                            # add time spent to the total unplanned value for all employees
-                                            total_unplanned_work_seconds = total_unplanned_work_seconds + time_spent
+        total_planned_seconds = 0
 
-                                        else:
+        planned = self.sql_aggregator.planned_seconds_by_assignee(start_date_time, end_date_time)
 
-                                            # do not add meeting event if it did not occur during workday hours
-                                            if self._is_date_time_during_working_hours(
-                                                    self.tasks[issue_key]['Start Date']):
+        for assignee in planned:
 
-                                                self.employees[assignee]['meeting_time'] = \
-                                                    self.employees[assignee]['meeting_time'] + time_spent
+            employee_name = self._employee_name_for_aggregate(assignee)
 
-                                                total_meeting_seconds = total_meeting_seconds + time_spent
+            if employee_name is not None:
 
-                                            else:
+                if employee_name not in self.plannedEmployees:
+                    self.plannedEmployees.append(employee_name)
 
-                                                self._process_task_problem(
-                                                    issue_key,
-                                                    'Info: recorded time outside work hours, ignored')
+                self.employees[employee_name]['planned_work_time'] = \
+                    self.employees[employee_name]['planned_work_time'] + planned[assignee]['seconds']
 
-                            # else vacation entry
-                            else:
+                total_planned_seconds = total_planned_seconds + planned[assignee]['seconds']
 
-                                # if vacation entry the reporter is the assignee to vacation
-                                assignee = reporter
+        self.total_planned_hours = self.seconds_to_hours(total_planned_seconds)
+        return self.total_planned_hours
 
-                                if not output_report:
+    def _calculate_unplanned_hours_sql(self, start_date, end_date=None):
 
-                                    # if the reporter is in employees to be considered
-                                    if self.is_employee_name_in_employee_info(assignee):
+        self._initialize_employee_unplanned()
 
-                                        if self.verbose:
-                                            print(original_estimate, assignee)
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
 
-                                        # set employee vacation time used during period
-                                        self.employees[assignee]['vacation_time'] = self.employees[assignee][
-                                                                                        'vacation_time'] + time_spent
+        totals = {'unplanned': 0, 'meeting': 0, 'vacation': 0}
+        employee_time_names = {'unplanned': 'unplanned_work_time', 'meeting': 'meeting_time',
+                               'vacation': 'vacation_time'}
 
-                                        # add the vacation time to the running total
-                                        total_employee_vacation_seconds = total_employee_vacation_seconds + time_spent
+        unplanned = self.sql_aggregator.unplanned_seconds_by_category(start_date_time, end_date_time)
 
-                            # if not time recorded than we have a task with an issue and needs fixed
-                            if time_spent == 0:
-                                problem_task = True
-                            # else task has recorded time
-                            else:
-                                problem_task = False
+        for category in totals:
 
-                            if problem_task:
-                                self._process_task_problem(issue_key, 'Error: no time recorded by %s' % assignee)
-                                if self.verbose:
-                                    print('Error: Issue %s has no time recorded.' % issue_key)
+            for person in unplanned[category]:
 
-                            if output_report:
+                employee_name = self._employee_name_for_aggregate(person)
 
-                                if employee_name is not None:
+                if employee_name is not None:
 
-                                    if assignee == employee_name:
-                                        print(self._format_task_in_memory_for_report(issue_key, ignore_fields))
+                    time_name = employee_time_names[category]
+                    self.employees[employee_name][time_name] = \
+                        self.employees[employee_name][time_name] + unplanned[category][person]
 
-                            # the assignee is not a engineering team member
-                            # ignore the task completely
-                            if self.verbose:
-                                if not self.is_employee_name_in_employee_info(assignee):
-                                    print('Assignee %s is not in engineering dept and therefore activity time ignored' %
-                                          assignee)
+                    totals[category] = totals[category] + unplanned[category][person]
 
-            row_number = row_number + 1
+        self.total_meeting_hours = self.seconds_to_hours(totals['meeting'])
+        self.total_vacation_hours = self.seconds_to_hours(totals['vacation'])
+        self.total_holiday_hours = self.seconds_to_hours(self.holiday_hours_for_all_employees_in_period(start_date,
+                                                                                                        end_date))
+        self.total_unplanned_hours = \
+            self.seconds_to_hours(totals['unplanned']) + self.total_vacation_hours + \
+            self.total_holiday_hours + self.total_meeting_hours
+
+        return self.total_unplanned_hours
+
+    def _task_work_logged(self):
+
+        return self._batch_cached(('work logged', None, None), self._fetch_task_work_logged)
+
+    def _fetch_task_work_logged(self):
+
+        if self.aggregation_backend == 'sql':
+
+            task_work_logged = {}
+            work_logged = self.sql_aggregator.work_logged_seconds_by_assignee()
+
+            for assignee in work_logged:
+                task_work_logged[assignee] = {'total_logged_work': work_logged[assignee]}
+
+            return task_work_logged
+
+        return self.task_work_logged
+
+    def cross_check_aggregation(self, start_date, end_date=None, tolerance=0.01):
+
+        # compare the sql aggregation of the tasks database with the in memory calculation
+        # of the same period and return a description of every value that does not agree
+        aggregation_backend = self.aggregation_backend
+        mismatches = []
+        results = {}
+
+        try:
+            for backend in ['memory', 'sql']:
+                self.aggregation_backend = backend
+                total_planned_hours = self.calculate_planned_hours(start_date, end_date)
+                total_unplanned_hours = self.calculate_unplanned_hours(start_date, end_date)
+                results[backend] = {'total planned hours': total_planned_hours,
+                                    'total unplanned hours': total_unplanned_hours,
+                                    'total meeting hours': self.total_meeting_hours,
+                                    'total vacation hours': self.total_vacation_hours}
+                for employee_name in self.employee_names:
+                    for time_name in self.employees[employee_name]:
+                        results[backend]['%s %s' % (employee_name, time_name)] = \
+                            self.seconds_to_hours(self.employees[employee_name][time_name])
+        finally:
+            self.aggregation_backend = aggregation_backend
+
+        for name in results['memory']:
+            if abs(results['memory'][name] - results['sql'][name]) > tolerance:
+                mismatches.append('%s: memory %1.2f, sql %1.2f' % (name, results['memory'][name],
+                                                                   results['sql'][name]))
+
+        if self.verbose:
+            for mismatch in mismatches:
+                print('Aggregation mismatch %s' % mismatch)
+
+        return mismatches
+
+    def _department_breakdown(self):
+
+        # employees planned and unplanned totals must already be calculated for the period
+        dept_breakdown = {}
+
+        if self.use_columnar_store and self.aggregation_backend == 'memory':
+
+            store = self._columnar_task_store()
+
+            breakdowns = {}
+            for time_name in ['unplanned_work_time', 'planned_work_time', 'vacation_time']:
+                employee_seconds = [self.employees[employee_name][time_name] for employee_name in store.employee_names]
+                breakdowns[time_name] = store.department_breakdown(employee_seconds)
+
+            for dept in self.jira_unplanned_task_departments:
+
+                dept_breakdown[dept] = {'unplanned_work_time': 0, 'planned_work_time': 0, 'vacation_time': 0,
+                                        'meeting_time': 0}
+
+                if dept != 'meeting':
+                    for time_name in breakdowns:
+                        dept_breakdown[dept][time_name] = breakdowns[time_name][dept]
+                else:
+                    dept_breakdown[dept]['meeting_time'] = \
+                        sum([self.employees[employee_name]['meeting_time'] for employee_name in self.employee_names])
+
+            return dept_breakdown
+
+        # process all depts planned or unplanned
+        for dept in self.jira_unplanned_task_departments:
+
+            dept_breakdown[dept] = {'unplanned_work_time': 0, 'planned_work_time': 0, 'vacation_time': 0,
+                                    'meeting_time': 0}
+
+            if dept != 'meeting':
+
+                for current_employee in self.employee_names:
+
+                    if dept in self.employee_info[current_employee]['dept']:
+                        dept_breakdown[dept]['unplanned_work_time'] = \
+                            dept_breakdown[dept]['unplanned_work_time'] + \
+                            self.employees[current_employee]['unplanned_work_time']
+
+                        dept_breakdown[dept]['planned_work_time'] = \
+                            dept_breakdown[dept]['planned_work_time'] + \
+                            self.employees[current_employee]['planned_work_time']
+
+                        dept_breakdown[dept]['vacation_time'] = \
+                            dept_breakdown[dept]['vacation_time'] + \
+                            self.employees[current_employee]['vacation_time']
+
+            # else meeting data to be computed
+            else:
+                for current_employee in self.employee_names:
+                    dept_breakdown[dept]['meeting_time'] = dept_breakdown[dept]['meeting_time'] + \
+                                                           self.employees[current_employee]['meeting_time']
+
+        return dept_breakdown
+
+    def get_planned_employees(self):
+        return sorted(self.plannedEmployees, key=lambda x: x.split(" ")[-1])
+
+    def seconds_to_hours(self, time_value):
+        return float(time_value) / float(self.seconds_in_hour)
+
+    def _process_task_problem(self, issue_key, problem_description):
+        if issue_key in self.tasks:
+            self.tasks[issue_key]['Problem'] = problem_description
+
+    def calculate_unplanned_hours(self,
+                                  start_date,
+                                  end_date=None,
+                                  employee_name=None,
+                                  output_report=False,
+                                  ignore_fields=[],
+                                  report_writer=None):
 
         if not output_report:
-            self.total_meeting_hours = self.seconds_to_hours(total_meeting_seconds)
-            self.total_vacation_hours = self.seconds_to_hours(total_employee_vacation_seconds)
-            self.total_holiday_hours = self.seconds_to_hours(self.holiday_hours_for_all_employees_in_period(start_date,
-                                                                                                            end_date))
-            self.total_unplanned_hours = \
-                self.seconds_to_hours(total_unplanned_work_seconds) + self.total_vacation_hours + \
-                self.total_holiday_hours + self.total_meeting_hours
+            # initialize each employees unplanned value
+            self._initialize_employee_unplanned()
+
+        if self.aggregation_backend == 'sql' and not output_report:
+            return self._calculate_unplanned_hours_sql(start_date, end_date)
+
+        self._record_task_schedule_problems()
+
+        if self.use_columnar_store and not output_report:
+            return self._calculate_unplanned_hours_columnar(start_date, end_date)
+
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
+
+        # only a report is restricted to the tasks of a single employee
+        if not output_report:
+            employee_name = None
+
+        if employee_name is None:
+            result = self._unplanned_hours_result(start_date, end_date)
+        else:
+            result = taskCalculations.unplanned_hours(self.task_snapshot(), start_date_time, end_date_time,
+                                                      employee_name)
+
+        self._record_calculation_problems(result)
+
+        if output_report:
+            self._output_report_tasks(result['issue_keys'], ignore_fields, report_writer)
+        else:
+            for time_name, seconds_name in [('unplanned_work_time', 'employee_unplanned_seconds'),
+                                            ('meeting_time', 'employee_meeting_seconds'),
+                                            ('vacation_time', 'employee_vacation_seconds')]:
+                for current_employee, seconds in result[seconds_name].items():
+                    self.employees[current_employee][time_name] = \
+                        self.employees[current_employee][time_name] + seconds
+
+            self.total_meeting_hours = result['total_meeting_hours']
+            self.total_vacation_hours = result['total_vacation_hours']
+            self.total_holiday_hours = result['total_holiday_hours']
+            self.total_unplanned_hours = result['total_unplanned_hours']
 
         return self.total_unplanned_hours
 
@@ -1643,11 +2232,12 @@ class Processor:
         return output
 
     def workable_hours_for_employee_in_period(self, employee_name, start_date, end_date=None):
-        calendar_hours_in_period = self.calendar_hours_for_one_employee_for_period(start_date, end_date)
-        holiday_hours_in_period = self.holiday_hours_per_employee(start_date, end_date)
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
         vacation_hours_in_period = self.seconds_to_hours(self.employees[employee_name]['vacation_time'])
         meeting_hours_in_period = self.seconds_to_hours(self.employees[employee_name]['meeting_time'])
-        return calendar_hours_in_period - (holiday_hours_in_period + vacation_hours_in_period + meeting_hours_in_period)
+        capacity_calendar = self.capacity_calendar(start_date_time, end_date_time, employee_name)
+        return capacity_calendar.workable_hours(start_date_time, end_date_time, vacation_hours_in_period) - \
+            meeting_hours_in_period
 
     def _report_column_data_for_task_db(self, task_db_row, ignore_fields=[]):
 
@@ -1745,386 +2335,671 @@ class Processor:
 
         return start_date, end_date
 
-    def generate_report(self, report_type, start_date, end_date=None, output='display', filename=None):
+    def _batch_cached(self, key, function, *args):
 
-        self._set_date_range(start_date, end_date)
+        # outside of a batch of reports every computation is run each time it is asked for
+        if self._batch_cache is None:
+            return function(*args)
 
-        ignore_fields = []
+        if key not in self._batch_cache:
+            self._batch_cache[key] = function(*args)
 
-        if output == 'display':
+        return self._batch_cache[key]
 
-            if report_type == 'all planned' or report_type == 'all unplanned':
+    def _run_shared_computation(self, computation, start_date, end_date):
 
-                if report_type == 'all unplanned':
-                    ignore_fields = ['Description', 'Progress', 'Unplanned', 'Reporter',
-                                     'End Date', 'Start Date', 'Resolution', 'Issue Type', 'Epic', 'Work Log']
-                    self.calculate_unplanned_hours(start_date=start_date, end_date=end_date)
+        if computation == 'planned hours':
+            # the per task results are only shared by the in memory calculation
+            if self.aggregation_backend == 'memory' and not self.use_columnar_store:
+                self._planned_hours_result(start_date, end_date)
 
-                elif report_type == 'all planned':
-                    ignore_fields = ['Description', 'Progress', 'Unplanned', 'Reporter',
-                                     'End Date', 'Start Date', 'Resolution', 'Issue Type', 'Work Log']
-                    self.calculate_planned_hours(start_date=start_date, end_date=end_date)
+        elif computation == 'unplanned hours':
+            if self.aggregation_backend == 'memory' and not self.use_columnar_store:
+                self._unplanned_hours_result(start_date, end_date)
 
-                print()
-                print('===================================')
-                print('%s Report for Period' % (string.capwords(report_type)))
-                print('  Start Date: %s' % start_date)
-                print('  End Date: %s' % end_date)
-                for current_employee in self.employee_names:
-                    print()
-                    print('Employee Name: %s' % current_employee)
-                    if report_type == 'all unplanned':
-                        print('Meeting Hours: %1.2f' % self.seconds_to_hours(
-                            self.employees[current_employee]['meeting_time']))
-                        print('Vacation Hours: %1.2f' % self.seconds_to_hours(
-                            self.employees[current_employee]['vacation_time']))
-                    print('Tasks:')
-                    header = []
-                    for task_key in self.task_output_format:
-                        if task_key not in ignore_fields:
-                            header.append(task_key)
-
-                    print(_csv_row_to_string(header))
-
-                    ignore_fields = ignore_fields + ['Assignee']
-                    # for each issue key in tasks
-
-                    if report_type == 'all planned':
-
-                        self.calculate_planned_hours(start_date=start_date,
-                                                     end_date=end_date,
-                                                     employee_name=current_employee,
-                                                     output_report=True,
-                                                     ignore_fields=ignore_fields)
-
-                    elif report_type == 'all unplanned':
-
-                        self.calculate_unplanned_hours(start_date=start_date,
-                                                       end_date=end_date,
-                                                       employee_name=current_employee,
-                                                       output_report=True,
-                                                       ignore_fields=ignore_fields)
-
-                print('===================================')
-
-            elif report_type == 'task errors':
-
-                self.calculate_planned_hours(start_date=start_date, end_date=end_date)
-                self.calculate_unplanned_hours(start_date=start_date, end_date=end_date)
-
-                ignore_fields = ['Description', 'Progress', 'Unplanned', 'Reporter',
-                                 'End Date', 'Start Date', 'Resolution', 'Issue Type', 'Epic', 'Work Log']
-
-                print()
-                print('===================================')
-                print('%s Report for Period' % (string.capwords(report_type)))
-                print('  Start Date: %s' % start_date)
-                print('  End Date: %s' % end_date)
-                for current_employee in self.employee_names:
-                    print()
-                    print('Employee Name: %s' % current_employee)
-                    print('Errors:')
-                    header = []
-                    for task_key in self.task_output_format:
-                        if task_key not in ignore_fields:
-                            header.append(task_key)
+        elif computation == 'employee planned tasks':
+            self._employee_tasks_result('planned', start_date, end_date)
 
-                    print(_csv_row_to_string(header))
+        elif computation == 'employee unplanned tasks':
+            self._employee_tasks_result('unplanned', start_date, end_date)
 
-                    ignore_fields = ignore_fields + ['Assignee']
+        elif computation == 'period issue keys':
+            self._task_start_date_index()
 
-                    # for each issue key in tasks
-                    for issue_key in self.tasks:
+        elif computation == 'work logged':
+            self._task_work_logged()
 
-                        task_ignore_fields = ignore_fields
+        elif computation == 'year calendar hours':
+            self.calendar_hours_for_one_employee_for_current_year()
 
-                        # if an error description is in task then
-                        if self.tasks[issue_key]['Problem'] is not None:
+        elif computation == 'period calendar hours':
+            self.calendar_hours_for_one_employee_for_period(start_date, end_date)
 
-                            # if the task is in employee names to process
-                            if self._normalize_name(self.tasks[issue_key]['Assignee']) == current_employee:
+        elif computation == 'holiday hours':
+            self.holiday_hours_per_employee(start_date, end_date)
 
-                                date_time = self.tasks[issue_key]['Created Date']
+        elif computation == 'capacity':
+            self._period_capacity(start_date, end_date)
 
-                                if not self.tasks[issue_key]['Unplanned']:
-                                    date_time = self.tasks[issue_key]['Start Date']
+    def generate_reports(self, report_specs, start_date=None, end_date=None, print_summary=True):
 
-                                if self._is_datetime_in_period(date_time, start_date, end_date):
-                                    # print the formatted task line to output device
-                                    print(self._format_task_in_memory_for_report(issue_key, task_ignore_fields))
+        # Run a batch of reports.  Each report spec is a dictionary of generate_report arguments
+        # and any spec without a period uses the start and end date given here.  The computations
+        # the reports share are planned up front and run once before all of the reports are output.
+        report_specs = [reportBatch.normalize_report_spec(spec, start_date, end_date) for spec in report_specs]
 
-                print('===================================')
+        run_summary = reportBatch.RunSummary()
 
-            elif report_type == 'work logged':
+        self._batch_cache = {}
 
-                print()
-                print('===================================')
-                print('%s Report for Period' % (string.capwords(report_type)))
-                print('  Start Date: %s' % start_date)
-                print('  End Date: %s' % end_date)
+        try:
 
-                print(_csv_row_to_string(['Assignee', 'Logged Hours', 'Workable Hours']))
+            for report_start_date, report_end_date in self._unique_report_periods(report_specs):
+                run_summary.time_stage('date range %s - %s' % (report_start_date, report_end_date),
+                                       self._batch_cached,
+                                       ('date range', report_start_date, report_end_date),
+                                       self._set_date_range, report_start_date, report_end_date)
 
-                for current_employee in self.task_work_logged:
+            for computation, computation_start_date, computation_end_date in \
+                    reportBatch.plan_computations(report_specs):
 
-                    if self.is_employee_name_in_employee_info(current_employee):
-                        employee_workable_hours = '%1.2f' % self.workable_hours_for_employee_in_period(current_employee,
-                                                                                                       start_date,
-                                                                                                       end_date)
+                stage_name = computation
+                if computation_start_date is not None:
+                    stage_name = '%s %s - %s' % (computation, computation_start_date, computation_end_date)
 
-                        logged_work = \
-                            '%1.2f' % self.seconds_to_hours(
-                                self.task_work_logged[current_employee]['total_logged_work'])
+                run_summary.time_stage(stage_name,
+                                       self._run_shared_computation,
+                                       computation,
+                                       computation_start_date,
+                                       computation_end_date)
 
-                        print(_csv_row_to_string([current_employee, logged_work, employee_workable_hours]))
+            for spec in report_specs:
+                run_summary.time_stage('report %s' % spec['report_type'], self.generate_report, **spec)
 
-            elif report_type == 'dept breakdown':
+        finally:
+            self._batch_cache = None
 
-                self.calculate_planned_hours(start_date=start_date, end_date=end_date)
-                self.calculate_unplanned_hours(start_date=start_date, end_date=end_date)
+        if print_summary:
+            print()
+            for line in run_summary.lines():
+                print(line)
 
-                dept_breakdown = {}
+        return run_summary
 
-                # process all depts planned or unplanned
-                for dept in self.jira_unplanned_task_departments:
+    def _unique_report_periods(self, report_specs):
 
-                    dept_breakdown[dept] = {'unplanned_work_time': 0, 'planned_work_time': 0, 'vacation_time': 0,
-                                            'meeting_time': 0}
+        periods = []
+        for spec in report_specs:
+            if (spec['start_date'], spec['end_date']) not in periods:
+                periods.append((spec['start_date'], spec['end_date']))
+        return periods
 
-                    if dept != 'meeting':
+    def generate_report(self,
+                        report_type,
+                        start_date,
+                        end_date=None,
+                        output='display',
+                        filename=None,
+                        report_writer=None):
 
-                        for current_employee in self.employee_names:
+        # Report types and the inputs each one needs are found in the report registry.  Report text
+        # is written to the display, to a file or to memory through a report writer and a report
+        # written to memory returns its text.  A text report can instead be output as its structured
+        # result, returned as is (output='result') or written to filename as json, csv or parquet.
+        definition = reportRegistry.report_definition(report_type)
 
-                            if dept in self.employee_info[current_employee]['dept']:
-                                dept_breakdown[dept]['unplanned_work_time'] = dept_breakdown[dept][
-                                                                                  'unplanned_work_time'] + \
-                                                                              self.employees[current_employee][
-                                                                                  'unplanned_work_time']
+        self._batch_cached(('date range', start_date, end_date), self._set_date_range, start_date, end_date)
 
-                                dept_breakdown[dept]['planned_work_time'] = \
-                                    dept_breakdown[dept]['planned_work_time'] + \
-                                    self.employees[current_employee]['planned_work_time']
+        result_output = output in reportResults.result_outputs
 
-                                dept_breakdown[dept]['vacation_time'] = \
-                                    dept_breakdown[dept]['vacation_time'] + \
-                                    self.employees[current_employee]['vacation_time']
+        if result_output:
 
-                    # else meeting data to be computed
-                    else:
-                        for current_employee in self.employee_names:
-                            dept_breakdown[dept]['meeting_time'] = dept_breakdown[dept]['meeting_time'] + \
-                                                                   self.employees[current_employee]['meeting_time']
-
-                print()
-                for dept in self.jira_unplanned_task_departments.keys():
-                    print('===================================')
-                    print('Department Breakdown for Period')
-                    print('Start Date: %s' % start_date)
-                    print('End Date: %s' % end_date)
-                    print('Dept: %s' % string.capwords(dept))
-                    print(
-                        'Unplanned Hours: %1.2f' % self.seconds_to_hours(dept_breakdown[dept]['unplanned_work_time']))
-                    print('Planned Hours: %1.2f' % self.seconds_to_hours(dept_breakdown[dept]['planned_work_time']))
-                    print('Vacation Hours: %1.2f' % self.seconds_to_hours(dept_breakdown[dept]['vacation_time']))
-                    print('Meeting Hours: %1.2f' % self.seconds_to_hours(dept_breakdown[dept]['meeting_time']))
-                    total_all_unplanned_hours = self.seconds_to_hours(dept_breakdown[dept]['unplanned_work_time'] +
-                                                                      dept_breakdown[dept]['vacation_time'] +
-                                                                      dept_breakdown[dept]['meeting_time'])
-
-                    try:
-                        print('Percentage Unplanned to Planned: %1.2f%%' %
-                              (total_all_unplanned_hours /
-                               self.seconds_to_hours(dept_breakdown[dept]['planned_work_time'])) * 100.0)
-                    except:
-                        pass
+            if not definition['text_report']:
+                return None
 
-                    try:
-                        print('Percentage Unplanned to (Planned + Unplanned): %1.2f%%' %
-                              (total_all_unplanned_hours /
-                               (self.seconds_to_hours(dept_breakdown[dept]['planned_work_time']) +
-                                total_all_unplanned_hours)) * 100.0)
-                    except:
-                        pass
+            if output != 'result' and filename is None:
+                raise ValueError('A filename is required to write the %s report as %s' % (report_type, output))
 
-                    print('Tasks:')
-                    ignore_fields = ['Description', 'Progress', 'Unplanned', 'Reporter',
-                                     'End Date', 'Start Date', 'Resolution', 'Issue Type', 'Epic', 'Work Log']
+            # the report text is not wanted when only the structured result is output
+            report_writer = reportWriter.ReportWriter('memory')
 
-                    header = []
-                    for task_key in self.task_output_format:
-                        if task_key not in ignore_fields:
-                            header.append(task_key)
-                    print(_csv_row_to_string(header))
+        # reports only produce the outputs they support
+        elif output not in definition['outputs']:
+            return None
 
-                    for issue_key in self.tasks:
+        # a writer handed in by the caller is left open for the caller to write more reports to
+        close_report_writer = report_writer is None or result_output
 
-                        if self.jira_unplanned_task_departments[dept] in issue_key:
+        if definition['text_report'] and report_writer is None:
+            report_writer = reportWriter.ReportWriter(output, filename)
 
-                            if self.is_employee_name_in_employee_info(self.tasks[issue_key]['Assignee']):
-                                print(self._format_task_in_memory_for_report(issue_key, ignore_fields))
+        context = reportRegistry.ReportContext(processor=self,
+                                               report_type=report_type,
+                                               start_date=start_date,
+                                               end_date=end_date,
+                                               output=output,
+                                               filename=filename,
+                                               report_writer=report_writer,
+                                               inputs=definition['inputs'])
 
-            elif report_type == 'employee hours summary':
+        # computations repeated inside a single report are only run once
+        report_cache = self._batch_cache is None
+        if report_cache:
+            self._batch_cache = {}
 
-                self.calculate_planned_hours(start_date=start_date, end_date=end_date)
-                self.calculate_unplanned_hours(start_date=start_date, end_date=end_date)
+        try:
+            definition['function'](self, context)
+        finally:
+            if report_cache:
+                self._batch_cache = None
 
-                print()
-                print('===================================')
-                print('Employee Hours Summary for Period')
-                print('Start Date: %s' % start_date)
-                print('End Date: %s' % end_date)
-                print('Name, Unplanned, Planned, Vacation')
-                for current_employee in self.employee_names:
-                    print('%s,%1.2f,%1.2f,%1.2f' % (current_employee,
-                                                    self.seconds_to_hours(
-                                                        self.employees[current_employee]['unplanned_work_time']),
-                                                    self.seconds_to_hours(
-                                                        self.employees[current_employee]['planned_work_time']),
-                                                    self.seconds_to_hours(
-                                                        self.employees[current_employee]['vacation_time'])))
-                print('===================================')
-
-            elif report_type == 'planned employees':
-
-                self.calculate_planned_hours(start_date=start_date, end_date=end_date)
-                self.calculate_unplanned_hours(start_date=start_date, end_date=end_date)
-
-                print()
-                print('===================================')
-                print('Employee(s) who have worked on scheduled projects in Period:')
-                print('Start Date: %s' % start_date)
-                print('End Date: %s' % end_date)
-                for current_employee in self.get_planned_employees():
-                    print(current_employee)
-                print('===================================')
+            if report_writer is not None and close_report_writer:
+                report_writer.close()
+
+        if result_output:
+
+            if output != 'result':
+                context.result.write(filename, output)
+
+            return context.result
+
+        if report_writer is None:
+            return None
+
+        return report_writer.getvalue()
+
+    def _report_input(self, name, start_date, end_date):
+
+        if name == 'planned hours':
+            return self.calculate_planned_hours(start_date, end_date)
+
+        elif name == 'unplanned hours':
+            return self.calculate_unplanned_hours(start_date, end_date)
+
+        elif name == 'employee planned tasks':
+            return self._employee_tasks_result('planned', start_date, end_date)
+
+        elif name == 'employee unplanned tasks':
+            return self._employee_tasks_result('unplanned', start_date, end_date)
+
+        elif name == 'department breakdown':
+            # employee totals must already be calculated for the period
+            return self._department_breakdown()
+
+        elif name == 'period issue keys':
+            return self._issue_keys_in_period(start_date, end_date)
+
+        elif name == 'work logged':
+            return self._task_work_logged()
+
+        elif name == 'year calendar hours':
+            return self.calendar_hours_for_one_employee_for_current_year()
+
+        elif name == 'period calendar hours':
+            return self.calendar_hours_for_one_employee_for_period(start_date, end_date)
+
+        elif name == 'holiday hours':
+            return self.holiday_hours_per_employee(start_date, end_date)
+
+        elif name == 'capacity':
+            return self._period_capacity(start_date, end_date)
+
+        raise ValueError('Unknown report input %s' % name)
+
+    def _employee_tasks_result(self, kind, start_date, end_date=None):
+
+        # the tasks of every employee from a single pass over the period instead of one per employee
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
+
+        if kind == 'planned':
+            function = taskCalculations.planned_hours_by_employee
+        else:
+            function = taskCalculations.unplanned_hours_by_employee
+
+        return self._batch_cached(('employee %s tasks' % kind, start_date, end_date),
+                                  function, self.task_snapshot(), start_date_time, end_date_time, self.employee_names)
+
+    def _output_employee_report_tasks(self, employee_name, result, ignore_fields, report_writer, tasks_table):
+
+        # same as a report of a single employee from calculate_planned_hours or calculate_unplanned_hours
+        self._record_task_schedule_problems()
+        self._record_calculation_problems(result)
+
+        for assignee in result.get('planned_employees', []):
+            if assignee not in self.plannedEmployees:
+                self.plannedEmployees.append(assignee)
+
+        for issue_key in result['issue_keys']:
+            output = self._report_column_data_for_task_in_memory(issue_key, ignore_fields)
+            report_writer.row(output)
+            tasks_table.append([employee_name] + output)
+
+    def _report_columns(self, ignore_fields):
+        return [task_key for task_key in self.task_output_format if task_key not in ignore_fields]
+
+    def _employee_tasks_report(self, context):
+
+        start_date = context.start_date
+        end_date = context.end_date
+        report_writer = context.report_writer
+        report_type = context.report_type
+
+        if report_type == 'all unplanned':
+            ignore_fields = ['Description', 'Progress', 'Unplanned', 'Reporter',
+                             'End Date', 'Start Date', 'Resolution', 'Issue Type', 'Epic', 'Work Log']
+            context.input('unplanned hours')
+            employee_tasks = context.input('employee unplanned tasks')
+
+        else:
+            ignore_fields = ['Description', 'Progress', 'Unplanned', 'Reporter',
+                             'End Date', 'Start Date', 'Resolution', 'Issue Type', 'Work Log']
+            context.input('planned hours')
+            employee_tasks = context.input('employee planned tasks')
+
+        tasks_table = context.result.table('tasks', ['Employee'] + self._report_columns(ignore_fields + ['Assignee']))
+
+        if report_type == 'all unplanned':
+            employees_table = context.result.table('employees', ['Employee', 'Meeting Hours', 'Vacation Hours'])
+            for current_employee in self.employee_names:
+                employees_table.append([current_employee,
+                                        self.seconds_to_hours(self.employees[current_employee]['meeting_time']),
+                                        self.seconds_to_hours(self.employees[current_employee]['vacation_time'])])
+
+        report_writer.line()
+        report_writer.line('===================================')
+        report_writer.line('%s Report for Period' % (string.capwords(report_type)))
+        report_writer.line('  Start Date: %s' % start_date)
+        report_writer.line('  End Date: %s' % end_date)
+        for current_employee in self.employee_names:
+            report_writer.line()
+            report_writer.line('Employee Name: %s' % current_employee)
+            if report_type == 'all unplanned':
+                report_writer.line('Meeting Hours: %1.2f' % self.seconds_to_hours(
+                    self.employees[current_employee]['meeting_time']))
+                report_writer.line('Vacation Hours: %1.2f' % self.seconds_to_hours(
+                    self.employees[current_employee]['vacation_time']))
+            report_writer.line('Tasks:')
+            header = []
+            for task_key in self.task_output_format:
+                if task_key not in ignore_fields:
+                    header.append(task_key)
+
+            report_writer.row(header)
+
+            ignore_fields = ignore_fields + ['Assignee']
+            # the tasks of the employee in the period
+            self._output_employee_report_tasks(current_employee,
+                                               employee_tasks[current_employee],
+                                               ignore_fields,
+                                               report_writer,
+                                               tasks_table)
+
+        report_writer.line('===================================')
+
+    def _task_errors_report(self, context):
+
+        start_date = context.start_date
+        end_date = context.end_date
+        report_writer = context.report_writer
+
+        context.input('planned hours')
+        context.input('unplanned hours')
+
+        ignore_fields = ['Description', 'Progress', 'Unplanned', 'Reporter',
+                         'End Date', 'Start Date', 'Resolution', 'Issue Type', 'Epic', 'Work Log']
+
+        errors_table = context.result.table('errors', ['Employee'] + self._report_columns(ignore_fields + ['Assignee']))
+
+        report_writer.line()
+        report_writer.line('===================================')
+        report_writer.line('%s Report for Period' % (string.capwords(context.report_type)))
+        report_writer.line('  Start Date: %s' % start_date)
+        report_writer.line('  End Date: %s' % end_date)
+        for current_employee in self.employee_names:
+            report_writer.line()
+            report_writer.line('Employee Name: %s' % current_employee)
+            report_writer.line('Errors:')
+            header = []
+            for task_key in self.task_output_format:
+                if task_key not in ignore_fields:
+                    header.append(task_key)
+
+            report_writer.row(header)
+
+            ignore_fields = ignore_fields + ['Assignee']
+
+            # for each issue key in tasks that start in the period
+            for issue_key in context.input('period issue keys'):
+
+                task_ignore_fields = ignore_fields
+
+                # if an error description is in task then
+                if self.tasks[issue_key]['Problem'] is not None:
+
+                    # if the task is in employee names to process
+                    if self._normalize_name(self.tasks[issue_key]['Assignee']) == current_employee:
+
+                        date_time = self.tasks[issue_key]['Created Date']
+
+                        if not self.tasks[issue_key]['Unplanned']:
+                            date_time = self.tasks[issue_key]['Start Date']
 
-            elif report_type == 'work statistics':
-
-                total_possible_work_hours_in_year = self.total_workable_hours(start_date=None,
-                                                                              end_date=None)
-                total_possible_work_hours_in_period = self.total_workable_hours(start_date=start_date,
-                                                                                end_date=end_date)
-                total_holiday_hours_in_year = \
-                    self.holiday_hours_for_all_employees_in_period(start_date=start_date,
-                                                                   end_date='12/31/2018 23:59')
-
-                total_unplanned_hours = self.calculate_unplanned_hours(start_date=start_date,
-                                                                       end_date=end_date)
+                        if self._is_datetime_in_period(date_time, start_date, end_date):
+                            # print the formatted task line to output device
+                            output = self._report_column_data_for_task_in_memory(issue_key, task_ignore_fields)
+                            report_writer.row(output)
+                            errors_table.append([current_employee] + output)
 
-                total_planned_hours = self.calculate_planned_hours(start_date=start_date,
-                                                                   end_date=end_date)
+        report_writer.line('===================================')
 
-                total_planned_and_unplanned_hours = self.total_planned_and_unplanned_hours(start_date=start_date,
-                                                                                           end_date=end_date)
+    def _work_logged_report(self, context):
 
-                total_percentage_work_unplanned = self.percentage_unplanned_to_planned(start_date=start_date,
-                                                                                       end_date=end_date)
+        start_date = context.start_date
+        end_date = context.end_date
+        report_writer = context.report_writer
 
-                total_percentage_work_unplanned_and_planned = (float(total_unplanned_hours) /
-                                                               float(total_planned_and_unplanned_hours)) * 100.0
+        report_writer.line()
+        report_writer.line('===================================')
+        report_writer.line('%s Report for Period' % (string.capwords(context.report_type)))
+        report_writer.line('  Start Date: %s' % start_date)
+        report_writer.line('  End Date: %s' % end_date)
 
-                total_number_employees = len(self.employee_names)
-                print()
-                print('===================================')
-                print('Task Statistics')
-                print('Total Number of Employees: %d' % total_number_employees)
-                print('All statistics below are for all employees for a year')
-                print('Maximum Work Hours (Excludes Weekends): %d' %
-                      self.calendar_hours_for_all_employees_for_current_year())
+        report_writer.row(['Assignee', 'Logged Hours', 'Workable Hours'])
 
-                print('Maximum Vacation Hours: %d' % self.maximum_vacation_hours_that_can_be_recorded_for_employees())
+        task_work_logged = context.input('work logged')
+        capacity = context.input('capacity')
 
-                print('Maximum Holiday Hours: %d' % total_holiday_hours_in_year)
+        work_logged_table = context.result.table('work logged', ['Assignee', 'Logged Hours', 'Workable Hours'])
 
-                print('Maximum Work Hours (Calendar Hours - (Vacation and Holidays)) for Year: %d' %
-                      total_possible_work_hours_in_year)
-                print()
-                print('All statistics below are for all Employees during specified period')
-                print('Start Date: %s' % start_date)
-                print('End Date: %s' % end_date)
+        for current_employee in task_work_logged:
 
-                print('Total Calendar Hours - (Reported Vacation and Holidays): %d' %
-                      total_possible_work_hours_in_period)
+            if self.is_employee_name_in_employee_info(current_employee):
+                workable_hours = capacity.employee_hours(current_employee)['workable_hours']
+                logged_hours = self.seconds_to_hours(task_work_logged[current_employee]['total_logged_work'])
 
-                print('Total Unplanned Hours (Includes Vacations and Holidays): %d ' % total_unplanned_hours)
+                report_writer.row([current_employee, '%1.2f' % logged_hours, '%1.2f' % workable_hours])
+                work_logged_table.append([current_employee, logged_hours, workable_hours])
 
-                print('Total Planned Hours (Scheduled Projects): %d' % total_planned_hours)
+    def _department_breakdown_report(self, context):
 
-                print('Total Planned + Unplanned Worked Hours = %d' % total_planned_and_unplanned_hours)
+        start_date = context.start_date
+        end_date = context.end_date
+        report_writer = context.report_writer
 
-                print(
-                    'Total Percentage of all unplanned in relation to max possible hours that could be worked: %1.2f%%'
-                    % ((float(total_unplanned_hours) / float(total_possible_work_hours_in_period)) * 100.0))
+        context.input('planned hours')
+        context.input('unplanned hours')
 
-                print(
-                    'Total percentage of all reported work that is unplanned (unplanned/(unplanned+planned)) = %1.2f%%'
-                    % total_percentage_work_unplanned_and_planned)
+        dept_breakdown = context.input('department breakdown')
 
-                print('Total percentage of all unplanned in relation to all planned (unplanned/planned) = %1.2f%%' %
-                      total_percentage_work_unplanned)
+        ignore_fields = ['Description', 'Progress', 'Unplanned', 'Reporter',
+                         'End Date', 'Start Date', 'Resolution', 'Issue Type', 'Epic', 'Work Log']
 
-                print('Unplanned Percentage Range: (%d%% - %d%%)' %
-                      (total_percentage_work_unplanned_and_planned, total_percentage_work_unplanned))
+        departments_table = context.result.table('departments', ['Dept',
+                                                                 'Unplanned Hours',
+                                                                 'Planned Hours',
+                                                                 'Vacation Hours',
+                                                                 'Meeting Hours',
+                                                                 'Percentage Unplanned to Planned',
+                                                                 'Percentage Unplanned to (Planned + Unplanned)'])
 
-                print('Unplanned Percentage Range Midpoint: %d%%' %
-                      ((total_percentage_work_unplanned_and_planned + total_percentage_work_unplanned) / 2))
+        tasks_table = context.result.table('tasks', ['Dept'] + self._report_columns(ignore_fields))
 
-            elif report_type == 'input file statistics':
-                print()
-                print('===================================')
-                print('File Export Statistics')
-                print("Today's Date is %s" % (_datetime_to_date_string(datetime.now())))
-                # print('Jira wildcard files "%s" exported on %s' % (self.jira_file_wildcard, self.lastInputFileDate)
-                # print('Smartsheet file %s exported on %s' % (self.smartsheet_filename, self.lastSmartsheetExportDate)
-                # print('Last time Jira and Smartsheet export files were analyzed %s' %
-                # (self.lastTimeJiraInputFileModifiedDate)
+        report_writer.line()
+        for dept in self.jira_unplanned_task_departments.keys():
+            report_writer.line('===================================')
+            report_writer.line('Department Breakdown for Period')
+            report_writer.line('Start Date: %s' % start_date)
+            report_writer.line('End Date: %s' % end_date)
+            report_writer.line('Dept: %s' % string.capwords(dept))
+            report_writer.line(
+                'Unplanned Hours: %1.2f' % self.seconds_to_hours(dept_breakdown[dept]['unplanned_work_time']))
+            report_writer.line('Planned Hours: %1.2f' %
+                               self.seconds_to_hours(dept_breakdown[dept]['planned_work_time']))
+            report_writer.line('Vacation Hours: %1.2f' %
+                               self.seconds_to_hours(dept_breakdown[dept]['vacation_time']))
+            report_writer.line('Meeting Hours: %1.2f' %
+                               self.seconds_to_hours(dept_breakdown[dept]['meeting_time']))
+            total_all_unplanned_hours = self.seconds_to_hours(dept_breakdown[dept]['unplanned_work_time'] +
+                                                              dept_breakdown[dept]['vacation_time'] +
+                                                              dept_breakdown[dept]['meeting_time'])
 
-                # if self.dateStringToDateTime(self.lastTimeJiraInputFileModifiedDate, self.business_hours_date_format)
-                #  < \
-                #        self.dateStringToDateTime(self.lastSmartsheetExportDate, self.business_hours_date_format):
-                #    print('Smartsheet Export File needs processed, re-run task analysis'
-                # if self.dateStringToDateTime
-                #  < \
-                #        self.dateStringToDateTime(self.lastInputFileDate, self.business_hours_date_format):
-                #    print('Jira Export File(s) need processed, re-run task analysis'
+            planned_hours = self.seconds_to_hours(dept_breakdown[dept]['planned_work_time'])
 
-        elif output == 'file':
+            percentage_unplanned_to_planned = None
+            if planned_hours != 0:
+                percentage_unplanned_to_planned = (total_all_unplanned_hours / planned_hours) * 100.0
 
-            if report_type == 'all tasks csv dump' or report_type == 'all tasks csv dump in period':
+            percentage_unplanned_to_total = None
+            if planned_hours + total_all_unplanned_hours != 0:
+                percentage_unplanned_to_total = \
+                    (total_all_unplanned_hours / (planned_hours + total_all_unplanned_hours)) * 100.0
 
-                include_in_report = True
+            departments_table.append([dept,
+                                      self.seconds_to_hours(dept_breakdown[dept]['unplanned_work_time']),
+                                      planned_hours,
+                                      self.seconds_to_hours(dept_breakdown[dept]['vacation_time']),
+                                      self.seconds_to_hours(dept_breakdown[dept]['meeting_time']),
+                                      percentage_unplanned_to_planned,
+                                      percentage_unplanned_to_total])
 
-                task_file = open(file=filename, mode='w', errors='ignore')
+            try:
+                report_writer.line('Percentage Unplanned to Planned: %1.2f%%' %
+                                   (total_all_unplanned_hours /
+                                    self.seconds_to_hours(dept_breakdown[dept]['planned_work_time'])) * 100.0)
+            except:
+                pass
+
+            try:
+                report_writer.line('Percentage Unplanned to (Planned + Unplanned): %1.2f%%' %
+                                   (total_all_unplanned_hours /
+                                    (self.seconds_to_hours(dept_breakdown[dept]['planned_work_time']) +
+                                     total_all_unplanned_hours)) * 100.0)
+            except:
+                pass
 
-                task_writer = csv.writer(task_file,
-                                         delimiter=',',
-                                         quotechar='"',
-                                         quoting=csv.QUOTE_MINIMAL)
+            report_writer.line('Tasks:')
+
+            header = []
+            for task_key in self.task_output_format:
+                if task_key not in ignore_fields:
+                    header.append(task_key)
+            report_writer.row(header)
 
-                columns = []
-                for column_header in self.task_output_format:
-                    if column_header != 'Issue Key' and column_header != 'Work Log':
-                        columns.append(column_header)
-                task_writer.writerow(['Issue Key'] + columns)
+            for issue_key in self.tasks:
 
-                for issue_key in self.tasks:
+                if self.jira_unplanned_task_departments[dept] in issue_key:
 
-                    if report_type == 'all tasks csv dump in period':
+                    if self.is_employee_name_in_employee_info(self.tasks[issue_key]['Assignee']):
+                        output = self._report_column_data_for_task_in_memory(issue_key, ignore_fields)
+                        report_writer.row(output)
+                        tasks_table.append([dept] + output)
 
-                        task_start_date_time = self.task_start_date(issue_key)
+    def _employee_hours_summary_report(self, context):
 
-                        include_in_report = False
+        start_date = context.start_date
+        end_date = context.end_date
+        report_writer = context.report_writer
 
-                        if self._is_datetime_in_period(task_start_date_time, start_date, end_date):
-                            include_in_report = True
+        context.input('planned hours')
+        context.input('unplanned hours')
 
-                    if include_in_report:
-                        output = self._report_column_data_for_task_in_memory(
-                            issue_key,
-                            ignore_fields=['Issue Key'])
-                        task_writer.writerow([issue_key] + output)
+        report_writer.line()
+        report_writer.line('===================================')
+        report_writer.line('Employee Hours Summary for Period')
+        report_writer.line('Start Date: %s' % start_date)
+        report_writer.line('End Date: %s' % end_date)
+        report_writer.line('Name, Unplanned, Planned, Vacation')
 
-                task_file.close()
+        employees_table = context.result.table('employees', ['Name', 'Unplanned', 'Planned', 'Vacation'])
+
+        for current_employee in self.employee_names:
+            employee_hours = [current_employee,
+                              self.seconds_to_hours(self.employees[current_employee]['unplanned_work_time']),
+                              self.seconds_to_hours(self.employees[current_employee]['planned_work_time']),
+                              self.seconds_to_hours(self.employees[current_employee]['vacation_time'])]
+
+            report_writer.line('%s,%1.2f,%1.2f,%1.2f' % tuple(employee_hours))
+            employees_table.append(employee_hours)
+        report_writer.line('===================================')
+
+    def _planned_employees_report(self, context):
+
+        start_date = context.start_date
+        end_date = context.end_date
+        report_writer = context.report_writer
+
+        context.input('planned hours')
+        context.input('unplanned hours')
+
+        report_writer.line()
+        report_writer.line('===================================')
+        report_writer.line('Employee(s) who have worked on scheduled projects in Period:')
+        report_writer.line('Start Date: %s' % start_date)
+        report_writer.line('End Date: %s' % end_date)
+        planned_employees_table = context.result.table('planned employees', ['Name'])
+
+        for current_employee in self.get_planned_employees():
+            report_writer.line(current_employee)
+            planned_employees_table.append([current_employee])
+        report_writer.line('===================================')
+
+    def _work_statistics_report(self, context):
+
+        start_date = context.start_date
+        end_date = context.end_date
+        report_writer = context.report_writer
+
+        total_possible_work_hours_in_year = self.total_workable_hours(start_date=None,
+                                                                      end_date=None)
+        total_possible_work_hours_in_period = self.total_workable_hours(start_date=start_date,
+                                                                        end_date=end_date)
+        total_holiday_hours_in_year = \
+            self.holiday_hours_for_all_employees_in_period(start_date=start_date,
+                                                           end_date='12/31/2018 23:59')
+
+        total_unplanned_hours = self.calculate_unplanned_hours(start_date=start_date,
+                                                               end_date=end_date)
+
+        total_planned_hours = self.calculate_planned_hours(start_date=start_date,
+                                                           end_date=end_date)
+
+        total_planned_and_unplanned_hours = self.total_planned_and_unplanned_hours(start_date=start_date,
+                                                                                   end_date=end_date)
+
+        total_percentage_work_unplanned = self.percentage_unplanned_to_planned(start_date=start_date,
+                                                                               end_date=end_date)
+
+        total_percentage_work_unplanned_and_planned = (float(total_unplanned_hours) /
+                                                       float(total_planned_and_unplanned_hours)) * 100.0
+
+        total_number_employees = len(self.employee_names)
+
+        percentage_unplanned_to_workable = \
+            (float(total_unplanned_hours) / float(total_possible_work_hours_in_period)) * 100.0
+
+        context.result.add_metric('Total Number of Employees', total_number_employees)
+        context.result.add_metric('Maximum Work Hours', self.calendar_hours_for_all_employees_for_current_year())
+        context.result.add_metric('Maximum Vacation Hours',
+                                  self.maximum_vacation_hours_that_can_be_recorded_for_employees())
+        context.result.add_metric('Maximum Holiday Hours', total_holiday_hours_in_year)
+        context.result.add_metric('Maximum Work Hours for Year', total_possible_work_hours_in_year)
+        context.result.add_metric('Total Calendar Hours', total_possible_work_hours_in_period)
+        context.result.add_metric('Total Unplanned Hours', total_unplanned_hours)
+        context.result.add_metric('Total Planned Hours', total_planned_hours)
+        context.result.add_metric('Total Planned + Unplanned Worked Hours', total_planned_and_unplanned_hours)
+        context.result.add_metric('Percentage Unplanned to Workable', percentage_unplanned_to_workable)
+        context.result.add_metric('Percentage Unplanned to (Planned + Unplanned)',
+                                  total_percentage_work_unplanned_and_planned)
+        context.result.add_metric('Percentage Unplanned to Planned', total_percentage_work_unplanned)
+        context.result.add_metric('Unplanned Percentage Range Midpoint',
+                                  (total_percentage_work_unplanned_and_planned + total_percentage_work_unplanned) / 2)
+
+        report_writer.line()
+        report_writer.line('===================================')
+        report_writer.line('Task Statistics')
+        report_writer.line('Total Number of Employees: %d' % total_number_employees)
+        report_writer.line('All statistics below are for all employees for a year')
+        report_writer.line('Maximum Work Hours (Excludes Weekends): %d' %
+                           self.calendar_hours_for_all_employees_for_current_year())
+
+        report_writer.line('Maximum Vacation Hours: %d' %
+                           self.maximum_vacation_hours_that_can_be_recorded_for_employees())
+
+        report_writer.line('Maximum Holiday Hours: %d' % total_holiday_hours_in_year)
+
+        report_writer.line('Maximum Work Hours (Calendar Hours - (Vacation and Holidays)) for Year: %d' %
+                           total_possible_work_hours_in_year)
+        report_writer.line()
+        report_writer.line('All statistics below are for all Employees during specified period')
+        report_writer.line('Start Date: %s' % start_date)
+        report_writer.line('End Date: %s' % end_date)
+
+        report_writer.line('Total Calendar Hours - (Reported Vacation and Holidays): %d' %
+                           total_possible_work_hours_in_period)
+
+        report_writer.line('Total Unplanned Hours (Includes Vacations and Holidays): %d ' %
+                           total_unplanned_hours)
+
+        report_writer.line('Total Planned Hours (Scheduled Projects): %d' % total_planned_hours)
+
+        report_writer.line('Total Planned + Unplanned Worked Hours = %d' % total_planned_and_unplanned_hours)
+
+        report_writer.line(
+            'Total Percentage of all unplanned in relation to max possible hours that could be worked: %1.2f%%'
+            % percentage_unplanned_to_workable)
+
+        report_writer.line(
+            'Total percentage of all reported work that is unplanned (unplanned/(unplanned+planned)) = %1.2f%%'
+            % total_percentage_work_unplanned_and_planned)
+
+        report_writer.line(
+            'Total percentage of all unplanned in relation to all planned (unplanned/planned) = %1.2f%%' %
+            total_percentage_work_unplanned)
+
+        report_writer.line('Unplanned Percentage Range: (%d%% - %d%%)' %
+                           (total_percentage_work_unplanned_and_planned, total_percentage_work_unplanned))
+
+        report_writer.line('Unplanned Percentage Range Midpoint: %d%%' %
+                           ((total_percentage_work_unplanned_and_planned +
+                             total_percentage_work_unplanned) / 2))
+
+    def _input_file_statistics_report(self, context):
+
+        report_writer = context.report_writer
+
+        report_writer.line()
+        report_writer.line('===================================')
+        report_writer.line('File Export Statistics')
+        todays_date = _datetime_to_date_string(datetime.now())
+
+        report_writer.line("Today's Date is %s" % todays_date)
+        context.result.add_metric("Today's Date", todays_date)
+        # print('Jira wildcard files "%s" exported on %s' % (self.jira_file_wildcard, self.lastInputFileDate)
+        # print('Smartsheet file %s exported on %s' % (self.smartsheet_filename, self.lastSmartsheetExportDate)
+        # print('Last time Jira and Smartsheet export files were analyzed %s' %
+        # (self.lastTimeJiraInputFileModifiedDate)
+
+        # if self.dateStringToDateTime(self.lastTimeJiraInputFileModifiedDate, self.business_hours_date_format)
+        #  < \
+        #        self.dateStringToDateTime(self.lastSmartsheetExportDate, self.business_hours_date_format):
+        #    print('Smartsheet Export File needs processed, re-run task analysis'
+        # if self.dateStringToDateTime
+        #  < \
+        #        self.dateStringToDateTime(self.lastInputFileDate, self.business_hours_date_format):
+        #    print('Jira Export File(s) need processed, re-run task analysis'
+
+    def _all_tasks_dump_report(self, context):
+
+        if context.report_type == 'all tasks csv dump in period':
+            issue_keys = context.input('period issue keys')
+
+            # tasks without a start date are never in the period but still need their problem recorded
+            for issue_key in self._task_start_date_index().undated_issue_keys:
+                self.task_start_date(issue_key)
+        else:
+            issue_keys = None
+
+        self.export_tasks(context.filename, issue_keys=issue_keys)
 
     def datetime_for_first_day_in_current_year(self):
         date = _date_string_for_first_day_in_current_year()
@@ -2143,14 +3018,14 @@ class Processor:
 
     def calendar_hours_for_one_employee_for_current_year(self):
 
-        start_date_time, end_date_time = self.current_year_datetime_range()
+        return self._batch_cached(('year calendar hours', None, None), self._calendar_hours_for_current_year)
 
-        business_days = BusinessHours.BusinessHours(datetime1=start_date_time,
-                                                    datetime2=end_date_time,
-                                                    worktiming=self.workDayTime,
-                                                    weekends=self.weekends)
+    def _calendar_hours_for_current_year(self):
 
-        single_employee_work_hours_in_period = business_days.gethours()
+        start_date_time, end_date_time = self.current_year_datetime_range()
+
+        single_employee_work_hours_in_period = \
+            self.capacity_calendar(start_date_time, end_date_time).business_hours(start_date_time, end_date_time)
         return single_employee_work_hours_in_period
 
     def calendar_hours_for_all_employees_for_current_year(self):
@@ -2165,18 +3040,47 @@ class Processor:
 
     def calendar_hours_for_one_employee_for_period(self, start_date, end_date=None):
 
-        start_date_time = _date_string_to_datetime(start_date, self.business_hours_date_format)
+        return self._batch_cached(('period calendar hours', start_date, end_date),
+                                  self._calendar_hours_for_period, start_date, end_date)
 
-        if not end_date:
-            end_date_time = datetime.now()
-        else:
-            end_date_time = _date_string_to_datetime(end_date, self.business_hours_date_format)
+    def _calendar_hours_for_period(self, start_date, end_date=None):
+
+        start_date_time, end_date_time = self._period_datetime_range(start_date, end_date)
+
+        return self.capacity_calendar(start_date_time, end_date_time).business_hours(start_date_time, end_date_time)
+
+    def capacity_calendar(self, start_date_time, end_date_time, employee_name=None):
+
+        # The calendar covers whole years from the current year out to every period asked for and
+        # is only built again when a period outside of it is asked for or the holidays change.  The
+        # hours of every day come from workDayTime, weekends and the employee's holidays.
+        holiday_calendar = self.holiday_calendar(employee_name)
 
-        business_days = BusinessHours.BusinessHours(datetime1=start_date_time,
-                                                    datetime2=end_date_time,
-                                                    worktiming=self.workDayTime,
-                                                    weekends=self.weekends)
-        return business_days.gethours()
+        holiday_date_times = _NO_HOLIDAYS
+        if holiday_calendar is not None:
+            holiday_date_times = holiday_calendar.date_times()
+
+        calendar, calendar_holiday_date_times = self._capacity_calendars.get(holiday_calendar, (None, None))
+
+        if calendar is None or calendar_holiday_date_times is not holiday_date_times or \
+                not calendar.covers(start_date_time, end_date_time):
+
+            first_year = min(datetime.now().year, start_date_time.year)
+            last_year = max(datetime.now().year, end_date_time.year)
+
+            if calendar is not None:
+                first_year = min(first_year, calendar.first_date.year)
+                last_year = max(last_year, calendar.last_date.year)
+
+            calendar = capacityCalendar.calendar_for_years(first_year,
+                                                           last_year,
+                                                           self.workDayTime,
+                                                           self.weekends,
+                                                           [date_time.date() for date_time in holiday_date_times])
+
+            self._capacity_calendars[holiday_calendar] = (calendar, holiday_date_times)
+
+        return calendar
 
     def calendar_hours_for_all_employees_for_period(self, start_date, end_date=None):
 
@@ -2224,3 +3128,282 @@ class Processor:
         total_percentage_unplanned = (float(total_unplanned_hours) / float(total_planned_hours)) * 100.0
         # total_percentage_unplanned = (float(self.total_unplanned_hours) / float(self.actualWorkHours())) * 100.0
         return total_percentage_unplanned
+
+    def _task_time_charged(self, issue_key):
+
+        # a time that was never recorded counts as none, the same as the columnar store and the
+        # database aggregation count it
+        time_spent = self.tasks[issue_key]['Time Spent']
+        original_estimate = self.tasks[issue_key]['Original Estimate']
+
+        if time_spent is None:
+            time_spent = 0
+
+        if original_estimate is None:
+            original_estimate = 0
+
+        if time_spent < original_estimate:
+            time_spent = original_estimate
+
+        return time_spent
+
+    def _period_series(self, boundaries=None, cadence=None, anchor_date=None, end_date=None, sprint_days=14,
+                       periods=None):
+
+        # Consecutive periods with every employee's time at zero along with the date time each
+        # period stops at and whether that date time is in the period.  Periods are given either
+        # as a list of boundary dates where each period runs from one boundary up to the next, as
+        # a weekly, monthly or sprint cadence starting on the anchor date and running thru the end
+        # date, or as a list of (start date, end date) periods in date order that include their end
+        # date.  A period between boundaries shows the minute before the next boundary as its end
+        # date but stops at the boundary itself so consecutive periods leave no time uncovered.
+        if periods is not None:
+            period_date_times = [self._period_datetime_range(period_start_date, period_end_date)
+                                 for period_start_date, period_end_date in periods]
+
+            for period_number in range(1, len(period_date_times)):
+                if period_date_times[period_number][0] <= period_date_times[period_number - 1][1]:
+                    raise ValueError('Periods must be in date order and must not overlap')
+
+            period_stop_date_times = [end_date_time for start_date_time, end_date_time in period_date_times]
+            stops_included = True
+
+        else:
+            if boundaries is not None:
+                boundary_date_times = [_date_string_to_datetime(boundary, self.business_hours_date_format)
+                                       for boundary in boundaries]
+            elif cadence is not None and anchor_date is not None:
+                anchor_date_time, end_date_time = self._period_datetime_range(anchor_date, end_date)
+                boundary_date_times = periodRollup.cadence_boundaries(cadence, anchor_date_time, end_date_time,
+                                                                      sprint_days)
+            else:
+                raise ValueError('Either period boundaries or a cadence and anchor date must be specified')
+
+            period_date_times = [(boundary_date_times[period_number],
+                                  boundary_date_times[period_number + 1] - timedelta(minutes=1))
+                                 for period_number in range(len(boundary_date_times) - 1)]
+
+            period_stop_date_times = boundary_date_times[1:]
+            stops_included = False
+
+        series = []
+
+        for start_date_time, end_date_time in period_date_times:
+
+            employees = {}
+            for employee_name in self.employee_names:
+                employees[employee_name] = {'planned_work_time': 0, 'unplanned_work_time': 0,
+                                            'vacation_time': 0, 'meeting_time': 0}
+
+            series.append({'start_date_time': start_date_time,
+                           'end_date_time': end_date_time,
+                           'employees': employees})
+
+        return series, period_stop_date_times, stops_included
+
+    def _add_period_task_time(self, series, period_stop_date_times, stops_included):
+
+        # The time of every task is added to the employees of the period it starts in, tasks are
+        # visited once in start date order while walking forward thru the periods.  The time each
+        # task adds comes from its snapshot record so the rollup follows the same rules as
+        # calculate_planned_hours and calculate_unplanned_hours.
+        snapshot = self.task_snapshot()
+
+        period_start_epochs = [taskIndex.datetime_to_epoch(period['start_date_time']) for period in series]
+        period_stop_epochs = [taskIndex.datetime_to_epoch(date_time) for date_time in period_stop_date_times]
+
+        index = self._task_start_date_index()
+
+        period_number = 0
+        low = bisect_left(index.start_epochs, period_start_epochs[0])
+
+        if stops_included:
+            high = bisect_right(index.start_epochs, period_stop_epochs[-1])
+        else:
+            high = bisect_left(index.start_epochs, period_stop_epochs[-1])
+
+        for index_position in range(low, high):
+
+            start_epoch = index.start_epochs[index_position]
+
+            while start_epoch > period_stop_epochs[period_number] or \
+                    (start_epoch == period_stop_epochs[period_number] and not stops_included):
+                period_number = period_number + 1
+
+            # task starts between two of the given periods which no period covers
+            if start_epoch < period_start_epochs[period_number]:
+                continue
+
+            record = snapshot.records[index.positions[index_position]]
+            employees = series[period_number]['employees']
+
+            for time_name, name, seconds in taskCalculations.record_contributions(record):
+
+                employee_name = self._employee_name_for_aggregate(name)
+
+                if employee_name is not None:
+                    employees[employee_name][time_name] = employees[employee_name][time_name] + seconds
+
+    def period_rollup(self, boundaries=None, cadence=None, anchor_date=None, end_date=None, sprint_days=14):
+
+        # Rollup of all planned and unplanned metrics for many consecutive periods in one sweep
+        # of the tasks.  Periods are given either as a list of boundary dates where each period
+        # runs from one boundary up to the next, or as a weekly, monthly or sprint cadence
+        # starting on the anchor date and running thru the end date.
+        series, period_stop_date_times, stops_included = self._period_series(boundaries, cadence, anchor_date,
+                                                                             end_date, sprint_days)
+
+        if len(series) == 0:
+            return series
+
+        self._add_period_task_time(series, period_stop_date_times, stops_included)
+
+        period_start_epochs = [taskIndex.datetime_to_epoch(period['start_date_time']) for period in series]
+        period_stop_epochs = [taskIndex.datetime_to_epoch(date_time) for date_time in period_stop_date_times]
+
+        holiday_calendar_epochs = []
+        for holiday_calendar, number_of_employees in self._holiday_calendar_employees():
+            holiday_calendar_epochs.append(([taskIndex.datetime_to_epoch(date_time)
+                                             for date_time in holiday_calendar.date_times()], number_of_employees))
+
+        for period_number, period in enumerate(series):
+
+            totals = {'planned_work_time': 0, 'unplanned_work_time': 0, 'vacation_time': 0, 'meeting_time': 0}
+
+            for employee_name in period['employees']:
+                for time_name in totals:
+                    totals[time_name] = totals[time_name] + period['employees'][employee_name][time_name]
+                    period['employees'][employee_name][time_name] = \
+                        self.seconds_to_hours(period['employees'][employee_name][time_name])
+
+            # holidays are counted the same way calculate_unplanned_hours counts them, a holiday on a
+            # boundary belongs to the period starting there, but are already hours so unlike the
+            # report totals they are not converted from seconds
+            holiday_hours = 0
+            for holiday_epochs, number_of_employees in holiday_calendar_epochs:
+                number_of_holidays = bisect_left(holiday_epochs, period_stop_epochs[period_number]) - \
+                    bisect_left(holiday_epochs, period_start_epochs[period_number])
+                holiday_hours = holiday_hours + number_of_holidays * 8 * number_of_employees
+
+            period['holiday_hours'] = holiday_hours
+
+            period['planned_hours'] = self.seconds_to_hours(totals['planned_work_time'])
+            period['unplanned_work_hours'] = self.seconds_to_hours(totals['unplanned_work_time'])
+            period['meeting_hours'] = self.seconds_to_hours(totals['meeting_time'])
+            period['vacation_hours'] = self.seconds_to_hours(totals['vacation_time'])
+
+            period['total_unplanned_hours'] = period['unplanned_work_hours'] + period['vacation_hours'] + \
+                period['holiday_hours'] + period['meeting_hours']
+
+            period['percentage_unplanned_to_planned'] = None
+            if period['planned_hours'] != 0:
+                period['percentage_unplanned_to_planned'] = \
+                    (period['total_unplanned_hours'] / period['planned_hours']) * 100.0
+
+            period['percentage_unplanned_to_total'] = None
+            if period['planned_hours'] + period['total_unplanned_hours'] != 0:
+                period['percentage_unplanned_to_total'] = \
+                    (period['total_unplanned_hours'] / (period['planned_hours'] + period['total_unplanned_hours'])) * \
+                    100.0
+
+        return series
+
+    def capacity_matrix(self, periods=None, boundaries=None, cadence=None, anchor_date=None, end_date=None,
+                        sprint_days=14):
+
+        # Calendar, holiday, vacation, meeting and workable hours of every employee in every period
+        # from one sweep of the tasks, with periods given the same ways as period_rollup or as a
+        # list of (start date, end date) periods.  The calendar and holiday hours of all the periods
+        # are worked out together once for each holiday calendar the employees share.
+        series, period_stop_date_times, stops_included = self._period_series(boundaries, cadence, anchor_date,
+                                                                             end_date, sprint_days, periods)
+
+        period_date_times = [(period['start_date_time'], period['end_date_time']) for period in series]
+
+        employee_vacation_hours = dict([(employee_name, []) for employee_name in self.employee_names])
+        employee_meeting_hours = dict([(employee_name, []) for employee_name in self.employee_names])
+        employee_calendars = {}
+
+        if len(series) > 0:
+
+            self._add_period_task_time(series, period_stop_date_times, stops_included)
+
+            for employee_name in self.employee_names:
+                employee_calendars[employee_name] = self.capacity_calendar(period_date_times[0][0],
+                                                                           period_date_times[-1][1],
+                                                                           employee_name)
+
+            for period in series:
+                for employee_name in self.employee_names:
+                    employee_time = period['employees'][employee_name]
+                    employee_vacation_hours[employee_name].append(self.seconds_to_hours(employee_time['vacation_time']))
+                    employee_meeting_hours[employee_name].append(self.seconds_to_hours(employee_time['meeting_time']))
+
+        return capacityCalendar.capacity_matrix(self.employee_names,
+                                                period_date_times,
+                                                employee_calendars,
+                                                employee_vacation_hours,
+                                                employee_meeting_hours)
+
+    def _period_capacity(self, start_date, end_date=None):
+
+        return self._batch_cached(('capacity', start_date, end_date),
+                                  self.capacity_matrix, [(start_date, end_date)])
+
+    def export_period_rollup(self, series, filename, output_format='csv'):
+
+        if output_format == 'csv':
+            periodRollup.write_series_csv(series, filename, self.business_hours_date_format)
+        elif output_format == 'json':
+            periodRollup.write_series_json(series, filename, self.business_hours_date_format)
+        else:
+            raise ValueError('Unknown period rollup output format %s, expected csv or json' % output_format)
+
+
+# built in reports
+reportRegistry.register_report('all planned',
+                               Processor._employee_tasks_report,
+                               inputs=['planned hours', 'employee planned tasks'])
+
+reportRegistry.register_report('all unplanned',
+                               Processor._employee_tasks_report,
+                               inputs=['unplanned hours', 'employee unplanned tasks'])
+
+reportRegistry.register_report('task errors',
+                               Processor._task_errors_report,
+                               inputs=['planned hours', 'unplanned hours', 'period issue keys'])
+
+reportRegistry.register_report('work logged',
+                               Processor._work_logged_report,
+                               inputs=['work logged', 'capacity'])
+
+reportRegistry.register_report('dept breakdown',
+                               Processor._department_breakdown_report,
+                               inputs=['planned hours', 'unplanned hours', 'department breakdown'])
+
+reportRegistry.register_report('employee hours summary',
+                               Processor._employee_hours_summary_report,
+                               inputs=['planned hours', 'unplanned hours'])
+
+reportRegistry.register_report('planned employees',
+                               Processor._planned_employees_report,
+                               inputs=['planned hours', 'unplanned hours'])
+
+reportRegistry.register_report('work statistics',
+                               Processor._work_statistics_report,
+                               inputs=['planned hours', 'unplanned hours', 'year calendar hours',
+                                       'period calendar hours', 'holiday hours'])
+
+reportRegistry.register_report('input file statistics',
+                               Processor._input_file_statistics_report)
+
+reportRegistry.register_report('all tasks csv dump',
+                               Processor._all_tasks_dump_report,
+                               outputs=['file'],
+                               text_report=False)
+
+reportRegistry.register_report('all tasks csv dump in period',
+                               Processor._all_tasks_dump_report,
+                               inputs=['period issue keys'],
+                               outputs=['file'],
+                               text_report=False)
@@ -0,0 +1,325 @@
+# coding=utf-8
+"""
+Side effect free planned and unplanned hour calculations over a snapshot of
+the loaded tasks so a period can be calculated without touching the
+processor employee totals or task problems
+"""
+__author__ = 'Scott Davis'
+
+# hours recorded per holiday for every employee
+_HOLIDAY_HOURS_PER_DAY = 8
+
+_NO_TIME_PROBLEM = 'Error: no time recorded by %s'
+_OUTSIDE_WORK_HOURS_PROBLEM = 'Info: recorded time outside work hours, ignored'
+
+
+class TaskSnapshot:
+
+    def __init__(self, processor, index, holiday_calendars=None):
+
+        # everything a calculation needs about a task is resolved once here so the
+        # calculations never call back into the processor or read the task dictionaries
+        self.index = index
+        self.issue_keys = index.issue_keys
+        self.employee_names = list(processor.employee_names)
+        self.seconds_in_hour = processor.seconds_in_hour
+
+        # each holiday calendar with the number of employees taking its holidays
+        if holiday_calendars is None:
+            holiday_calendars = []
+
+        self.holiday_calendars = holiday_calendars
+
+        self.records = []
+
+        meeting_department_code = processor.jira_unplanned_task_departments['meeting']
+
+        for issue_key in self.issue_keys:
+
+            task = processor.tasks[issue_key]
+
+            assignee = processor._normalize_name(task['Assignee'])
+            reporter = processor._normalize_name(task['Reporter'])
+
+            in_schedule, schedule_problem = processor._task_schedule_status(issue_key)
+
+            meeting = meeting_department_code in issue_key
+
+            # a meeting is charged the time it takes up that the assignee's earlier meetings do not
+            meeting_time = 0
+            if meeting:
+                meeting_time = processor._meeting_time_charged(issue_key)
+
+            self.records.append({'issue_key': issue_key,
+                                 'assignee': assignee,
+                                 'reporter': reporter,
+                                 'assignee_is_employee': processor.is_employee_name_in_employee_info(assignee),
+                                 'reporter_is_employee': processor.is_employee_name_in_employee_info(reporter),
+                                 'planned_dept': processor._is_planned_task_dept(issue_key),
+                                 'unplanned_dept': processor._is_unplanned_task_dept(issue_key),
+                                 'in_schedule': in_schedule,
+                                 'schedule_problem': schedule_problem,
+                                 'unplanned': task['Unplanned'],
+                                 'vacation': processor._is_vacation(task['Issue Type']),
+                                 'meeting': meeting,
+                                 'during_working_hours':
+                                     processor._is_date_time_during_working_hours(task['Start Date']),
+                                 'time_charged': processor._task_time_charged(issue_key),
+                                 'meeting_time': meeting_time})
+
+    def records_in_period(self, start_date_time, end_date_time):
+
+        records = self.records
+        return [records[position] for position in self.index.positions_in_period(start_date_time, end_date_time)]
+
+    def seconds_to_hours(self, time_value):
+        return float(time_value) / float(self.seconds_in_hour)
+
+    def holiday_hours(self, start_date_time, end_date_time):
+
+        holiday_hours = 0
+
+        for holiday_calendar, number_of_employees in self.holiday_calendars:
+            holiday_hours = holiday_hours + holiday_calendar.number_of_holidays(start_date_time, end_date_time) * \
+                _HOLIDAY_HOURS_PER_DAY * number_of_employees
+
+        return holiday_hours
+
+
+def record_contributions(record):
+
+    # Employee time a task record adds to the period it starts in as (time name, employee name,
+    # seconds), following the same rules as planned_hours and unplanned_hours but without any
+    # problems.  Used to roll many periods up in a single sweep of the tasks.
+    if record['in_schedule']:
+
+        if record['planned_dept'] and record['assignee_is_employee']:
+            return [('planned_work_time', record['assignee'], record['time_charged'])]
+
+        return []
+
+    if not record['unplanned_dept'] or not (record['unplanned'] or record['vacation'] or record['meeting']):
+        return []
+
+    if record['vacation']:
+
+        # if vacation entry the reporter is the assignee to vacation
+        if record['reporter_is_employee']:
+            return [('vacation_time', record['reporter'], record['time_charged'])]
+
+        return []
+
+    if not record['assignee_is_employee']:
+        return []
+
+    if not record['meeting']:
+        return [('unplanned_work_time', record['assignee'], record['time_charged'])]
+
+    # do not add a meeting that did not start during workday hours
+    if record['during_working_hours']:
+        return [('meeting_time', record['assignee'], record['meeting_time'])]
+
+    return []
+
+
+def _add_seconds(employee_seconds, employee_name, seconds):
+
+    if employee_name in employee_seconds:
+        employee_seconds[employee_name] = employee_seconds[employee_name] + seconds
+    else:
+        employee_seconds[employee_name] = seconds
+
+
+def planned_hours(snapshot, start_date_time, end_date_time, employee_name=None):
+
+    # Planned time is charged to the assignee of every task in a planned department that is
+    # found in a schedule.  When an employee name is given only that employees tasks are looked at.
+    records = snapshot.records_in_period(start_date_time, end_date_time)
+
+    if employee_name is not None:
+        records = [record for record in records if record['assignee'] == employee_name]
+
+    return _planned_hours_for_records(snapshot, records)
+
+
+def planned_hours_by_employee(snapshot, start_date_time, end_date_time, employee_names):
+
+    # planned hours of each employee from a single pass over the tasks in the period, the same
+    # as calling planned_hours for each employee name
+    employee_records = dict([(employee_name, []) for employee_name in employee_names])
+
+    for record in snapshot.records_in_period(start_date_time, end_date_time):
+        if record['assignee'] in employee_records:
+            employee_records[record['assignee']].append(record)
+
+    results = {}
+    for employee_name in employee_names:
+        results[employee_name] = _planned_hours_for_records(snapshot, employee_records[employee_name])
+
+    return results
+
+
+def _planned_hours_for_records(snapshot, records):
+
+    employee_planned_seconds = {}
+    planned_employees = []
+    issue_keys = []
+    problems = []
+    total_planned_seconds = 0
+
+    for record in records:
+
+        if not record['planned_dept']:
+            continue
+
+        assignee = record['assignee']
+
+        if record['schedule_problem'] is not None:
+            problems.append((record['issue_key'], record['schedule_problem']))
+
+        if not record['in_schedule'] or not record['assignee_is_employee']:
+            continue
+
+        if assignee not in planned_employees:
+            planned_employees.append(assignee)
+
+        time_spent = record['time_charged']
+
+        if time_spent > 0:
+            _add_seconds(employee_planned_seconds, assignee, time_spent)
+        else:
+            problems.append((record['issue_key'], _NO_TIME_PROBLEM % assignee))
+
+        issue_keys.append(record['issue_key'])
+        total_planned_seconds = total_planned_seconds + time_spent
+
+    return {'employee_planned_seconds': employee_planned_seconds,
+            'planned_employees': planned_employees,
+            'total_planned_seconds': total_planned_seconds,
+            'total_planned_hours': snapshot.seconds_to_hours(total_planned_seconds),
+            'issue_keys': issue_keys,
+            'problems': problems}
+
+
+def unplanned_hours(snapshot, start_date_time, end_date_time, employee_name=None):
+
+    # Unplanned time is every task in an unplanned department that is not in a schedule and is
+    # explicitly unplanned, a vacation or a meeting.  Vacation time belongs to the reporter of
+    # the vacation task and meetings outside of working hours are ignored.  Meetings only count
+    # the working time they do not share with the assignee's other meetings.  When an employee
+    # name is given only tasks assigned to or reported by that employee are looked at.
+    records = snapshot.records_in_period(start_date_time, end_date_time)
+
+    if employee_name is not None:
+        records = [record for record in records
+                   if record['assignee'] == employee_name or record['reporter'] == employee_name]
+
+    return _unplanned_hours_for_records(snapshot, records, start_date_time, end_date_time, employee_name)
+
+
+def unplanned_hours_by_employee(snapshot, start_date_time, end_date_time, employee_names):
+
+    # unplanned hours of each employee from a single pass over the tasks in the period, the same
+    # as calling unplanned_hours for each employee name
+    employee_records = dict([(employee_name, []) for employee_name in employee_names])
+
+    for record in snapshot.records_in_period(start_date_time, end_date_time):
+
+        if record['assignee'] in employee_records:
+            employee_records[record['assignee']].append(record)
+
+        if record['reporter'] != record['assignee'] and record['reporter'] in employee_records:
+            employee_records[record['reporter']].append(record)
+
+    results = {}
+    for employee_name in employee_names:
+        results[employee_name] = _unplanned_hours_for_records(snapshot,
+                                                              employee_records[employee_name],
+                                                              start_date_time,
+                                                              end_date_time,
+                                                              employee_name)
+
+    return results
+
+
+def _unplanned_hours_for_records(snapshot, records, start_date_time, end_date_time, employee_name):
+
+    employee_unplanned_seconds = {}
+    employee_meeting_seconds = {}
+    employee_vacation_seconds = {}
+    issue_keys = []
+    problems = []
+    total_unplanned_work_seconds = 0
+    total_meeting_seconds = 0
+    total_vacation_seconds = 0
+
+    for record in records:
+
+        if not record['unplanned_dept']:
+            continue
+
+        assignee = record['assignee']
+
+        if record['schedule_problem'] is not None:
+            problems.append((record['issue_key'], record['schedule_problem']))
+
+        if record['in_schedule']:
+            continue
+
+        if not (record['unplanned'] or record['vacation'] or record['meeting']):
+            continue
+
+        time_spent = record['time_charged']
+
+        if not record['vacation']:
+
+            if record['assignee_is_employee']:
+
+                if not record['meeting']:
+                    _add_seconds(employee_unplanned_seconds, assignee, time_spent)
+                    total_unplanned_work_seconds = total_unplanned_work_seconds + time_spent
+
+                elif record['during_working_hours']:
+                    _add_seconds(employee_meeting_seconds, assignee, record['meeting_time'])
+                    total_meeting_seconds = total_meeting_seconds + record['meeting_time']
+
+                else:
+                    problems.append((record['issue_key'], _OUTSIDE_WORK_HOURS_PROBLEM))
+
+        else:
+
+            # if vacation entry the reporter is the assignee to vacation
+            assignee = record['reporter']
+
+            if record['reporter_is_employee']:
+                _add_seconds(employee_vacation_seconds, assignee, time_spent)
+                total_vacation_seconds = total_vacation_seconds + time_spent
+
+        if time_spent == 0:
+            problems.append((record['issue_key'], _NO_TIME_PROBLEM % assignee))
+
+        if employee_name is not None and assignee == employee_name:
+            issue_keys.append(record['issue_key'])
+
+    holiday_hours = snapshot.holiday_hours(start_date_time, end_date_time)
+
+    # holiday hours are converted the same way calculate_unplanned_hours always has
+    total_meeting_hours = snapshot.seconds_to_hours(total_meeting_seconds)
+    total_vacation_hours = snapshot.seconds_to_hours(total_vacation_seconds)
+    total_holiday_hours = snapshot.seconds_to_hours(holiday_hours)
+
+    total_unplanned_hours = snapshot.seconds_to_hours(total_unplanned_work_seconds) + total_vacation_hours + \
+        total_holiday_hours + total_meeting_hours
+
+    return {'employee_unplanned_seconds': employee_unplanned_seconds,
+            'employee_meeting_seconds': employee_meeting_seconds,
+            'employee_vacation_seconds': employee_vacation_seconds,
+            'total_unplanned_work_seconds': total_unplanned_work_seconds,
+            'total_meeting_seconds': total_meeting_seconds,
+            'total_vacation_seconds': total_vacation_seconds,
+            'total_meeting_hours': total_meeting_hours,
+            'total_vacation_hours': total_vacation_hours,
+            'total_holiday_hours': total_holiday_hours,
+            'total_unplanned_hours': total_unplanned_hours,
+            'issue_keys': issue_keys,
+            'problems': problems}
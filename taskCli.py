@@ -0,0 +1,391 @@
+# coding=utf-8
+"""
+Command line interface to the task analysis processor with sync, report,
+export, serve, bench and profile commands and the Jira, Smartsheet and
+employee configuration loaded from a JSON file
+"""
+__author__ = 'Scott Davis'
+
+import argparse
+import copy
+import json
+import os
+import subprocess
+import sys
+import time
+
+# configuration keys are Processor arguments plus the snapshot file and the default reports
+_processor_config_keys = ['employee_info',
+                          'database_filename',
+                          'start_date',
+                          'end_date',
+                          'calendar_file_wildcard',
+                          'company_name',
+                          'jira_cloud_url',
+                          'jira_login_username',
+                          'jira_login_password',
+                          'jira_planned_task_departments',
+                          'jira_unplanned_task_departments',
+                          'jira_unplanned_activity_field_name',
+                          'jira_epic_field_name',
+                          'smartsheet_projects',
+                          'smartsheet_access_token',
+                          'update_smartsheet_progress',
+                          'holidays_file',
+                          'holiday_regions',
+                          'calendar_workers',
+                          'jira_vacation_issue_type_name',
+                          'mail_server_domain_names',
+                          'use_columnar_store',
+                          'aggregation_backend',
+                          'verbose']
+
+_config_keys = _processor_config_keys + ['snapshot_filename', 'reports']
+
+# only needed to fetch tasks from Jira and Smartsheet
+_online_config_keys = ['calendar_file_wildcard',
+                       'calendar_workers',
+                       'jira_cloud_url',
+                       'jira_login_username',
+                       'jira_login_password',
+                       'smartsheet_projects',
+                       'smartsheet_access_token',
+                       'update_smartsheet_progress']
+
+_required_config_keys = ['employee_info',
+                         'start_date',
+                         'jira_planned_task_departments',
+                         'jira_unplanned_task_departments']
+
+# third party modules importing taskAnalysis must not import, they are only needed to fetch tasks
+_deferred_modules = ['jira', 'smartsheet', 'BusinessHours', 'glob2', 'dateutil']
+
+_IMPORT_PROBE = 'import sys, time\n' \
+                'start_time = time.perf_counter()\n' \
+                'import taskAnalysis\n' \
+                'print(time.perf_counter() - start_time, *[module for module in %r if module in sys.modules])\n'
+
+_default_reports = [{'report_type': 'all unplanned'},
+                    {'report_type': 'all planned'},
+                    {'report_type': 'planned employees'},
+                    {'report_type': 'work logged'},
+                    {'report_type': 'dept breakdown'},
+                    {'report_type': 'task errors'},
+                    {'report_type': 'work statistics'}]
+
+
+def load_config(filename):
+
+    with open(file=filename, mode='r') as config_file:
+        config = json.load(config_file)
+
+    unknown_keys = [key for key in config if key not in _config_keys]
+    if len(unknown_keys) > 0:
+        raise ValueError('Unknown configuration key(s) %s in %s' % (', '.join(unknown_keys), filename))
+
+    missing_keys = [key for key in _required_config_keys if key not in config]
+    if len(missing_keys) > 0:
+        raise ValueError('Missing configuration key(s) %s in %s' % (', '.join(missing_keys), filename))
+
+    config.setdefault('database_filename', 'tasks.sqlite')
+    config.setdefault('snapshot_filename', 'tasks.snapshot')
+    config.setdefault('end_date', None)
+    config.setdefault('reports', _default_reports)
+
+    return config
+
+
+def _processor_arguments(config, online):
+
+    # every processor gets its own copy since a processor adds to the employee aliases
+    processor_arguments = {}
+
+    for key in _processor_config_keys:
+        if key in config and (online or key not in _online_config_keys):
+            processor_arguments[key] = copy.deepcopy(config[key])
+
+    return processor_arguments
+
+
+def offline_processor(config):
+
+    # attach to the tasks database through the snapshot without contacting Jira or Smartsheet
+    import taskAnalysis
+
+    processor_arguments = _processor_arguments(config, online=False)
+
+    return taskAnalysis.Processor.from_snapshot(config['snapshot_filename'], **processor_arguments)
+
+
+def online_processor(config):
+
+    import taskAnalysis
+
+    if config.get('jira_cloud_url') is None:
+        raise ValueError('jira_cloud_url is required in the configuration to sync tasks')
+
+    return taskAnalysis.Processor(sync_on_start=False, **_processor_arguments(config, online=True))
+
+
+def _report_specs(config, arguments):
+
+    import reportBatch
+
+    if arguments.reports is not None:
+        return reportBatch.load_report_specs(arguments.reports, arguments.start_date, arguments.end_date)
+
+    if arguments.report is not None:
+        report_specs = [{'report_type': report_type} for report_type in arguments.report]
+    else:
+        report_specs = config['reports']
+
+    return [reportBatch.normalize_report_spec(spec, arguments.start_date, arguments.end_date)
+            for spec in report_specs]
+
+
+def _period_arguments(config, arguments):
+
+    if arguments.start_date is None:
+        arguments.start_date = config['start_date']
+
+    if arguments.end_date is None:
+        arguments.end_date = config['end_date']
+
+
+def sync_command(config, arguments):
+
+    import taskSync
+
+    daemon = taskSync.SyncDaemon(online_processor(config),
+                                 interval_seconds=arguments.interval,
+                                 snapshot_filename=config['snapshot_filename'],
+                                 verbose=True)
+
+    if arguments.daemon:
+        daemon.run()
+        return 0
+
+    sync_status = daemon.sync_once()
+    print('Synced %d task(s) into %s in %1.1f seconds' % (sync_status['rows_changed'],
+                                                           config['database_filename'],
+                                                           sync_status['duration_seconds']))
+    return 0
+
+
+def report_command(config, arguments):
+
+    _period_arguments(config, arguments)
+
+    processor = offline_processor(config)
+    processor.generate_reports(_report_specs(config, arguments), print_summary=not arguments.no_summary)
+
+    return 0
+
+
+def export_command(config, arguments):
+
+    _period_arguments(config, arguments)
+
+    processor = offline_processor(config)
+
+    issue_keys = None
+    if arguments.in_period:
+        issue_keys = processor._issue_keys_in_period(arguments.start_date, arguments.end_date)
+
+    number_of_tasks = processor.export_tasks(arguments.filename,
+                                             output_format=arguments.format,
+                                             issue_keys=issue_keys,
+                                             from_database=arguments.from_database)
+
+    print('Exported %s task(s) to %s' % (number_of_tasks, arguments.filename))
+    return 0
+
+
+def serve_command(config, arguments):
+
+    import reportService
+
+    reportService.ReportService(lambda: offline_processor(config),
+                                refresh_seconds=arguments.refresh_interval).serve_forever(host=arguments.host,
+                                                                                          port=arguments.port)
+    return 0
+
+
+def import_time():
+
+    # taskAnalysis is imported in a new interpreter since it may already be imported in this one,
+    # returns the seconds taken and the deferred modules that were imported along with it
+    completed = subprocess.run([sys.executable, '-c', _IMPORT_PROBE % _deferred_modules],
+                               cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.PIPE,
+                               universal_newlines=True,
+                               check=True)
+
+    probe_output = completed.stdout.split()
+
+    return float(probe_output[0]), probe_output[1:]
+
+
+def bench_command(config, arguments):
+
+    # Time importing taskAnalysis, creating a processor, loading the task model and each report,
+    # with reports written to memory.  Fails when importing taskAnalysis takes longer than
+    # --max-import-seconds or imports a module that is only needed to fetch tasks.
+    import taskAnalysis
+
+    _period_arguments(config, arguments)
+
+    timings = []
+    failures = []
+
+    seconds, imported_modules = import_time()
+    timings.append(('import taskAnalysis', seconds))
+
+    if seconds > arguments.max_import_seconds:
+        failures.append('importing taskAnalysis took %1.3f seconds, more than %1.3f' %
+                        (seconds, arguments.max_import_seconds))
+
+    if len(imported_modules) > 0:
+        failures.append('importing taskAnalysis imported %s' % ', '.join(imported_modules))
+
+    start_time = time.perf_counter()
+    taskAnalysis.Processor(**_processor_arguments(config, online=False))
+    timings.append(('create processor', time.perf_counter() - start_time))
+
+    start_time = time.perf_counter()
+    processor = offline_processor(config)
+    timings.append(('load %d task(s)' % len(processor.tasks), time.perf_counter() - start_time))
+
+    for spec in _report_specs(config, arguments):
+
+        report_times = []
+        for _ in range(arguments.repeat):
+            start_time = time.perf_counter()
+            processor.generate_report(spec['report_type'], spec['start_date'], spec['end_date'], output='memory')
+            report_times.append(time.perf_counter() - start_time)
+
+        timings.append(('report %s' % spec['report_type'], min(report_times)))
+
+    print()
+    print('===================================')
+    print('Benchmark (best of %d for reports)' % arguments.repeat)
+    for stage_name, seconds in timings:
+        print('%s: %1.3f seconds' % (stage_name, seconds))
+    print('===================================')
+
+    for failure in failures:
+        print('FAILED: %s' % failure)
+
+    if len(failures) > 0:
+        return 1
+
+    return 0
+
+
+def profile_command(config, arguments):
+
+    import cProfile
+    import pstats
+
+    _period_arguments(config, arguments)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    processor = offline_processor(config)
+    processor.generate_reports(_report_specs(config, arguments), print_summary=False)
+
+    profiler.disable()
+
+    if arguments.output is not None:
+        profiler.dump_stats(arguments.output)
+
+    pstats.Stats(profiler, stream=sys.stdout).sort_stats(arguments.sort).print_stats(arguments.limit)
+
+    return 0
+
+
+def _add_period_arguments(command_parser):
+
+    command_parser.add_argument('--start-date', help='start of the period, mm/dd/YYYY HH:MM, defaults to the config')
+    command_parser.add_argument('--end-date', help='end of the period, mm/dd/YYYY HH:MM, defaults to the config')
+
+
+def _add_report_arguments(command_parser):
+
+    _add_period_arguments(command_parser)
+    command_parser.add_argument('--report',
+                                action='append',
+                                help='report type to run, may be given more than once, defaults to the config reports')
+    command_parser.add_argument('--reports',
+                                help='JSON file with a list of report specs (report_type, start_date, end_date, '
+                                     'output, filename)')
+
+
+def argument_parser():
+
+    parser = argparse.ArgumentParser(description='Planned and unplanned task analysis')
+    parser.add_argument('--config',
+                        default='taskAnalysis.json',
+                        help='JSON configuration file of Processor arguments (default taskAnalysis.json)')
+
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    sync_parser = commands.add_parser('sync', help='pull tasks from Jira and Smartsheet into the tasks database')
+    sync_parser.add_argument('--daemon', action='store_true', help='keep syncing on a schedule')
+    sync_parser.add_argument('--interval', type=float, default=900, help='seconds between syncs of the daemon')
+    sync_parser.set_defaults(function=sync_command)
+
+    report_parser = commands.add_parser('report', help='run reports against the tasks database')
+    _add_report_arguments(report_parser)
+    report_parser.add_argument('--no-summary',
+                               action='store_true',
+                               help='do not print the time spent in each stage of the report run')
+    report_parser.set_defaults(function=report_command)
+
+    export_parser = commands.add_parser('export', help='export tasks to a csv, tsv or jsonl file')
+    export_parser.add_argument('filename')
+    _add_period_arguments(export_parser)
+    export_parser.add_argument('--format', choices=['csv', 'tsv', 'jsonl'], help='defaults to the file extension')
+    export_parser.add_argument('--in-period', action='store_true', help='only tasks starting in the period')
+    export_parser.add_argument('--from-database',
+                               action='store_true',
+                               help='stream every task from the tasks database without loading them')
+    export_parser.set_defaults(function=export_command)
+
+    serve_parser = commands.add_parser('serve', help='answer report requests as JSON over HTTP')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8080)
+    serve_parser.add_argument('--refresh-interval', type=float, help='seconds between reloads of the tasks')
+    serve_parser.set_defaults(function=serve_command)
+
+    bench_parser = commands.add_parser('bench', help='time loading the tasks and running each report')
+    _add_report_arguments(bench_parser)
+    bench_parser.add_argument('--repeat', type=int, default=3, help='runs of each report, the best is shown')
+    bench_parser.add_argument('--max-import-seconds',
+                              type=float,
+                              default=1.0,
+                              help='fail when importing taskAnalysis takes longer (default 1 second)')
+    bench_parser.set_defaults(function=bench_command)
+
+    profile_parser = commands.add_parser('profile', help='profile loading the tasks and running the reports')
+    _add_report_arguments(profile_parser)
+    profile_parser.add_argument('--sort', default='cumulative', help='pstats sort key (default cumulative)')
+    profile_parser.add_argument('--limit', type=int, default=30, help='number of functions shown')
+    profile_parser.add_argument('--output', help='file to save the profile statistics to')
+    profile_parser.set_defaults(function=profile_command)
+
+    return parser
+
+
+def main(argv=None):
+
+    arguments = argument_parser().parse_args(argv)
+    config = load_config(arguments.config)
+
+    return arguments.function(config, arguments)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# coding=utf-8
+"""
+Columnar task store backed by NumPy arrays so the planned, unplanned, vacation
+and meeting hour rollups can be calculated with vectorized masks instead of
+looping over the task dictionaries
+"""
+__author__ = 'Scott Davis'
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from taskIndex import datetime_to_epoch
+
+# task flag bits
+PLANNED_DEPT = 0x01
+UNPLANNED_DEPT = 0x02
+IN_SCHEDULE = 0x04
+UNPLANNED = 0x08
+VACATION = 0x10
+MEETING = 0x20
+DURING_WORKING_HOURS = 0x40
+
+NOT_AN_EMPLOYEE = -1
+
+
+def is_available():
+    return numpy is not None
+
+
+class ColumnarTaskStore:
+
+    def __init__(self, processor, index):
+
+        if numpy is None:
+            raise ImportError('numpy is required to use the columnar task store')
+
+        self.index = index
+        self.issue_keys = index.issue_keys
+        self.employee_names = list(processor.employee_names)
+
+        employee_codes = {}
+        for code, employee_name in enumerate(self.employee_names):
+            employee_codes[employee_name] = code
+
+        # aliases count as the employee they are an alias of
+        for alias_name, employee_name in processor.employee_aliases.items():
+            if employee_name in employee_codes:
+                employee_codes[alias_name] = employee_codes[employee_name]
+
+        # an employee counts toward every department named in their department description
+        self.departments = list(processor.jira_unplanned_task_departments.keys())
+        self.department_membership = numpy.zeros((len(self.departments), len(self.employee_names)))
+
+        for department_code, department in enumerate(self.departments):
+            for employee_code, employee_name in enumerate(self.employee_names):
+                if department in processor.employee_info[employee_name]['dept']:
+                    self.department_membership[department_code, employee_code] = 1
+
+        number_of_tasks = len(self.issue_keys)
+
+        self.start_epoch = numpy.full(number_of_tasks, numpy.nan)
+        self.original_estimate = numpy.zeros(number_of_tasks)
+        self.time_spent = numpy.zeros(number_of_tasks)
+        self.meeting_time = numpy.zeros(number_of_tasks)
+        self.assignee_code = numpy.full(number_of_tasks, NOT_AN_EMPLOYEE, dtype=numpy.int32)
+        self.reporter_code = numpy.full(number_of_tasks, NOT_AN_EMPLOYEE, dtype=numpy.int32)
+        self.flags = numpy.zeros(number_of_tasks, dtype=numpy.uint8)
+
+        # normalized names and schedule problems are only needed for the few tasks with errors
+        self.assignees = []
+        self.reporters = []
+        self.schedule_problems = []
+
+        for position, issue_key in enumerate(self.issue_keys):
+
+            task = processor.tasks[issue_key]
+
+            assignee = processor._normalize_name(task['Assignee'])
+            reporter = processor._normalize_name(task['Reporter'])
+            self.assignees.append(assignee)
+            self.reporters.append(reporter)
+
+            if processor.is_employee_name_in_employee_info(assignee) and assignee in employee_codes:
+                self.assignee_code[position] = employee_codes[assignee]
+
+            if processor.is_employee_name_in_employee_info(reporter) and reporter in employee_codes:
+                self.reporter_code[position] = employee_codes[reporter]
+
+            start_date_time = processor._task_start_date_time(issue_key)
+            if start_date_time is not None:
+                self.start_epoch[position] = datetime_to_epoch(start_date_time)
+
+            if task['Original Estimate'] is not None:
+                self.original_estimate[position] = task['Original Estimate']
+
+            if task['Time Spent'] is not None:
+                self.time_spent[position] = task['Time Spent']
+
+            flags = 0
+
+            if processor._is_planned_task_dept(issue_key):
+                flags |= PLANNED_DEPT
+
+            if processor._is_unplanned_task_dept(issue_key):
+                flags |= UNPLANNED_DEPT
+
+            in_schedule, schedule_problem = processor._task_schedule_status(issue_key)
+            self.schedule_problems.append(schedule_problem)
+
+            if in_schedule:
+                flags |= IN_SCHEDULE
+
+            if task['Unplanned']:
+                flags |= UNPLANNED
+
+            if processor._is_vacation(task['Issue Type']):
+                flags |= VACATION
+
+            if processor.jira_unplanned_task_departments['meeting'] in issue_key:
+                flags |= MEETING
+
+                # a meeting is charged the time it takes up that the assignee's earlier meetings do not
+                self.meeting_time[position] = processor._meeting_time_charged(issue_key)
+
+            if processor._is_date_time_during_working_hours(task['Start Date']):
+                flags |= DURING_WORKING_HOURS
+
+            self.flags[position] = flags
+
+        # time charged to a task is the larger of the time spent and the original estimate
+        self.effective_time = numpy.maximum(self.time_spent, self.original_estimate)
+
+    def _positions_in_period(self, start_date_time, end_date_time):
+
+        return numpy.asarray(self.index.positions_in_period(start_date_time, end_date_time), dtype=numpy.intp)
+
+    def _has_flags(self, positions, flag):
+
+        return (self.flags[positions] & flag) == flag
+
+    def _sum_by_employee(self, codes, times):
+
+        return numpy.bincount(codes, weights=times, minlength=len(self.employee_names))
+
+    def planned_hours(self, start_date_time, end_date_time):
+
+        positions = self._positions_in_period(start_date_time, end_date_time)
+
+        planned_dept = self._has_flags(positions, PLANNED_DEPT)
+
+        # schedule problems are recorded for every task looked at in the period
+        problem_positions = positions[planned_dept]
+
+        planned = planned_dept & self._has_flags(positions, IN_SCHEDULE) & \
+            (self.assignee_code[positions] != NOT_AN_EMPLOYEE)
+
+        planned_positions = positions[planned]
+        codes = self.assignee_code[planned_positions]
+        times = self.effective_time[planned_positions]
+
+        working = times > 0
+
+        result = {'employee_planned_seconds': self._sum_by_employee(codes[working], times[working]),
+                  'planned_employee_codes': numpy.unique(codes),
+                  'total_planned_seconds': times.sum(),
+                  'schedule_problem_positions': problem_positions,
+                  'no_time_positions': planned_positions[~working],
+                  'no_time_names': [self.assignees[position] for position in planned_positions[~working]]}
+
+        return result
+
+    def unplanned_hours(self, start_date_time, end_date_time):
+
+        positions = self._positions_in_period(start_date_time, end_date_time)
+
+        unplanned_dept = self._has_flags(positions, UNPLANNED_DEPT)
+        problem_positions = positions[unplanned_dept]
+
+        flags = self.flags[positions]
+
+        # only tasks that are not in a schedule and are unplanned, a vacation or a meeting count
+        candidate = unplanned_dept & ((flags & IN_SCHEDULE) == 0) & ((flags & (UNPLANNED | VACATION | MEETING)) != 0)
+
+        positions = positions[candidate]
+        flags = flags[candidate]
+        times = self.effective_time[positions]
+        meeting_times = self.meeting_time[positions]
+        assignee_codes = self.assignee_code[positions]
+        reporter_codes = self.reporter_code[positions]
+
+        vacation = (flags & VACATION) != 0
+        meeting = ((flags & MEETING) != 0) & ~vacation
+        work = ~vacation & ~meeting
+
+        employee_task = assignee_codes != NOT_AN_EMPLOYEE
+
+        work_mask = work & employee_task
+        meeting_mask = meeting & employee_task & ((flags & DURING_WORKING_HOURS) != 0)
+        outside_hours_mask = meeting & employee_task & ((flags & DURING_WORKING_HOURS) == 0)
+        vacation_mask = vacation & (reporter_codes != NOT_AN_EMPLOYEE)
+
+        no_time = times == 0
+
+        no_time_names = []
+        for position, is_vacation in zip(positions[no_time], vacation[no_time]):
+            if is_vacation:
+                no_time_names.append(self.reporters[position])
+            else:
+                no_time_names.append(self.assignees[position])
+
+        result = {'employee_unplanned_seconds': self._sum_by_employee(assignee_codes[work_mask], times[work_mask]),
+                  'employee_meeting_seconds': self._sum_by_employee(assignee_codes[meeting_mask],
+                                                                    meeting_times[meeting_mask]),
+                  'employee_vacation_seconds': self._sum_by_employee(reporter_codes[vacation_mask],
+                                                                     times[vacation_mask]),
+                  'total_unplanned_seconds': times[work_mask].sum(),
+                  'total_meeting_seconds': meeting_times[meeting_mask].sum(),
+                  'total_vacation_seconds': times[vacation_mask].sum(),
+                  'schedule_problem_positions': problem_positions,
+                  'outside_working_hours_positions': positions[outside_hours_mask],
+                  'no_time_positions': positions[no_time],
+                  'no_time_names': no_time_names}
+
+        return result
+
+    def department_breakdown(self, employee_seconds):
+
+        department_seconds = self.department_membership.dot(employee_seconds)
+
+        breakdown = {}
+        for department_code, department in enumerate(self.departments):
+            breakdown[department] = float(department_seconds[department_code])
+
+        return breakdown
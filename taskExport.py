@@ -0,0 +1,215 @@
+# coding=utf-8
+"""
+Compiled task row formatters and streaming exporters that write the tasks
+as CSV, tab separated or JSON Lines either from the tasks in memory or
+straight from a cursor over the tasks database
+"""
+__author__ = 'Scott Davis'
+
+import csv
+import json
+import sqlite3
+from operator import itemgetter
+
+export_formats = ['csv', 'tsv', 'jsonl']
+
+_delimiters = {'csv': ',', 'tsv': '\t'}
+
+_file_extensions = {'.tsv': 'tsv', '.tab': 'tsv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+# exports are written through a large buffer instead of a write per row
+_BUFFER_SIZE = 1024 * 1024
+
+_DATE_FORMAT = '%m/%d/%Y %H:%M'
+
+# columns that hold more than one value per task are never exported
+_unexported_columns = ['Work Log']
+
+
+def format_for_filename(filename):
+
+    for extension in _file_extensions:
+        if filename.lower().endswith(extension):
+            return _file_extensions[extension]
+
+    return 'csv'
+
+
+def database_column_name(column_name):
+    return column_name.lower().replace(' ', '_')
+
+
+def _as_text(value):
+    return value
+
+
+def _epic_text(value):
+    if value is None:
+        return 'None'
+    return value
+
+
+def _unplanned_from_database(value):
+    # the database stores unplanned as 1 or 0
+    if value is None:
+        return None
+    return bool(value)
+
+
+def _date_from_memory(value):
+    if value is None:
+        return ''
+    return value.strftime(_DATE_FORMAT)
+
+
+def _date_from_database(value):
+    # the database already stores dates formatted as mm/dd/YYYY HH:MM
+    if value is None:
+        return ''
+    return value
+
+
+class TaskRowFormatter:
+
+    def __init__(self,
+                 task_output_format,
+                 date_fields,
+                 time_fields,
+                 normalize_name,
+                 seconds_in_hour,
+                 ignore_fields=(),
+                 source='memory'):
+
+        # Every decision about how a column is output is made here once so formatting a row is
+        # only a getter and a formatter call per column.  In memory rows are (issue key, task)
+        # pairs and database rows are tuples in the order of database_columns.
+        if source not in ['memory', 'database']:
+            raise ValueError('Unknown task row source %s, expected memory or database' % source)
+
+        self.source = source
+        self.column_names = []
+        self.database_columns = []
+        self._columns = []
+
+        seconds_in_hour = float(seconds_in_hour)
+
+        # names repeat across many tasks so they are only normalized once
+        normalized_names = {}
+
+        def normalized_name(value):
+            if value not in normalized_names:
+                normalized_names[value] = normalize_name(value)
+            return normalized_names[value]
+
+        def hours(value):
+            if value is None:
+                return '0.00'
+            return '%1.2f' % (float(value) / seconds_in_hour)
+
+        # the issue key always leads the row
+        column_names = [column_name for column_name in task_output_format if column_name != 'Issue Key']
+        if 'Issue Key' in task_output_format:
+            column_names = ['Issue Key'] + column_names
+
+        for column_name in column_names:
+
+            if column_name in _unexported_columns or column_name in ignore_fields:
+                continue
+
+            if source == 'memory':
+                if column_name == 'Issue Key':
+                    getter = itemgetter(0)
+                else:
+                    getter = _task_field_getter(column_name)
+            else:
+                getter = itemgetter(len(self.database_columns))
+                self.database_columns.append(database_column_name(column_name))
+
+            if column_name == 'Epic':
+                formatter = _epic_text
+            elif column_name == 'Assignee' or column_name == 'Reporter':
+                formatter = normalized_name
+            elif column_name in date_fields:
+                formatter = _date_from_memory if source == 'memory' else _date_from_database
+            elif column_name in time_fields:
+                formatter = hours
+            elif column_name == 'Unplanned' and source == 'database':
+                formatter = _unplanned_from_database
+            else:
+                formatter = _as_text
+
+            self.column_names.append(column_name)
+            self._columns.append((getter, formatter))
+
+    def format_row(self, row):
+        return [formatter(getter(row)) for getter, formatter in self._columns]
+
+    def format_record(self, row):
+        return dict(zip(self.column_names, self.format_row(row)))
+
+
+def _task_field_getter(column_name):
+
+    def getter(row):
+        return row[1][column_name]
+
+    return getter
+
+
+def write_rows(filename, formatter, rows, output_format='csv'):
+
+    # rows are streamed straight through the formatter into the file so nothing is built
+    # up in memory, returns the number of rows written
+    if output_format not in export_formats:
+        raise ValueError('Unknown export format %s, expected one of %s' % (output_format, ', '.join(export_formats)))
+
+    number_of_rows = 0
+
+    with open(file=filename, mode='w', newline='', errors='ignore', buffering=_BUFFER_SIZE) as export_file:
+
+        if output_format == 'jsonl':
+
+            for row in rows:
+                export_file.write(json.dumps(formatter.format_record(row)))
+                export_file.write('\n')
+                number_of_rows = number_of_rows + 1
+
+        else:
+
+            export_writer = csv.writer(export_file,
+                                       delimiter=_delimiters[output_format],
+                                       quotechar='"',
+                                       quoting=csv.QUOTE_MINIMAL)
+
+            export_writer.writerow(formatter.column_names)
+
+            for row in rows:
+                export_writer.writerow(formatter.format_row(row))
+                number_of_rows = number_of_rows + 1
+
+    return number_of_rows
+
+
+def memory_rows(tasks, issue_keys=None):
+
+    if issue_keys is None:
+        issue_keys = tasks
+
+    for issue_key in issue_keys:
+        yield issue_key, tasks[issue_key]
+
+
+def database_rows(database_filename, formatter, table='tasks'):
+
+    # the cursor is iterated so rows are fetched as they are written instead of all at once
+    connection = sqlite3.connect(database_filename)
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute('SELECT %s FROM %s ORDER BY rowid' % (', '.join(formatter.database_columns), table))
+
+        for row in cursor:
+            yield row
+
+    finally:
+        connection.close()
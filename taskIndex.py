@@ -0,0 +1,67 @@
+# coding=utf-8
+"""
+Sorted start date index over the loaded tasks so period bounded
+computations only visit the tasks that start inside the period
+"""
+__author__ = 'Scott Davis'
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def datetime_to_epoch(date_time):
+    # tasks carry naive datetimes so the epoch is naive as well, any time
+    # zone information is dropped the same way the period comparisons ignore it
+    if date_time.tzinfo is not None:
+        date_time = date_time.replace(tzinfo=None)
+    return (date_time - _EPOCH).total_seconds()
+
+
+class StartDateIndex:
+
+    def __init__(self, tasks, start_date_for_task):
+
+        # position of every issue key in task insertion order so range queries
+        # can hand tasks back in the same order a full scan would visit them
+        self.issue_keys = list(tasks.keys())
+
+        # tasks that have no start or created date can never be in a period
+        entries = []
+        self.undated_issue_keys = []
+        for position, issue_key in enumerate(self.issue_keys):
+            start_date_time = start_date_for_task(issue_key)
+            if start_date_time is not None:
+                entries.append((datetime_to_epoch(start_date_time), position))
+            else:
+                self.undated_issue_keys.append(issue_key)
+
+        entries.sort()
+
+        self.start_epochs = array('d', [entry[0] for entry in entries])
+        self.positions = array('l', [entry[1] for entry in entries])
+
+    def __len__(self):
+        return len(self.start_epochs)
+
+    def positions_in_period(self, start_date_time, end_date_time):
+
+        # bounds are inclusive to match the period check done on a single task
+        low = bisect_left(self.start_epochs, datetime_to_epoch(start_date_time))
+        high = bisect_right(self.start_epochs, datetime_to_epoch(end_date_time))
+
+        return sorted(self.positions[low:high])
+
+    def issue_keys_in_period(self, start_date_time, end_date_time):
+
+        issue_keys = self.issue_keys
+        return [issue_keys[position] for position in self.positions_in_period(start_date_time, end_date_time)]
+
+    def count_in_period(self, start_date_time, end_date_time):
+
+        low = bisect_left(self.start_epochs, datetime_to_epoch(start_date_time))
+        high = bisect_right(self.start_epochs, datetime_to_epoch(end_date_time))
+
+        return max(high - low, 0)
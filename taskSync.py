@@ -0,0 +1,230 @@
+# coding=utf-8
+"""
+Long running sync of Jira and Smartsheet into the tasks database so report
+runs only attach to the database.  Pulls are incremental on a schedule with
+jitter and backoff on failures, and the status of every sync is recorded
+in the sync_status table of the tasks database
+"""
+__author__ = 'Scott Davis'
+
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+_SYNC_STATUS_COLUMNS = ['sync_name',
+                        'last_attempt',
+                        'last_success',
+                        'updated_since',
+                        'rows_changed',
+                        'duration_seconds',
+                        'consecutive_failures',
+                        'last_error']
+
+_DATE_TIME_FORMAT = '%m/%d/%Y %H:%M:%S'
+
+
+def _date_time_to_string(date_time):
+
+    if date_time is None:
+        return None
+
+    return date_time.strftime(_DATE_TIME_FORMAT)
+
+
+def _string_to_date_time(date_time):
+
+    if date_time is None:
+        return None
+
+    return datetime.strptime(date_time, _DATE_TIME_FORMAT)
+
+
+def _create_sync_status_table(cursor):
+
+    cursor.execute('CREATE TABLE IF NOT EXISTS sync_status (sync_name TEXT PRIMARY KEY NOT NULL, '
+                   'last_attempt TEXT, last_success TEXT, updated_since TEXT, rows_changed INTEGER, '
+                   'duration_seconds REAL, consecutive_failures INTEGER, last_error TEXT)')
+
+    # the time a pull took was first recorded as its lag, which is how far behind Jira the database is
+    cursor.execute('PRAGMA table_info(sync_status)')
+    if 'lag_seconds' in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE sync_status RENAME COLUMN lag_seconds TO duration_seconds')
+
+
+def read_sync_status(database_filename, sync_name='tasks'):
+
+    # Status of the last sync or None when the database was never synced.  The lag is how far
+    # behind Jira the database is now, from the start of the last successful pull.
+    connection = sqlite3.connect(database_filename)
+
+    try:
+        cursor = connection.cursor()
+        _create_sync_status_table(cursor)
+
+        cursor.execute('SELECT %s FROM sync_status WHERE sync_name = ?' % ', '.join(_SYNC_STATUS_COLUMNS),
+                       [sync_name])
+        row = cursor.fetchone()
+
+    finally:
+        connection.close()
+
+    if row is None:
+        return None
+
+    sync_status = dict(zip(_SYNC_STATUS_COLUMNS, row))
+
+    for column_name in ['last_attempt', 'last_success', 'updated_since']:
+        sync_status[column_name] = _string_to_date_time(sync_status[column_name])
+
+    sync_status['current_lag_seconds'] = None
+    if sync_status['updated_since'] is not None:
+        sync_status['current_lag_seconds'] = (datetime.now() - sync_status['updated_since']).total_seconds()
+
+    return sync_status
+
+
+def _write_sync_status(database_filename, sync_status):
+
+    connection = sqlite3.connect(database_filename)
+
+    try:
+        cursor = connection.cursor()
+        _create_sync_status_table(cursor)
+
+        values = [sync_status.get(column_name) for column_name in _SYNC_STATUS_COLUMNS]
+        values = [_date_time_to_string(value) if isinstance(value, datetime) else value for value in values]
+
+        cursor.execute('INSERT OR REPLACE INTO sync_status (%s) VALUES (%s)' %
+                       (', '.join(_SYNC_STATUS_COLUMNS), ', '.join(['?'] * len(_SYNC_STATUS_COLUMNS))),
+                       values)
+
+        connection.commit()
+
+    finally:
+        connection.close()
+
+
+def next_sync_delay(interval_seconds, jitter, consecutive_failures, max_backoff_seconds, random_generator=random):
+
+    # Seconds to wait before the next sync.  The interval is doubled for every failure in a row
+    # up to the maximum backoff and then moved by up to jitter (a fraction of the delay) either
+    # way so many daemons do not all pull at the same time.
+    delay = interval_seconds
+
+    if consecutive_failures > 0:
+        delay = min(interval_seconds * (2 ** consecutive_failures), max_backoff_seconds)
+
+    return max(delay + delay * jitter * random_generator.uniform(-1.0, 1.0), 0.0)
+
+
+class SyncDaemon:
+
+    def __init__(self,
+                 processor,
+                 interval_seconds=900,
+                 jitter=0.1,
+                 max_backoff_seconds=3600,
+                 overlap_seconds=120,
+                 snapshot_filename=None,
+                 sync_name='tasks',
+                 verbose=False):
+
+        # The processor is created with its Jira and Smartsheet settings and sync_on_start=False.
+        # Every pull asks for the tasks updated since the start of the last successful pull less
+        # the overlap so tasks updated while a pull was running are not missed.
+        self.processor = processor
+        self.database_filename = processor.database_filename
+        self.interval_seconds = interval_seconds
+        self.jitter = jitter
+        self.max_backoff_seconds = max_backoff_seconds
+        self.overlap_seconds = overlap_seconds
+        self.snapshot_filename = snapshot_filename
+        self.sync_name = sync_name
+        self.verbose = verbose
+
+    def sync_once(self):
+
+        # a database that was never synced successfully is pulled in full
+        sync_status = read_sync_status(self.database_filename, self.sync_name)
+
+        if sync_status is None:
+            sync_status = {'sync_name': self.sync_name, 'consecutive_failures': 0}
+
+        updated_since = None
+        if sync_status.get('last_success') is not None:
+            updated_since = sync_status['updated_since'] - timedelta(seconds=self.overlap_seconds)
+
+        sync_start = datetime.now()
+        sync_status['last_attempt'] = sync_start
+
+        try:
+            rows_changed = self.processor.sync_tasks(updated_since=updated_since)
+
+        except Exception as sync_error:
+            self._write_failure(sync_status, sync_error)
+            raise
+
+        sync_end = datetime.now()
+
+        sync_status['last_success'] = sync_end
+        sync_status['updated_since'] = sync_start
+        sync_status['rows_changed'] = rows_changed
+        sync_status['duration_seconds'] = (sync_end - sync_start).total_seconds()
+        sync_status['consecutive_failures'] = 0
+        sync_status['last_error'] = None
+
+        _write_sync_status(self.database_filename, sync_status)
+
+        # The snapshot is saved after the last write to the database so it is newer than the
+        # database and the next report run warm starts from it instead of reloading the database.
+        # The tasks are in the database already when it fails so the sync still counts as done.
+        if self.snapshot_filename is not None:
+            try:
+                self.processor.save_snapshot(self.snapshot_filename)
+            except Exception as snapshot_error:
+                self._write_failure(sync_status, snapshot_error)
+                raise
+
+        return sync_status
+
+    def _write_failure(self, sync_status, sync_error):
+
+        sync_status['consecutive_failures'] = (sync_status.get('consecutive_failures') or 0) + 1
+        sync_status['last_error'] = '%s: %s' % (type(sync_error).__name__, sync_error)
+        _write_sync_status(self.database_filename, sync_status)
+
+    def run(self, max_syncs=None, sleep=time.sleep):
+
+        # sync until interrupted, or max_syncs times, waiting between syncs
+        number_of_syncs = 0
+        consecutive_failures = 0
+
+        while max_syncs is None or number_of_syncs < max_syncs:
+
+            number_of_syncs += 1
+
+            try:
+                sync_status = self.sync_once()
+                consecutive_failures = 0
+
+                if self.verbose:
+                    print('Sync %s finished with %d task(s) changed in %1.1f seconds' %
+                          (self.sync_name, sync_status['rows_changed'], sync_status['duration_seconds']))
+
+            except KeyboardInterrupt:
+                raise
+
+            except Exception as sync_error:
+                consecutive_failures += 1
+                print('ERROR: sync %s failed (%d in a row): %s' % (self.sync_name, consecutive_failures, sync_error))
+
+            if max_syncs is not None and number_of_syncs >= max_syncs:
+                break
+
+            sleep(next_sync_delay(self.interval_seconds,
+                                  self.jitter,
+                                  consecutive_failures,
+                                  self.max_backoff_seconds))
+
+        return number_of_syncs